@@ -1,3 +1,5 @@
+import uuid
+
 from django.db.models import Q
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
@@ -6,8 +8,19 @@ from rest_framework.response import Response
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 from rest_framework.views import APIView
 
-from myutils.api_mixins import BaseCRUDMixin, RecommendationMixin
+from myutils.api_mixins import (
+    BaseCRUDMixin,
+    BatchLookupMixin,
+    BatchRecommendationMixin,
+    RecommendationMixin,
+    SearchMixin,
+)
+from myutils.cache_codec import recommendation_cache_key
+from myutils.catalog import catalog_cache_key, catalog_condition
 from myutils.ExtraTools import get_cached_or_queryset
+from myutils.fast_serializers import FastBookListSerializer
+from myutils.pagination import keyset_page, parse_page_size
+from myutils.rated_items import filter_rated
 from RecAnthology.custom_throttles import AdminThrottle
 
 from .serializers import Book, BookSerializer, Genre, GenreSerializer
@@ -21,6 +34,7 @@ class IndexView(APIView):
         return Response("OK")
 
 
+@catalog_condition("book")
 class AllGenres(BaseCRUDMixin, APIView):
     permission_classes = [AllowAny]
     model = Genre
@@ -28,7 +42,7 @@ class AllGenres(BaseCRUDMixin, APIView):
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
 
     def get(self, request):
-        return self.handle_list("books_genres")
+        return self.handle_list(catalog_cache_key("books_genres", "book"))
 
 
 class CreateGenre(BaseCRUDMixin, APIView):
@@ -41,17 +55,19 @@ class CreateGenre(BaseCRUDMixin, APIView):
         return self.handle_create(request)
 
 
+@catalog_condition("book")
 class AllBooks(APIView):
     model = Book
     serializer = BookSerializer
+    fast_serializer = FastBookListSerializer
     permission_classes = [AllowAny]
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
 
     def get(self, request):
         data = get_cached_or_queryset(
-            "all_books",
+            catalog_cache_key("all_books", "book"),
             self.model.objects.all().order_by("-likedPercent")[:50],
-            self.serializer,
+            self.fast_serializer,
             many=True,
         )
         return Response({"data": data})
@@ -104,6 +120,7 @@ class GetBook(APIView):
 class FilterBooks(APIView):
     model = Book
     serializer = BookSerializer
+    fast_serializer = FastBookListSerializer
     permission_classes = [AllowAny]
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
 
@@ -121,11 +138,22 @@ class FilterBooks(APIView):
         if title:
             query &= Q(title__icontains=title)
         if book_id:
-            query &= Q(id__icontains=book_id)
+            try:
+                query &= Q(id=uuid.UUID(book_id))
+            except ValueError:
+                return Response(
+                    {"error": "id must be a valid UUID."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
         if author:
             query &= Q(author__icontains=author)
         if genre:
-            query &= Q(genre__name__icontains=genre)
+            # Subquery instead of a join so multi-genre matches aren't duplicated
+            query &= Q(
+                pk__in=self.model.genre.through.objects.filter(
+                    genre__name__icontains=genre
+                ).values("book_id")
+            )
         if liked_percent:
             try:
                 liked_value = int(liked_percent)
@@ -136,29 +164,54 @@ class FilterBooks(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-        base_qs = (
-            self.model.objects.filter(query).order_by("-likedPercent")
-            if query
-            else self.model.objects.order_by("-likedPercent")[:50]
-        )
+        try:
+            page_size = parse_page_size(request.GET.get("page_size"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        base_qs = self.model.objects.filter(query)
 
         # Filter for rated and unrated books for the authenticated user
         user = request.user if request.user.is_authenticated else None
         if rated is not None and user is not None:
-            rated_bool = rated.lower() == "true"
-            # Import inside to avoid potential circular import
-            from users.models import UserBookRating
+            base_qs = filter_rated(base_qs, user, "book", rated.lower() == "true")
 
-            rated_books_qs = UserBookRating.objects.filter(user=user).values_list(
-                "book_id", flat=True
+        try:
+            page, next_cursor = keyset_page(
+                base_qs, "likedPercent", page_size, request.GET.get("cursor")
             )
-            if rated_bool:
-                base_qs = base_qs.filter(id__in=rated_books_qs)
-            else:
-                base_qs = base_qs.exclude(id__in=rated_books_qs)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        serialized = self.serializer(base_qs, many=True).data
-        return Response({"data": serialized})
+        serialized = self.fast_serializer(page).data
+        return Response({"data": serialized, "next": next_cursor})
+
+
+class BatchBooks(BatchLookupMixin, APIView):
+    model = Book
+    serializer = BookSerializer
+    fast_serializer = FastBookListSerializer
+    permission_classes = [AllowAny]
+    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+
+    def get(self, request):
+        return self.handle_batch(request.GET.get("ids", ""))
+
+    def post(self, request):
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        return self.handle_batch(ids)
+
+
+class SearchBooks(SearchMixin, APIView):
+    model = Book
+    serializer = BookSerializer
+    fast_serializer = FastBookListSerializer
+    permission_classes = [AllowAny]
+    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+    item_type_key = "book"
+
+    def get(self, request):
+        return self.handle_search(request)
 
 
 class PublicRecommendBooks(RecommendationMixin, APIView):
@@ -166,8 +219,10 @@ class PublicRecommendBooks(RecommendationMixin, APIView):
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
     model = Book
     serializer = BookSerializer
+    fast_serializer = FastBookListSerializer
     item_type_key = "book"
     allowed_types = ("books",)
+    compact_fields = ("id", "title")
 
     def post(self, request):
         return self.handle_public_recommendation(request, Genre)
@@ -177,9 +232,11 @@ class PrivateRecommendBooks(RecommendationMixin, APIView):
     throttle_classes = [UserRateThrottle]
     model = Book
     serializer = BookSerializer
+    fast_serializer = FastBookListSerializer
     permission_classes = [IsAuthenticated]
     item_type_key = "book"
     allowed_types = ("books",)
+    compact_fields = ("id", "title")
 
     def get(self, request):
         from users.models import UserBookRating
@@ -189,5 +246,18 @@ class PrivateRecommendBooks(RecommendationMixin, APIView):
             genre_prefs_fn=request.user.get_books_genre_preferences,
             interaction_model=UserBookRating,
             item_field="book",
-            cache_key=f"{request.user.pk}_book_recommendation",
+            cache_key=recommendation_cache_key("book", request.user.pk),
         )
+
+
+class BatchRecommendBooks(BatchRecommendationMixin, APIView):
+    model = Book
+    fast_serializer = FastBookListSerializer
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    throttle_classes = [AdminThrottle]
+    item_field = "book"
+    item_type_key = "book"
+    compact_fields = ("id", "title")
+
+    def post(self, request):
+        return self.handle_batch_recommendation(request)
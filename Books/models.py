@@ -28,6 +28,16 @@ class Book(models.Model):
     )
     pages = models.PositiveIntegerField("pages", blank=False, null=False)
     likedPercent = models.IntegerField("likedPercent", blank=False, null=False)
+    # Denormalized rating statistics, maintained by the rating write path
+    rating_count = models.PositiveIntegerField(
+        "Rating count", default=0, db_index=True, editable=False
+    )
+    rating_sum = models.PositiveIntegerField("Rating sum", default=0, editable=False)
+    high_rating_count = models.PositiveIntegerField(
+        "High rating count", default=0, editable=False
+    )
+    # Dense int id for the engine's array structures (see myutils.item_index)
+    row_id = models.IntegerField("Row id", unique=True, null=True, editable=False)
     cover_image = models.ImageField(
         "Cover Image", upload_to="book_covers/", default="book_covers/default_cover.jpg"
     )
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from myutils.serializers import GenrePrefetchListSerializer
+
 from .models import Book, Genre
 
 
@@ -46,3 +48,4 @@ class BookSerializer(serializers.Serializer):
         model = Book
         fields = "__all__"
         depth = 1
+        list_serializer_class = GenrePrefetchListSerializer
@@ -1,4 +1,14 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from users.models import CustomUser, UserBookRating
 
 from .models import Book, Genre
 
@@ -87,3 +97,219 @@ class BookTestCase(TestCase):
         self.book.delete()
         with self.assertRaises(Book.DoesNotExist):
             Book.objects.get(id=book_id)
+
+
+class FilterBooksPaginationTestCase(TestCase):
+    def setUp(self) -> None:
+        self.genre = Genre.objects.create(name="Fantasy")
+        self.other = Genre.objects.create(name="Epic Fantasy")
+        for i in range(7):
+            book = Book.objects.create(
+                title=f"Paged {i}",
+                author="Author",
+                isbn=f"page-{i}",
+                description="Test",
+                language="English",
+                pages=100,
+                likedPercent=50 + i % 3,
+            )
+            book.genre.set([self.genre, self.other])
+
+    def test_pages_cover_results_once_in_order(self):
+        url = reverse("books-filter")
+        params = {"genre": "fantasy", "page_size": 3}
+        seen = []
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            seen += response.json()["data"]
+            if response.json()["next"] is None:
+                break
+            params["cursor"] = response.json()["next"]
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len({b["id"] for b in seen}), 7)
+        liked = [b["likedPercent"] for b in seen]
+        self.assertEqual(liked, sorted(liked, reverse=True))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("books-filter"), {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 400)
+
+
+class GenreQueryCountTestCase(TestCase):
+    """Rendering a list of books must fetch genres in one batched query."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.genres = [Genre.objects.create(name=f"Count{i}") for i in range(3)]
+        self._add_books(6)
+
+    def _add_books(self, count):
+        start = Book.objects.count()
+        for i in range(start, start + count):
+            book = Book.objects.create(
+                title=f"Counted {i}",
+                author="Author",
+                isbn=f"count-{i}",
+                description="Test",
+                language="English",
+                pages=100,
+                likedPercent=i,
+            )
+            book.genre.set(self.genres[: i % 3 + 1])
+
+    def _genre_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(
+                url, data, content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 200)
+        genre_column = f'"{Genre._meta.db_table}"."name"'
+        return sum(genre_column in q["sql"] for q in ctx.captured_queries)
+
+    def test_list_endpoints_single_genre_query(self):
+        self.assertEqual(self._genre_queries("get", reverse("books-all")), 1)
+        self.assertEqual(self._genre_queries("get", reverse("books-filter")), 1)
+        self.assertEqual(
+            self._genre_queries("get", reverse("books-search") + "?q=counted"), 1
+        )
+
+    def test_recommendations_do_not_scale_with_items(self):
+        url = reverse("books-recommend-public")
+        payload = {"Count0": 5, "Count1": 3}
+        before = self._genre_queries("post", url, payload)
+        self._add_books(6)
+        self.assertEqual(self._genre_queries("post", url, payload), before)
+
+    def test_private_recommendation_queries(self):
+        user = CustomUser.objects.create_user(
+            email="count@example.com", password="password", first_name="Count"
+        )
+        UserBookRating.objects.create(user=user, book=Book.objects.first(), rating=9)
+        client = APIClient()
+        client.force_authenticate(user)
+        url = reverse("books-recommend-private")
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(client.get(url).status_code, 200)
+        self._add_books(6)
+        cache.clear()
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            self.assertEqual(client.get(url).status_code, 200)
+        with self.assertNumQueries(0):
+            client.get(url)
+
+
+class RecommendationResponseFormatTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.genre = Genre.objects.create(name="Format")
+        for i in range(4):
+            book = Book.objects.create(
+                title=f"Format {i}",
+                author="Author",
+                isbn=f"format-{i}",
+                description="Long description",
+                language="English",
+                pages=100,
+                likedPercent=i * 20,
+            )
+            book.genre.add(self.genre)
+        self.url = reverse("books-recommend-public")
+
+    def _post(self, query=""):
+        return self.client.post(
+            self.url + query, {"Format": 8}, content_type="application/json"
+        )
+
+    def test_version_2_is_ordered_list_matching_version_1(self):
+        v1 = self._post().json()
+        v2 = self._post("?version=2").json()
+        self.assertEqual(v2["version"], 2)
+        self.assertEqual(v2["length"], v1["length"])
+        self.assertEqual(v2["data"], [v1["data"][str(i)] for i in range(v1["length"])])
+
+    def test_compact_and_fields(self):
+        compact = self._post("?version=2&compact=true").json()["data"]
+        self.assertTrue(compact)
+        for entry in compact:
+            self.assertEqual(set(entry), {"relativity", "book"})
+            self.assertEqual(set(entry["book"]), {"id", "title"})
+
+        picked = self._post("?version=2&fields=pages").json()["data"]
+        self.assertEqual(set(picked[0]["book"]), {"id", "pages"})
+
+    def test_invalid_options_rejected(self):
+        self.assertEqual(self._post("?version=3").status_code, 400)
+        self.assertEqual(self._post("?fields=title,bogus").status_code, 400)
+
+    def test_private_cache_serves_every_shape(self):
+        from rest_framework.test import APIClient
+
+        from users.models import CustomUser, UserBooksGenrePreference
+
+        user = CustomUser.objects.create_user(
+            email="format@example.com", password="password", first_name="Format"
+        )
+        UserBooksGenrePreference.objects.create(
+            user=user, genre=self.genre, preference=8
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        url = reverse("books-recommend-private")
+
+        full = client.get(url + "?version=2").json()
+        self.assertTrue(full["data"])
+        self.assertIn("description", full["data"][0]["book"])
+        with self.assertNumQueries(0):
+            compact = client.get(url + "?version=2&compact=true").json()
+        self.assertEqual(
+            [e["book"]["id"] for e in compact["data"]],
+            [e["book"]["id"] for e in full["data"]],
+        )
+        self.assertNotIn("description", compact["data"][0]["book"])
+        legacy = client.get(url).json()
+        self.assertEqual(legacy["data"]["0"], full["data"][0])
+
+
+class BatchBooksTestCase(TestCase):
+    def setUp(self) -> None:
+        genre = Genre.objects.create(name="Batch")
+        self.books = []
+        for i in range(3):
+            book = Book.objects.create(
+                title=f"Batch {i}",
+                author="Author",
+                isbn=f"batch-{i}",
+                pages=100,
+                likedPercent=i,
+            )
+            book.genre.add(genre)
+            self.books.append(book)
+        self.url = reverse("books-batch")
+
+    def test_returns_requested_order_and_missing(self):
+        unknown = str(uuid.uuid4())
+        ids = [str(self.books[2].pk), unknown, str(self.books[0].pk)]
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {"ids": ",".join(ids)})
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([b["title"] for b in body["data"]], ["Batch 2", "Batch 0"])
+        self.assertEqual(body["data"][0]["genre"], ["Batch"])
+        self.assertEqual(body["missing"], [unknown])
+
+    def test_post_body(self):
+        response = self.client.post(
+            self.url,
+            {"ids": [str(b.pk) for b in self.books]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.json()["length"], 3)
+
+    def test_invalid_input(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"ids": "nope"}).status_code, 400)
+        too_many = ",".join(str(self.books[0].pk) for _ in range(101))
+        self.assertEqual(self.client.get(self.url, {"ids": too_many}).status_code, 400)
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from users.API_views import RateBook
+from users.API_views import BulkRateBooks, RateBook
 
 from . import API_views, views
 
@@ -14,6 +14,8 @@ urlpatterns = [
     path("api/books/", API_views.AllBooks.as_view(), name="books-all"),
     path("api/books/<int:id_query>/", API_views.GetBook.as_view(), name="book-detail"),
     path("api/books/filter/", API_views.FilterBooks.as_view(), name="books-filter"),
+    path("api/books/search/", API_views.SearchBooks.as_view(), name="books-search"),
+    path("api/books/batch/", API_views.BatchBooks.as_view(), name="books-batch"),
     path(
         "api/books/genre/create/",
         API_views.CreateGenre.as_view(),
@@ -30,5 +32,11 @@ urlpatterns = [
         API_views.PrivateRecommendBooks.as_view(),
         name="books-recommend-private",
     ),
+    path(
+        "api/books/recommend/batch/",
+        API_views.BatchRecommendBooks.as_view(),
+        name="books-recommend-batch",
+    ),
     path("api/books/rate/", RateBook.as_view(), name="books-rate"),
+    path("api/books/rate/bulk/", BulkRateBooks.as_view(), name="books-rate-bulk"),
 ]
@@ -111,7 +111,17 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# JSON renderer for API responses; myutils.renderers.FastJSONRenderer uses
+# orjson when installed, rest_framework.renderers.JSONRenderer is the stdlib one
+JSON_RENDERER = get_env(
+    "JSON_RENDERER", "myutils.renderers.FastJSONRenderer", required=False
+)
+
 REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": (
+        JSON_RENDERER,
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
@@ -152,6 +162,26 @@ CACHES = {
     }
 }
 
+# "sync" runs preference/cache maintenance inside the rating request.
+# "deferred" queues it for `python manage.py process_rating_events`.
+RATING_WORK_MODE = get_env("RATING_WORK_MODE", "sync", required=False)
+
+# "python" computes item similarities from co-raters on demand.
+# "cooccurrence" reads them from the table kept by `refresh_cooccurrence`.
+SIMILARITY_BACKEND = get_env("SIMILARITY_BACKEND", "python", required=False)
+
+# Build the engines' catalog index and snapshots in the WSGI/ASGI entry point,
+# so prefork workers share them (run gunicorn with --preload)
+PRELOAD_ENGINE_STATE = os.environ.get("PRELOAD_ENGINE_STATE", "False").lower() in [
+    "1",
+    "true",
+    "t",
+]
+
+# Directory written by `export_engine_snapshot`; preloading reads the engine
+# state from it when it is of the current catalog generation
+ENGINE_SNAPSHOT_DIR = get_env("ENGINE_SNAPSHOT_DIR", "", required=False)
+
 AUTH_USER_MODEL = "users.CustomUser"
 ACCOUNT_AUTHENTICATION_METHOD = "email"
 LOGIN_REDIRECT_URL = "/"
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "RecAnthology.settings")
 
 application = get_wsgi_application()
+
+# Opt-in: build engine state once, before a prefork server forks its workers
+from myutils.preload import preload_enabled, preload_engine_state  # noqa: E402
+
+if preload_enabled():
+    preload_engine_state()
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db.models import Q
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
@@ -6,13 +8,25 @@ from rest_framework.response import Response
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 from rest_framework.views import APIView
 
-from myutils.api_mixins import BaseCRUDMixin, RecommendationMixin
+from myutils.api_mixins import (
+    BaseCRUDMixin,
+    BatchLookupMixin,
+    BatchRecommendationMixin,
+    RecommendationMixin,
+    SearchMixin,
+)
+from myutils.cache_codec import recommendation_cache_key
+from myutils.catalog import catalog_cache_key, catalog_condition
 from myutils.ExtraTools import get_cached_or_queryset
+from myutils.fast_serializers import FastTvMediaListSerializer
+from myutils.pagination import keyset_page, parse_page_size
+from myutils.rated_items import filter_rated
 from RecAnthology.custom_throttles import AdminThrottle
 
 from .serializers import Genre, GenreSerializer, TvMedia, TvMediaSerializer
 
 
+@catalog_condition("tvmedia")
 class AllGenres(BaseCRUDMixin, APIView):
     permission_classes = [AllowAny]
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
@@ -20,7 +34,7 @@ class AllGenres(BaseCRUDMixin, APIView):
     serializer = GenreSerializer
 
     def get(self, request):
-        return self.handle_list("tvmedia_genres")
+        return self.handle_list(catalog_cache_key("tvmedia_genres", "tvmedia"))
 
 
 class CreateGenre(BaseCRUDMixin, APIView):
@@ -33,17 +47,19 @@ class CreateGenre(BaseCRUDMixin, APIView):
         return self.handle_create(request)
 
 
+@catalog_condition("tvmedia")
 class AllTvMedia(APIView):
     permission_classes = [AllowAny]
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
     model = TvMedia
     serializer = TvMediaSerializer
+    fast_serializer = FastTvMediaListSerializer
 
     def get(self, request):
         data = get_cached_or_queryset(
-            "all_tvmedia",
+            catalog_cache_key("all_tvmedia", "tvmedia"),
             self.model.objects.all().order_by("-startyear")[:50],
-            self.serializer,
+            self.fast_serializer,
             many=True,
         )
         return Response({"data": data})
@@ -96,70 +112,93 @@ class GetTvMedia(APIView):
 class FilterTvMedia(APIView):
     model = TvMedia
     serializer = TvMediaSerializer
+    fast_serializer = FastTvMediaListSerializer
     permission_classes = [AllowAny]
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
 
-    def get(self, request):
-        title = request.GET.get("title")
-        media_id = request.GET.get("id")
-        media_type = request.GET.get("media_type")
-        genre = request.GET.get("genre")
-        startyear = request.GET.get("start_year")
-        endyear = request.GET.get("end_year")
-        rated = request.GET.get("rated")  # "true" or "false" as string
-
+    def _filter_query(self, params) -> Q:
+        """The title/id/type/genre/year filters as a ``Q``. Raises ``ValueError``."""
         query = Q()
-        if title:
-            query &= Q(original_title__icontains=title)
-        if media_id:
-            query &= Q(id__icontains=media_id)
-        if media_type:
-            query &= Q(media_type__icontains=media_type)
-        if genre:
-            query &= Q(genre__name__icontains=genre)
-        if startyear:
-            try:
-                query &= Q(startyear__gte=int(startyear))
-            except (ValueError, TypeError):
-                return Response(
-                    {"error": "start_year must be an integer."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-        if endyear:
+        if params.get("title"):
+            query &= Q(original_title__icontains=params["title"])
+        if params.get("id"):
             try:
-                query &= Q(startyear__lte=int(endyear))
-            except (ValueError, TypeError):
-                return Response(
-                    {"error": "end_year must be an integer."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+                query &= Q(id=uuid.UUID(params["id"]))
+            except ValueError as e:
+                raise ValueError("id must be a valid UUID.") from e
+        if params.get("media_type"):
+            query &= Q(media_type__icontains=params["media_type"])
+        if params.get("genre"):
+            # Subquery instead of a join so multi-genre matches aren't duplicated
+            query &= Q(
+                pk__in=self.model.genre.through.objects.filter(
+                    genre__name__icontains=params["genre"]
+                ).values("tvmedia_id")
+            )
+        for param, lookup in (("start_year", "gte"), ("end_year", "lte")):
+            if params.get(param):
+                try:
+                    query &= Q(**{f"startyear__{lookup}": int(params[param])})
+                except (TypeError, ValueError) as e:
+                    raise ValueError(f"{param} must be an integer.") from e
+        return query
 
-        base_qs = (
-            self.model.objects.filter(query).order_by("-startyear")
-            if query
-            else self.model.objects.order_by("-startyear")[:50]
-        )
+    def get(self, request):
+        rated = request.GET.get("rated")  # "true" or "false" as string
+        try:
+            query = self._filter_query(request.GET)
+            page_size = parse_page_size(request.GET.get("page_size"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        base_qs = self.model.objects.filter(query)
 
         # Filtering by rating status
         user = request.user if request.user.is_authenticated else None
-        if rated is not None and user is not None:
-            from users.models import UserTvMediaRating
+        if (
+            user is not None
+            and rated is not None
+            and rated.lower() in ("true", "false")
+        ):
+            # Rated / not rated by current user
+            base_qs = filter_rated(base_qs, user, "tvmedia", rated.lower() == "true")
 
-            if rated.lower() == "true":
-                # Rated by current user
-                rated_ids = UserTvMediaRating.objects.filter(user=user).values_list(
-                    "tvmedia_id", flat=True
-                )
-                base_qs = base_qs.filter(id__in=rated_ids)
-            elif rated.lower() == "false":
-                # Not rated by current user
-                rated_ids = UserTvMediaRating.objects.filter(user=user).values_list(
-                    "tvmedia_id", flat=True
-                )
-                base_qs = base_qs.exclude(id__in=rated_ids)
+        try:
+            page, next_cursor = keyset_page(
+                base_qs, "startyear", page_size, request.GET.get("cursor")
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serialized = self.fast_serializer(page).data
+        return Response({"data": serialized, "next": next_cursor})
+
+
+class BatchTvMedia(BatchLookupMixin, APIView):
+    model = TvMedia
+    serializer = TvMediaSerializer
+    fast_serializer = FastTvMediaListSerializer
+    permission_classes = [AllowAny]
+    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+
+    def get(self, request):
+        return self.handle_batch(request.GET.get("ids", ""))
+
+    def post(self, request):
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        return self.handle_batch(ids)
 
-        serialized = self.serializer(base_qs, many=True).data
-        return Response({"data": serialized})
+
+class SearchTvMedia(SearchMixin, APIView):
+    model = TvMedia
+    serializer = TvMediaSerializer
+    fast_serializer = FastTvMediaListSerializer
+    permission_classes = [AllowAny]
+    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+    item_type_key = "media"
+
+    def get(self, request):
+        return self.handle_search(request)
 
 
 class PublicRecommendTvMedia(RecommendationMixin, APIView):
@@ -167,8 +206,10 @@ class PublicRecommendTvMedia(RecommendationMixin, APIView):
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
     model = TvMedia
     serializer = TvMediaSerializer
+    fast_serializer = FastTvMediaListSerializer
     item_type_key = "media"
     allowed_types = ("tvmedia",)
+    compact_fields = ("id", "original_title", "primary_title")
 
     def post(self, request):
         return self.handle_public_recommendation(request, Genre)
@@ -178,9 +219,11 @@ class PrivateRecommendTvMedia(RecommendationMixin, APIView):
     throttle_classes = [UserRateThrottle]
     model = TvMedia
     serializer = TvMediaSerializer
+    fast_serializer = FastTvMediaListSerializer
     permission_classes = [IsAuthenticated]
     item_type_key = "media"
     allowed_types = ("tvmedia",)
+    compact_fields = ("id", "original_title", "primary_title")
 
     def get(self, request):
         from users.models import UserTvMediaRating
@@ -190,5 +233,18 @@ class PrivateRecommendTvMedia(RecommendationMixin, APIView):
             genre_prefs_fn=request.user.get_media_genre_preferences,
             interaction_model=UserTvMediaRating,
             item_field="tvmedia",
-            cache_key=f"private_tvmedia_recommendation_user_{request.user.pk}",
+            cache_key=recommendation_cache_key("tvmedia", request.user.pk),
         )
+
+
+class BatchRecommendTvMedia(BatchRecommendationMixin, APIView):
+    model = TvMedia
+    fast_serializer = FastTvMediaListSerializer
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    throttle_classes = [AdminThrottle]
+    item_field = "tvmedia"
+    item_type_key = "media"
+    compact_fields = ("id", "original_title", "primary_title")
+
+    def post(self, request):
+        return self.handle_batch_recommendation(request)
@@ -24,6 +24,16 @@ class TvMedia(models.Model):
     over18 = models.BooleanField("Over 18", default=False)
     startyear = models.IntegerField("Start year", null=True)
     length = models.PositiveIntegerField("Length in mins", default=0)
+    # Denormalized rating statistics, maintained by the rating write path
+    rating_count = models.PositiveIntegerField(
+        "Rating count", default=0, db_index=True, editable=False
+    )
+    rating_sum = models.PositiveIntegerField("Rating sum", default=0, editable=False)
+    high_rating_count = models.PositiveIntegerField(
+        "High rating count", default=0, editable=False
+    )
+    # Dense int id for the engine's array structures (see myutils.item_index)
+    row_id = models.IntegerField("Row id", unique=True, null=True, editable=False)
     genre = models.ManyToManyField(Genre, related_name="tvmedia")
     cover_image = models.ImageField(
         "Cover Image",
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from myutils.serializers import GenrePrefetchListSerializer
+
 from .models import Genre, TvMedia
 
 
@@ -40,3 +42,4 @@ class TvMediaSerializer(serializers.Serializer):
         model = TvMedia
         fields = "__all__"
         depth = 1
+        list_serializer_class = GenrePrefetchListSerializer
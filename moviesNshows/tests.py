@@ -1,6 +1,14 @@
 import uuid
 
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from users.models import CustomUser, UserTvMediaRating
 
 from .models import Genre, TvMedia
 
@@ -83,3 +91,175 @@ class TvMediaTestCase(TestCase):
         self.tv_media.delete()
         with self.assertRaises(TvMedia.DoesNotExist):
             TvMedia.objects.get(id=tv_media_id)
+
+
+class FilterTvMediaPaginationTestCase(TestCase):
+    def setUp(self) -> None:
+        for i, year in enumerate([2001, None, 2003, 2003, None]):
+            TvMedia.objects.create(
+                media_type="Movie",
+                original_title=f"Paged {i}",
+                primary_title=f"Paged {i}",
+                startyear=year,
+            )
+
+    def test_null_years_paged_last(self):
+        url = reverse("tvmedia-filter")
+        params = {"page_size": 2}
+        years = []
+        while True:
+            data = self.client.get(url, params).json()
+            years += [m["startyear"] for m in data["data"]]
+            if data["next"] is None:
+                break
+            params["cursor"] = data["next"]
+        self.assertEqual(years, [2003, 2003, 2001, None, None])
+
+    def test_year_range_and_invalid_params(self):
+        url = reverse("tvmedia-filter")
+        data = self.client.get(url, {"start_year": 2002, "end_year": 2003}).json()
+        self.assertEqual([m["startyear"] for m in data["data"]], [2003, 2003])
+        for params, message in (
+            ({"start_year": "x"}, "start_year must be an integer."),
+            ({"id": "not-a-uuid"}, "id must be a valid UUID."),
+        ):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {"error": message})
+
+
+class GenreQueryCountTestCase(TestCase):
+    """Rendering a list of TV/media must fetch genres in one batched query."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.genres = [Genre.objects.create(name=f"Count{i}") for i in range(3)]
+        self._add_media(6)
+
+    def _add_media(self, count):
+        start = TvMedia.objects.count()
+        for i in range(start, start + count):
+            media = TvMedia.objects.create(
+                media_type="Movie",
+                original_title=f"Counted {i}",
+                primary_title=f"Counted {i}",
+                startyear=2000 + i,
+            )
+            media.genre.set(self.genres[: i % 3 + 1])
+
+    def _cold_queries(self, request):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(request().status_code, 200)
+        return len(ctx.captured_queries)
+
+    def _assert_constant_queries(self, request):
+        """Same query count, cold cache, after the catalog doubles."""
+        expected = self._cold_queries(request)
+        self._add_media(6)
+        cache.clear()
+        with self.assertNumQueries(expected):
+            self.assertEqual(request().status_code, 200)
+
+    def test_list_endpoints_single_genre_query(self):
+        for url in (
+            reverse("tvmedia-all"),
+            reverse("tvmedia-filter"),
+            reverse("tvmedia-search") + "?q=counted",
+        ):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            genre_column = f'"{Genre._meta.db_table}"."name"'
+            genre_queries = [
+                q for q in ctx.captured_queries if genre_column in q["sql"]
+            ]
+            self.assertEqual(len(genre_queries), 1, url)
+
+    def test_all_tvmedia_queries(self):
+        url = reverse("tvmedia-all")
+        self._assert_constant_queries(lambda: self.client.get(url))
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_public_recommendation_queries(self):
+        url = reverse("tvmedia-recommend-public")
+        self._assert_constant_queries(
+            lambda: self.client.post(
+                url, {"Count0": 5, "Count1": 3}, content_type="application/json"
+            )
+        )
+
+    def test_private_recommendation_queries(self):
+        user = CustomUser.objects.create_user(
+            email="count@example.com", password="password", first_name="Count"
+        )
+        UserTvMediaRating.objects.create(
+            user=user, tvmedia=TvMedia.objects.first(), rating=9
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        url = reverse("tvmedia-recommend-private")
+        self._assert_constant_queries(lambda: client.get(url))
+
+
+class BatchTvMediaTestCase(TestCase):
+    def test_batch_lookup(self):
+        media = [
+            TvMedia.objects.create(media_type="Movie", original_title=f"Batch {i}")
+            for i in range(2)
+        ]
+        ids = [str(media[1].pk), str(uuid.uuid4()), str(media[0].pk)]
+        response = self.client.post(
+            reverse("tvmedia-batch"), {"ids": ids}, content_type="application/json"
+        )
+        body = response.json()
+        self.assertEqual(
+            [m["original_title"] for m in body["data"]], ["Batch 1", "Batch 0"]
+        )
+        self.assertEqual(body["missing"], [ids[1]])
+
+
+class RateTVMediaPageTestCase(TestCase):
+    def setUp(self) -> None:
+        from users.models import CustomUser
+
+        self.user = CustomUser.objects.create_user(
+            email="rater@example.com", password="password", first_name="Rater"
+        )
+        self.media = [
+            TvMedia.objects.create(
+                media_type="Movie", original_title=f"Rate {i}", startyear=2000 + i
+            )
+            for i in range(40)
+        ]
+
+    def _rate(self, media):
+        from users.models import UserTvMediaRating
+
+        UserTvMediaRating.objects.bulk_create(
+            [UserTvMediaRating(user=self.user, tvmedia=m, rating=7) for m in media]
+        )
+
+    def _page(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("tvmedia-rate-page"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context, len(ctx.captured_queries)
+
+    def test_rated_items_excluded_and_paged(self):
+        self.client.force_login(self.user)
+        self._rate(self.media[35:])
+        context, _ = self._page()
+        titles = [m.original_title for m in context["object_list"]]
+        self.assertEqual(titles, [f"Rate {i}" for i in range(34, 4, -1)])
+        context, _ = self._page(cursor=context["next_cursor"])
+        titles = [m.original_title for m in context["object_list"]]
+        self.assertEqual(titles, [f"Rate {i}" for i in range(4, -1, -1)])
+        self.assertIsNone(context["next_cursor"])
+
+    def test_query_count_independent_of_history(self):
+        self.client.force_login(self.user)
+        _, before = self._page()
+        self._rate(self.media[:30])
+        _, after = self._page()
+        self.assertEqual(before, after)
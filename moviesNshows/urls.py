@@ -1,6 +1,6 @@
 from django.urls import path
 
-from users.API_views import RateTvMedia
+from users.API_views import BulkRateTvMedia, RateTvMedia
 
 from . import API_views, views
 
@@ -28,6 +28,10 @@ urlpatterns = [
     path(
         "api/tvmedia/filter/", API_views.FilterTvMedia.as_view(), name="tvmedia-filter"
     ),
+    path(
+        "api/tvmedia/search/", API_views.SearchTvMedia.as_view(), name="tvmedia-search"
+    ),
+    path("api/tvmedia/batch/", API_views.BatchTvMedia.as_view(), name="tvmedia-batch"),
     path(
         "api/tvmedia/genre/create/",
         API_views.CreateGenre.as_view(),
@@ -46,5 +50,11 @@ urlpatterns = [
         API_views.PrivateRecommendTvMedia.as_view(),
         name="tvmedia-recommend-private",
     ),
+    path(
+        "api/tvmedia/recommend/batch/",
+        API_views.BatchRecommendTvMedia.as_view(),
+        name="tvmedia-recommend-batch",
+    ),
     path("api/tvmedia/rate/", RateTvMedia.as_view(), name="tvmedia-rate"),
+    path("api/tvmedia/rate/bulk/", BulkRateTvMedia.as_view(), name="tvmedia-rate-bulk"),
 ]
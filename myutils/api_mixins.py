@@ -1,14 +1,18 @@
 import re
+import uuid
 from collections import OrderedDict
-from typing import Any, Dict, Type
+from itertools import islice
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
 
-from django.core.cache import cache
 from django.db.models import Model
+from django.http import StreamingHttpResponse
 from rest_framework import serializers, status
 from rest_framework.response import Response
 
 from myutils import recommendation
+from myutils.cache_codec import cache_get, cache_set
 from myutils.ExtraTools import get_cached_or_queryset
+from myutils.rated_items import rated_items
 
 
 class GenreInputSerializer(serializers.Serializer):
@@ -18,21 +22,101 @@ class GenreInputSerializer(serializers.Serializer):
         return data
 
 
-class RecommendationMixin:
+class ItemSerializationMixin:
+    """
+    Item list serialization shared by the catalog mixins: the fast
+    read-only serializer when the view sets one, else ``serializer``.
+    """
+
+    model: Any = None
+    serializer: serializers.Serializer | None = None
+    fast_serializer: Any = None
+
+    def _serialize_items(self, items, fields: Optional[Sequence[str]] = None) -> list:
+        if self.fast_serializer is not None:
+            return self.fast_serializer(items, fields=fields).data
+        data = self.serializer(items, many=True).data
+        if fields is None:
+            return data
+        return [{k: v for k, v in entry.items() if k in fields} for entry in data]
+
+    def _item_field_names(self) -> List[str]:
+        if self.fast_serializer is not None:
+            return [name for name, _ in self.fast_serializer.fields]
+        return list(self.serializer().fields)
+
+
+class RecommendationMixin(ItemSerializationMixin):
     """
     Mixin to centralize common recommendation logic for Public and Private views.
 
     Expected on the View class:
     - model: The item model (Book or TvMedia)
     - serializer: The item serializer (BookSerializer or TvMediaSerializer)
+    - fast_serializer: Optional read-only list serializer producing the same
+      JSON (see ``myutils.fast_serializers``); used for result lists
     - item_type_key: 'book' or 'media' (string key for result entries)
     - allowed_types: tuple of types for the rec engine (e.g., ('books',))
+    - compact_fields: item fields returned by ``compact=true`` (id + titles)
+
+    Response shape is selected with query parameters:
+        - ``version=1`` (default): ``data`` is a dict keyed by "0", "1", ...
+        - ``version=2``: ``data`` is an ordered list
+        - ``fields=a,b`` / ``compact=true``: trim each item to those fields
+          (``id`` is always kept)
     """
 
     model: Model | None = None
     serializer: serializers.Serializer | None = None
+    fast_serializer: Any = None
     item_type_key: str = "item"
     allowed_types: tuple = ("books",)
+    compact_fields: tuple = ("id",)
+
+    def _response_options(self, request) -> Tuple[int, Optional[List[str]]]:
+        """
+        Parse ``version``, ``compact`` and ``fields`` query parameters.
+        Raises ``ValueError`` with a client-facing message on bad input.
+        """
+        version = request.GET.get("version", "1")
+        if version not in ("1", "2"):
+            raise ValueError("version must be 1 or 2.")
+
+        if request.GET.get("compact", "false").lower() == "true":
+            return int(version), list(self.compact_fields)
+
+        raw_fields = request.GET.get("fields")
+        if not raw_fields:
+            return int(version), None
+        fields = [f.strip() for f in raw_fields.split(",") if f.strip()]
+        known = self._item_field_names()
+        unknown = [f for f in fields if f not in known]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}.")
+        return int(version), ["id"] + [f for f in fields if f != "id"]
+
+    def _build_response(
+        self,
+        ranked: Sequence[Tuple[Any, Dict[str, Any]]],
+        version: int,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Response:
+        """Render ordered ``(relativity, item_data)`` pairs in the requested shape."""
+        entries = [
+            {
+                "relativity": rel,
+                self.item_type_key: (
+                    entry
+                    if fields is None
+                    else {k: v for k, v in entry.items() if k in fields}
+                ),
+            }
+            for rel, entry in ranked
+        ]
+        if version == 2:
+            return Response({"version": 2, "length": len(entries), "data": entries})
+        data = {str(idx): entry for idx, entry in enumerate(entries)}
+        return Response({"length": len(data), "data": data})
 
     def _resolve_genres(
         self, needed: Dict[str, Any], genre_model: Type[Any]
@@ -86,6 +170,11 @@ class RecommendationMixin:
         """
         Shared POST handler for public recommendation views.
         """
+        try:
+            version, fields = self._response_options(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         serializer = GenreInputSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(
@@ -122,12 +211,8 @@ class RecommendationMixin:
         final_media = [m for _, m in sorted_suggestions][:100]
         relativity_list = [s[0] for s in sorted_suggestions][:100]
 
-        items_data = self.serializer(final_media, many=True).data
-        response_data = {}
-        for idx, (rel, entry) in enumerate(zip(relativity_list, items_data)):
-            response_data[str(idx)] = {"relativity": rel, self.item_type_key: entry}
-
-        return Response({"length": len(final_media), "data": response_data})
+        items_data = self._serialize_items(final_media, fields)
+        return self._build_response(list(zip(relativity_list, items_data)), version)
 
     def handle_private_recommendation(
         self,
@@ -143,10 +228,19 @@ class RecommendationMixin:
         Supports query parameters:
             - ``cf`` (bool): Enable/disable collaborative filtering (default: true).
             - ``alpha`` (float): Override cf_weight (0.0–1.0). Ignored when cf=false.
+            - ``version``, ``fields``, ``compact``: response shape (see class docs).
+
+        The full ordered ``[relativity, item_data]`` list is cached, so every
+        response shape is served from the same entry.
         """
-        data = cache.get(cache_key)
-        if isinstance(data, dict):
-            return Response({"length": len(data), "data": data})
+        try:
+            version, fields = self._response_options(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        ranked = cache_get(cache_key)
+        if isinstance(ranked, list):
+            return self._build_response(ranked, version, fields)
 
         needed_genres = genre_prefs_fn()
         use_cf = request.GET.get("cf", "true").lower() == "true"
@@ -160,6 +254,9 @@ class RecommendationMixin:
             except (ValueError, TypeError):
                 pass
 
+        # One cached bitmap filters rated items out of every engine below
+        rated = rated_items(request.user.pk, item_field)
+
         if not needed_genres:
             # Cold-start: use genre-weighted popularity fallback
             from myutils.cold_start import get_popular_by_genre
@@ -169,19 +266,13 @@ class RecommendationMixin:
                 genre_prefs=needed_genres,
                 allowed_types=getattr(self, "allowed_types", ("books",)),
                 limit=100,
+                rated=rated,
             )
             final_media = [item for _, item in cold_results]
             relativity_list = [score for score, _ in cold_results]
 
-            items_data = self.serializer(final_media, many=True).data
-            response_data = {
-                str(idx): {
-                    "relativity": rel,
-                    getattr(self, "item_type_key", "item"): entry,
-                }
-                for idx, (rel, entry) in enumerate(zip(relativity_list, items_data))
-            }
-            return Response({"length": len(items_data), "data": response_data})
+            items_data = self._serialize_items(final_media, fields)
+            return self._build_response(list(zip(relativity_list, items_data)), version)
 
         # Count user ratings for adaptive alpha
         rating_count = interaction_model.objects.filter(user=request.user).count()
@@ -196,6 +287,7 @@ class RecommendationMixin:
                 top_n=100,
                 cf_weight=cf_weight,
                 rating_count=rating_count,
+                already_rated=rated,
             )
 
             # Boost under-rated items matching user preferences
@@ -207,6 +299,7 @@ class RecommendationMixin:
                 item_field=item_field,
                 genre_prefs=needed_genres,
                 item_model=self.model,
+                rated=rated,
             )
 
             final_media = [item for _, item in hybrid_results]
@@ -219,6 +312,7 @@ class RecommendationMixin:
                 relativity_decimals=1,
                 default_preference_score=6,
                 allowed_types=getattr(self, "allowed_types", ("books",)),
+                already_rated=rated,
             )
             sorted_suggestions = sorted(
                 suggestions, key=lambda tup: tup[0], reverse=True
@@ -226,16 +320,10 @@ class RecommendationMixin:
             final_media = [b for _, b in sorted_suggestions][:100]
             relativity_list = [s[0] for s in sorted_suggestions][:100]
 
-        items_data = self.serializer(final_media, many=True).data
-        response_data = {}
-        for idx, (rel, entry) in enumerate(zip(relativity_list, items_data)):
-            response_data[str(idx)] = {
-                "relativity": rel,
-                getattr(self, "item_type_key", "item"): entry,
-            }
-
-        cache.set(cache_key, response_data, 60 * 60)
-        return Response({"length": len(response_data), "data": response_data})
+        items_data = self._serialize_items(final_media)
+        ranked = [[rel, entry] for rel, entry in zip(relativity_list, items_data)]
+        cache_set(cache_key, ranked, 60 * 60)
+        return self._build_response(ranked, version, fields)
 
 
 class BaseCRUDMixin:
@@ -271,3 +359,161 @@ class BaseCRUDMixin:
                 {"data": self.serializer(new_obj).data}, status=status.HTTP_201_CREATED
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class SearchMixin(ItemSerializationMixin):
+    """
+    Mixin for ranked catalog search (``?q=...&limit=...``).
+    Requires: model, serializer, item_type_key (optional: fast_serializer)
+    """
+
+    item_type_key: str = "item"
+
+    def handle_search(self, request) -> Response:
+        from myutils.search import DEFAULT_SEARCH_LIMIT, search_catalog
+
+        query = (request.GET.get("q") or "").strip()
+        if not query:
+            return Response(
+                {"error": "q is required."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = max(
+                1, min(int(request.GET.get("limit", DEFAULT_SEARCH_LIMIT)), 200)
+            )
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "limit must be an integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = search_catalog(self.model, query, limit)
+        items_data = self._serialize_items([item for _, item in results])
+        data = [
+            {"relevance": score, self.item_type_key: entry}
+            for (score, _), entry in zip(results, items_data)
+        ]
+        return Response({"length": len(data), "data": data})
+
+
+# Upper bound on ids per batch lookup request
+MAX_BATCH_IDS = 100
+
+
+class BatchLookupMixin(ItemSerializationMixin):
+    """
+    Mixin for fetching many items by id in one request.
+    Ids come from ``?ids=a,b,c`` (GET) or ``{"ids": [...]}`` (POST).
+    Requires: model, serializer (optional: fast_serializer)
+    """
+
+    def handle_batch(self, raw_ids) -> Response:
+        if isinstance(raw_ids, str):
+            raw_ids = [i for i in raw_ids.split(",") if i.strip()]
+        if not isinstance(raw_ids, list) or not raw_ids:
+            return Response(
+                {"error": "ids must be a non-empty list."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(raw_ids) > MAX_BATCH_IDS:
+            return Response(
+                {"error": f"Too many ids ({len(raw_ids)}). Max {MAX_BATCH_IDS}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            ids = list(dict.fromkeys(uuid.UUID(str(i).strip()) for i in raw_ids))
+        except ValueError:
+            return Response(
+                {"error": "ids must be valid UUIDs."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        items_map = self.model.objects.in_bulk(ids)
+        data = self._serialize_items([items_map[pk] for pk in ids if pk in items_map])
+        missing = [str(pk) for pk in ids if pk not in items_map]
+        return Response({"length": len(data), "data": data, "missing": missing})
+
+
+# Upper bound on users per batch recommendation request
+MAX_BATCH_USERS = 10000
+
+
+class BatchRecommendationMixin(ItemSerializationMixin):
+    """
+    Mixin for the admin-only multi-user recommendation stream.
+
+    Body: ``{"user_ids": [...], "top_n": 100, "fields": [...]}`` (``fields``
+    defaults to ``compact_fields``).  Responds with NDJSON, one line per
+    user in request order, produced chunk by chunk as users are scored.
+    Requires: model, fast_serializer, item_field, item_type_key, compact_fields
+    """
+
+    item_field: str = "book"
+    item_type_key: str = "item"
+    compact_fields: tuple = ("id",)
+
+    def handle_batch_recommendation(self, request):
+        from myutils.batch_recommendation import (
+            BATCH_CHUNK_SIZE,
+            iter_batch_recommendations,
+        )
+
+        body = request.data if isinstance(request.data, dict) else {}
+        user_ids = body.get("user_ids")
+        if (
+            not isinstance(user_ids, list)
+            or not user_ids
+            or not all(type(u) is int for u in user_ids)
+        ):
+            return Response(
+                {"error": "user_ids must be a non-empty list of integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(user_ids) > MAX_BATCH_USERS:
+            return Response(
+                {"error": f"Too many users ({len(user_ids)}). Max {MAX_BATCH_USERS}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            top_n = max(1, min(int(body.get("top_n", 100)), 100))
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "top_n must be an integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        fields = body.get("fields") or list(self.compact_fields)
+        known = self._item_field_names()
+        if not isinstance(fields, list) or any(f not in known for f in fields):
+            return Response(
+                {"error": f"fields must be a list of: {', '.join(known)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        fields = ["id"] + [f for f in fields if f != "id"]
+        renderer = self.renderer_classes[0]()
+
+        def lines():
+            results = iter_batch_recommendations(self.item_field, user_ids, top_n)
+            while True:
+                chunk = list(islice(results, BATCH_CHUNK_SIZE))
+                if not chunk:
+                    return
+                pks = {pk for _, recs in chunk for _, pk in recs or ()}
+                items = {
+                    entry["id"]: entry
+                    for entry in self.fast_serializer(
+                        self.model.objects.filter(pk__in=pks), fields=fields
+                    ).data
+                }
+                for user_id, recs in chunk:
+                    if recs is None:
+                        line = {"user": user_id, "error": "User not found."}
+                    else:
+                        data = [
+                            {"relativity": score, self.item_type_key: items[str(pk)]}
+                            for score, pk in recs
+                            if str(pk) in items
+                        ]
+                        line = {"user": user_id, "length": len(data), "data": data}
+                    yield renderer.render(line) + b"\n"
+
+        return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class MyutilsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "myutils"
+
+    def ready(self):
+        from .search import ensure_search_indexes
+
+        post_migrate.connect(ensure_search_indexes, sender=self)
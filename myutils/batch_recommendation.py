@@ -0,0 +1,375 @@
+"""
+Batch Recommendations
+=====================
+
+Private (hybrid) recommendations for many users at once, for digest and
+notification jobs.  The ranking matches the private recommendation
+endpoint: content + CF hybrid with adaptive α, the new-item boost, and
+global popularity for users without genre preferences.  Instead of a few
+dozen ORM queries per user, shared data is loaded once per chunk of users
+and scored with numpy:
+
+    - genre preferences, and ratings joined to the item attributes the
+      feature signals need, in one query each per chunk;
+    - per-genre candidate lists (top ``MAX_MEDIA_PER_GENRE`` unrated items
+      by ``rating_count``, ties broken by pk) in one windowed query, kept
+      for the whole run as row ids of the catalog snapshot, which holds
+      each candidate's genres and signal attributes
+      (``myutils.catalog_snapshot``).  The window reaches past each
+      genre's rated items, so a user's rated items never use up its
+      budget;
+    - item similarities once per distinct CF seed item.
+
+Content scores sum the user's preference vector over a sparse candidate ×
+genre incidence with ``np.bincount``; CF scores are accumulated the same
+way over the neighbours of the user's seed items.
+Items the user has rated are masked out of every source with the user's
+``RatedItems`` bitmap.
+
+The single-user hybrid (``myutils.recommendation.get_hybrid_recommendation``)
+calls the same scorers with a chunk of one user, so the two cannot drift.
+"""
+
+from collections import defaultdict
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+import numpy as np
+from django.db.models import Model
+
+from .catalog_snapshot import get_catalog_snapshot
+from .cold_start import LEADERBOARD_SIZE, get_popular_by_genre, new_item_bonuses
+from .collaborative_filtering import get_item_similarities
+from .content_based_filtering import ranked_genre_rows, rated_genre_depths
+from .feature_signals import (
+    MAX_SIGNAL_BONUS,
+    USER_SIGNAL_FIELDS,
+    snapshot_signal_bonuses,
+    user_signal_targets,
+)
+from .item_index import item_model_of, rating_model_of
+from .rated_items import RatedItems
+from .recommendation import compute_adaptive_alpha
+
+# Users scored per shared data load
+BATCH_CHUNK_SIZE = 200
+
+# Same limits the private endpoint's hybrid path uses
+MAX_NUM_GENRES = 30
+MAX_MEDIA_PER_GENRE = 100
+CF_SEED_ITEMS = 10
+CF_NEIGHBOURS = 50
+
+
+def _preference_model(item_field: str) -> Any:
+    from users.models import UserBooksGenrePreference, UserTvMediaGenrePreference
+
+    if item_field == "book":
+        return UserBooksGenrePreference
+    if item_field == "tvmedia":
+        return UserTvMediaGenrePreference
+    raise ValueError(f"Unknown item field: {item_field}")
+
+
+class CandidateCatalog:
+    """
+    Content candidates of the genres seen so far, as rows of the catalog
+    snapshot taken at the start of the run.  ``genre_rows[genre_id]`` lists
+    the genre's top ``depth[genre_id]`` rows in popularity order; a genre is
+    read deeper once a user has rated so many of them that fewer than
+    ``max_per_genre`` unrated ones would be left.
+    """
+
+    def __init__(
+        self,
+        item_model: Type[Model],
+        item_field: str,
+        max_per_genre: int = MAX_MEDIA_PER_GENRE,
+    ):
+        self.item_model = item_model
+        self.item_field = item_field
+        self.max_per_genre = max_per_genre
+        self.snapshot = get_catalog_snapshot(item_field)
+        self.genre_rows: Dict[Any, np.ndarray] = {}
+        self.depth: Dict[Any, int] = {}
+
+    def genre_depths(
+        self, genre_ids: Iterable[Any], rated: RatedItems
+    ) -> Dict[Any, int]:
+        """Rows to read per genre so ``rated`` cannot eat into the budget."""
+        return rated_genre_depths(
+            self.snapshot, set(genre_ids), self.max_per_genre, rated
+        )
+
+    def load_genres(self, depths: Dict[Any, int]) -> None:
+        missing = [g for g, d in depths.items() if self.depth.get(g, 0) < d]
+        if not missing:
+            return
+        depth = max(depths[g] for g in missing)
+        ranked = ranked_genre_rows(self.item_model, self.item_field, missing, depth)
+        for genre_id, rows in ranked.items():
+            rows = np.array(rows, dtype=np.int64)
+            self.genre_rows[genre_id] = rows[rows < len(self.snapshot)]
+            self.depth[genre_id] = depth
+
+    def unrated_rows(self, genre_id: Any, rated: RatedItems) -> np.ndarray:
+        """The genre's first ``max_per_genre`` rows not in ``rated``."""
+        rows = self.genre_rows.get(genre_id, np.empty(0, dtype=np.int64))
+        return rows[~rated.mask_rows(rows)][: self.max_per_genre]
+
+
+def load_ratings(
+    rating_model: Type[Model], item_field: str, user_ids: Iterable[Any]
+) -> Tuple[Dict[Any, List[Tuple[Any, int, Dict[str, Any]]]], Dict[Any, List[int]]]:
+    """
+    Per user, ``(item_pk, rating, attributes)`` rows (attributes per
+    ``USER_SIGNAL_FIELDS``) and the rated row ids, from one query.
+    """
+    user_fields = USER_SIGNAL_FIELDS[item_field]
+    ratings: Dict[Any, List[Tuple[Any, int, Dict[str, Any]]]] = defaultdict(list)
+    rated_rows: Dict[Any, List[int]] = defaultdict(list)
+    for user_id, pk, row_id, rating, *values in rating_model.objects.filter(
+        user_id__in=user_ids
+    ).values_list(
+        "user_id",
+        f"{item_field}_id",
+        f"{item_field}__row_id",
+        "rating",
+        *[f"{item_field}__{f}" for f in user_fields],
+    ):
+        ratings[user_id].append((pk, rating, dict(zip(user_fields, values))))
+        if row_id is not None:
+            rated_rows[user_id].append(row_id)
+    return ratings, rated_rows
+
+
+def content_scores(
+    catalog: CandidateCatalog,
+    prefs: List[Tuple[Any, float]],
+    signals: Dict[str, Any],
+    rated: RatedItems,
+    max_num_genres: int = MAX_NUM_GENRES,
+) -> List[Tuple[float, Any]]:
+    """
+    Content ranking ``[(relativity, item_pk), ...]`` of one user, from
+    ``prefs`` as ``(genre_id, preference)`` pairs, strongest first.
+    """
+    lists = [catalog.unrated_rows(g, rated) for g, _ in prefs[:max_num_genres]]
+    if not lists or not sum(len(rows) for rows in lists):
+        return []
+    stacked = np.concatenate(lists)
+    _, first = np.unique(stacked, return_index=True)
+    rows = stacked[np.sort(first)]
+
+    snapshot = catalog.snapshot
+    sums, _ = snapshot.genre_sums(rows, dict(prefs))
+    raw = np.maximum(sums, 0.0)
+    bonus = snapshot_signal_bonuses(snapshot, rows, signals)
+
+    greatest = float(raw.max())
+    adjusted_max = greatest + MAX_SIGNAL_BONUS if greatest > 0 else 1.0
+    relativity = np.clip(np.round((raw + bonus) / adjusted_max * 100, 2), 0, 100)
+    return list(zip(relativity.tolist(), snapshot.pks_of(rows)))
+
+
+class SimilarityIndex:
+    """Memoized top-``CF_NEIGHBOURS`` similarities over a dense item index."""
+
+    def __init__(self, rating_model: Type[Model], item_field: str):
+        self.rating_model = rating_model
+        self.item_field = item_field
+        self.index: Dict[Any, int] = {}
+        self.pks: List[Any] = []
+        self.neighbours: Dict[Any, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def get(self, item_pk: Any) -> Tuple[np.ndarray, np.ndarray]:
+        if item_pk not in self.neighbours:
+            sims = get_item_similarities(item_pk, self.rating_model, self.item_field)
+            idx = []
+            for _, other in sims[:CF_NEIGHBOURS]:
+                if other not in self.index:
+                    self.index[other] = len(self.pks)
+                    self.pks.append(other)
+                idx.append(self.index[other])
+            self.neighbours[item_pk] = (
+                np.array(idx, dtype=np.int64),
+                np.array([float(s) for s, _ in sims[:CF_NEIGHBOURS]]),
+            )
+        return self.neighbours[item_pk]
+
+
+def cf_scores(
+    similarities: SimilarityIndex,
+    ratings: List[Tuple[Any, int, Dict[str, Any]]],
+    rated: RatedItems,
+    top_n: int,
+) -> List[Tuple[float, Any]]:
+    """Vectorized ``get_collaborative_recommendations`` ranking (item pks)."""
+    seeds = sorted(
+        ((pk, rating) for pk, rating, _ in ratings if rating >= 7),
+        key=lambda x: x[1],
+        reverse=True,
+    )[:CF_SEED_ITEMS]
+    if not seeds:
+        return []
+
+    idx_parts, weighted_parts, sim_parts = [], [], []
+    for pk, rating in seeds:
+        idx, sims = similarities.get(pk)
+        idx_parts.append(idx)
+        weighted_parts.append(sims * float(rating))
+        sim_parts.append(sims)
+    idx = np.concatenate(idx_parts)
+    if not len(idx):
+        return []
+    items, inverse = np.unique(idx, return_inverse=True)
+    totals = np.bincount(inverse, weights=np.concatenate(weighted_parts))
+    weights = np.bincount(inverse, weights=np.concatenate(sim_parts))
+    average = np.divide(totals, weights, out=np.zeros_like(totals), where=weights > 0)
+
+    keep = ~rated.mask([similarities.pks[i] for i in items])
+    items, average = items[keep], average[keep]
+    order = np.argsort(-average, kind="stable")[:top_n]
+    return [
+        (float(min(max(average[i] * 10, 0), 100)), similarities.pks[items[i]])
+        for i in order
+    ]
+
+
+class _PopularPool:
+    """
+    Global popularity ranking for users without genre preferences: one
+    ``LEADERBOARD_SIZE`` pool, filtered per user.
+    """
+
+    def __init__(self, item_model: Type[Model]):
+        self.item_model = item_model
+        self.pool: Optional[List[Tuple[float, Any]]] = None
+
+    def ranking(self, rated: RatedItems, limit: int = 100) -> List[Tuple[float, Any]]:
+        if self.pool is None:
+            self.pool = [
+                (score, item.pk)
+                for score, item in get_popular_by_genre(
+                    item_model=self.item_model, genre_prefs={}, limit=LEADERBOARD_SIZE
+                )
+            ]
+        keep = ~rated.mask([pk for _, pk in self.pool])
+        ranking = [entry for entry, k in zip(self.pool, keep) if k][:limit]
+        if len(ranking) < limit and len(self.pool) == LEADERBOARD_SIZE:
+            # The user rated most of the pool: read past the rated items
+            ranking = [
+                (score, item.pk)
+                for score, item in get_popular_by_genre(
+                    item_model=self.item_model,
+                    genre_prefs={},
+                    limit=limit,
+                    rated=rated,
+                )
+            ]
+        return ranking
+
+
+def iter_batch_recommendations(
+    item_field: str,
+    user_ids: Iterable[Any],
+    top_n: int = 100,
+    cf_weight: float = 0.4,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+) -> Iterator[Tuple[Any, Optional[List[Tuple[float, Any]]]]]:
+    """
+    Yield ``(user_id, [(score, item_pk), ...])`` for each user id, in order,
+    ranked like the private recommendation endpoint.  Unknown users yield
+    ``(user_id, None)``.
+    """
+    from users.models import CustomUser
+
+    item_model = item_model_of(item_field)
+    rating_model = rating_model_of(item_field)
+    pref_model = _preference_model(item_field)
+    catalog = CandidateCatalog(item_model, item_field)
+    similarities = SimilarityIndex(rating_model, item_field)
+    popular = _PopularPool(item_model)
+
+    user_ids = iter(user_ids)
+    while True:
+        chunk = list(islice(user_ids, chunk_size))
+        if not chunk:
+            return
+        known = set(
+            CustomUser.objects.filter(pk__in=chunk).values_list("pk", flat=True)
+        )
+
+        prefs: Dict[Any, List[Tuple[Any, float]]] = defaultdict(list)
+        for user_id, genre_id, preference in (
+            pref_model.objects.filter(user_id__in=known)
+            .order_by("user_id", "-preference")
+            .values_list("user_id", "genre_id", "preference")
+        ):
+            prefs[user_id].append((genre_id, float(preference)))
+
+        ratings, rated_rows = load_ratings(rating_model, item_field, known)
+        rated = {
+            user_id: RatedItems.from_rows(item_field, rated_rows.get(user_id, ()))
+            for user_id in known
+        }
+
+        depths: Dict[Any, int] = {}
+        for user_id, user_prefs in prefs.items():
+            wanted = catalog.genre_depths(
+                [g for g, _ in user_prefs[:MAX_NUM_GENRES]], rated[user_id]
+            )
+            for genre_id, depth in wanted.items():
+                depths[genre_id] = max(depth, depths.get(genre_id, 0))
+        catalog.load_genres(depths)
+
+        ranked: Dict[Any, List[Tuple[float, Any]]] = {}
+        cf_by_user: Dict[Any, List[Tuple[float, Any]]] = {}
+        for user_id in known:
+            if prefs.get(user_id):
+                cf_by_user[user_id] = cf_scores(
+                    similarities, ratings.get(user_id, []), rated[user_id], top_n
+                )
+        # CF results are cut to top_n before dropping items that no longer exist
+        cf_pks = {pk for recs in cf_by_user.values() for _, pk in recs}
+        existing = set(
+            item_model.objects.filter(pk__in=cf_pks).values_list("pk", flat=True)
+        )
+
+        for user_id in known:
+            user_prefs = prefs.get(user_id)
+            user_ratings = ratings.get(user_id, [])
+            rated_pks = {pk for pk, _, _ in user_ratings}
+            if not user_prefs:
+                ranked[user_id] = popular.ranking(rated[user_id])
+                continue
+
+            alpha = compute_adaptive_alpha(len(user_ratings), cf_weight)
+            combined: Dict[Any, float] = defaultdict(float)
+            signals = user_signal_targets(item_field, user_ratings)
+            for score, pk in content_scores(
+                catalog, user_prefs, signals, rated[user_id]
+            ):
+                combined[pk] += score * alpha
+            for score, pk in cf_by_user[user_id]:
+                if pk in existing:
+                    combined[pk] += score * (1 - alpha)
+            hybrid = sorted(
+                ((round(score, 2), pk) for pk, score in combined.items()),
+                key=lambda x: x[0],
+                reverse=True,
+            )[:top_n]
+
+            boosted = [
+                (round(bonus, 2), pk)
+                for bonus, pk in new_item_bonuses(
+                    item_model,
+                    item_field,
+                    [g for g, _ in user_prefs],
+                    exclude_pks={pk for _, pk in hybrid} | rated_pks,
+                )
+            ]
+            ranked[user_id] = sorted(hybrid + boosted, key=lambda x: x[0], reverse=True)
+
+        for user_id in chunk:
+            yield user_id, ranked.get(user_id)
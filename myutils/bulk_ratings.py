@@ -0,0 +1,100 @@
+"""
+Bulk Rating Import
+==================
+
+Upserts many ratings of one user in a single statement and runs the
+post-rating maintenance (genre preferences, recommendation and similarity
+caches) once for the whole batch instead of once per row.
+
+Used by the ``BulkRateBooks``/``BulkRateTvMedia`` API views and the
+``import_ratings`` management command.
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+from django.db import transaction
+
+from . import rating_queue
+from .item_index import item_model_of, rating_model_of
+from .rated_items import invalidate_rated_items
+
+# Largest number of (item, rating) pairs accepted per import call
+MAX_BULK_RATINGS = 5000
+
+
+def bulk_upsert_ratings(
+    user: Any,
+    item_field: str,
+    pairs: Iterable[Tuple[Any, int]],
+) -> Dict[str, Any]:
+    """
+    Create or update many ratings for ``user``.
+
+    Args:
+        user: The rating user.
+        item_field: "book" or "tvmedia".
+        pairs: ``(item_id, rating)`` pairs. Later pairs win on duplicate items.
+
+    Returns:
+        ``{"created": int, "updated": int, "not_found": [item_id, ...]}``.
+        Unknown item ids are skipped and reported.
+    """
+    rating_model = rating_model_of(item_field)
+    item_model = item_model_of(item_field)
+    column = f"{item_field}_id"
+
+    wanted: Dict[Any, int] = {}
+    for item_id, rating in pairs:
+        wanted[item_id] = int(rating)
+    for rating in wanted.values():
+        if not 1 <= rating <= 10:
+            raise ValueError(f"Rating must be between 1 and 10, got {rating}")
+
+    existing_items = set(
+        item_model.objects.filter(pk__in=list(wanted)).values_list("pk", flat=True)
+    )
+    not_found = [item_id for item_id in wanted if item_id not in existing_items]
+    wanted = {k: v for k, v in wanted.items() if k in existing_items}
+    if not wanted:
+        return {"created": 0, "updated": 0, "not_found": not_found}
+
+    with transaction.atomic():
+        previous = dict(
+            rating_model.objects.filter(
+                user=user, **{f"{column}__in": list(wanted)}
+            ).values_list(column, "rating")
+        )
+        rating_model.objects.bulk_create(
+            [
+                rating_model(user=user, rating=rating, **{column: item_id})
+                for item_id, rating in wanted.items()
+            ],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["user", item_field],
+            update_fields=["rating", "updated_at"],
+        )
+
+        if len(previous) < len(wanted):
+            invalidate_rated_items(item_field, user.pk)
+
+        changes: List[Tuple[Any, Any, int]] = [
+            (item_id, previous.get(item_id), rating)
+            for item_id, rating in wanted.items()
+            if previous.get(item_id) != rating
+        ]
+        if changes:
+            if rating_queue.is_deferred():
+                rating_queue.enqueue_rating_changes(user.pk, item_field, changes)
+            else:
+                rating_queue.apply_rating_changes(user.pk, item_field, changes)
+
+    return {
+        "created": sum(1 for item_id in wanted if item_id not in previous),
+        "updated": sum(
+            1
+            for item_id, rating in wanted.items()
+            if item_id in previous and previous[item_id] != rating
+        ),
+        "not_found": not_found,
+    }
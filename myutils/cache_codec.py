@@ -0,0 +1,158 @@
+"""
+Cache Codec
+===========
+
+Compact binary encodings for the values the recommendation engine keeps in
+the cache, chosen by the key type (the prefix before the first ``:``).
+
+Key types:
+    - ``item_sim``  Rankings: ``[(score, item_id), ...]`` packed as a float32
+                    score array followed by a packed id array (16-byte UUIDs
+                    or int32 row ids).
+    - ``rec``       Serialized API payloads: compact JSON, zlib-compressed
+                    once it grows past ``COMPRESS_THRESHOLD`` bytes.
+    - ``rated``     Boolean bitmaps (a user's rated items over the dense
+                    item index): ``np.packbits`` output, zlib-compressed.
+
+Keys with any other prefix go through the cache backend unchanged.  Values
+that cannot be decoded (e.g. pickles left over from an older release) are
+treated as cache misses.
+"""
+
+import json
+import struct
+import uuid
+import zlib
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+# Bump when the binary layout changes; older entries then read as misses.
+CODEC_VERSION = 1
+
+# Payloads smaller than this are stored as plain JSON bytes.
+COMPRESS_THRESHOLD = 1024
+COMPRESS_LEVEL = 6
+
+_RANKING_HEADER = struct.Struct("<BcI")  # version, id kind, count
+_ID_UUID = b"u"
+_ID_INT = b"i"
+_PAYLOAD_HEADER = struct.Struct("<Bc")  # version, encoding
+_PAYLOAD_JSON = b"j"
+_PAYLOAD_ZLIB = b"z"
+_BITMAP_HEADER = struct.Struct("<BI")  # version, bit count
+
+
+def recommendation_cache_key(item_field: str, user_id: Any) -> str:
+    """Cache key for a user's private recommendation payload."""
+    return f"rec:{item_field}:{user_id}"
+
+
+def encode_ranking(pairs: Sequence[Tuple[float, Any]]) -> bytes:
+    """
+    Pack ``[(score, item_id), ...]`` into bytes.
+
+    All ids must be of the same kind: ``uuid.UUID`` or ``int``.
+    """
+    count = len(pairs)
+    if count and not isinstance(pairs[0][1], uuid.UUID):
+        kind = _ID_INT
+        ids = np.fromiter((i for _, i in pairs), dtype="<i4", count=count).tobytes()
+    else:
+        kind = _ID_UUID
+        ids = b"".join(i.bytes for _, i in pairs)
+    scores = np.fromiter((s for s, _ in pairs), dtype="<f4", count=count).tobytes()
+    return _RANKING_HEADER.pack(CODEC_VERSION, kind, count) + scores + ids
+
+
+def decode_ranking(raw: bytes) -> List[Tuple[float, Any]]:
+    """Inverse of ``encode_ranking``; scores come back as float32 precision."""
+    version, kind, count = _RANKING_HEADER.unpack_from(raw)
+    if version != CODEC_VERSION:
+        raise ValueError(f"Unsupported ranking codec version {version}")
+    offset = _RANKING_HEADER.size
+    scores = np.frombuffer(raw, dtype="<f4", count=count, offset=offset).tolist()
+    offset += 4 * count
+    if kind == _ID_INT:
+        ids = np.frombuffer(raw, dtype="<i4", count=count, offset=offset).tolist()
+    else:
+        ids = [
+            uuid.UUID(bytes=raw[offset + 16 * n : offset + 16 * (n + 1)])
+            for n in range(count)
+        ]
+    return list(zip(scores, ids))
+
+
+def encode_payload(data: Any) -> bytes:
+    """Serialize a JSON-compatible payload, compressing it when large."""
+    body = json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+    if len(body) >= COMPRESS_THRESHOLD:
+        return _PAYLOAD_HEADER.pack(CODEC_VERSION, _PAYLOAD_ZLIB) + zlib.compress(
+            body, COMPRESS_LEVEL
+        )
+    return _PAYLOAD_HEADER.pack(CODEC_VERSION, _PAYLOAD_JSON) + body
+
+
+def decode_payload(raw: bytes) -> Any:
+    """Inverse of ``encode_payload``."""
+    version, encoding = _PAYLOAD_HEADER.unpack_from(raw)
+    if version != CODEC_VERSION:
+        raise ValueError(f"Unsupported payload codec version {version}")
+    body = raw[_PAYLOAD_HEADER.size :]
+    if encoding == _PAYLOAD_ZLIB:
+        body = zlib.decompress(body)
+    return json.loads(body)
+
+
+def encode_bitmap(bits: np.ndarray) -> bytes:
+    """Pack a boolean array, one bit per element."""
+    packed = np.packbits(np.asarray(bits, dtype=bool)).tobytes()
+    return _BITMAP_HEADER.pack(CODEC_VERSION, len(bits)) + zlib.compress(
+        packed, COMPRESS_LEVEL
+    )
+
+
+def decode_bitmap(raw: bytes) -> np.ndarray:
+    """Inverse of ``encode_bitmap``."""
+    version, count = _BITMAP_HEADER.unpack_from(raw)
+    if version != CODEC_VERSION:
+        raise ValueError(f"Unsupported bitmap codec version {version}")
+    packed = np.frombuffer(zlib.decompress(raw[_BITMAP_HEADER.size :]), np.uint8)
+    if len(packed) != (count + 7) // 8:
+        raise ValueError("Truncated bitmap")
+    return np.unpackbits(packed, count=count).astype(bool)
+
+
+CODECS: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "item_sim": (encode_ranking, decode_ranking),
+    "rec": (encode_payload, decode_payload),
+    "rated": (encode_bitmap, decode_bitmap),
+}
+
+
+def _codec_for(key: str):
+    return CODECS.get(key.split(":", 1)[0])
+
+
+def cache_get(key: str, default: Any = None) -> Any:
+    """``cache.get`` that decodes the value with the codec for ``key``."""
+    raw = cache.get(key)
+    if raw is None:
+        return default
+    codec = _codec_for(key)
+    if codec is None:
+        return raw
+    if not isinstance(raw, (bytes, bytearray)):
+        return default
+    try:
+        return codec[1](bytes(raw))
+    except (ValueError, struct.error, zlib.error):
+        return default
+
+
+def cache_set(key: str, value: Any, timeout: Any = DEFAULT_TIMEOUT) -> None:
+    """``cache.set`` that encodes the value with the codec for ``key``."""
+    codec = _codec_for(key)
+    cache.set(key, codec[0](value) if codec else value, timeout)
@@ -0,0 +1,202 @@
+"""
+Catalog Snapshots
+=================
+
+An immutable, columnar copy of the catalog facts the engines score with,
+indexed by item ``row_id`` (see ``myutils.item_index``):
+
+    - ``popularity``/``recency``: the static feature signals in [0, 1]
+      (``likedPercent`` for books, ``startyear`` for TV media);
+    - attribute codes (``author``, ``language``, ``media_type``) with their
+      vocabularies, ``-1`` for empty values;
+    - item genres as CSR arrays: the genre ids of row ``r`` are
+      ``genre_ids[genre_indptr[r]:genre_indptr[r + 1]]``;
+    - the row id <-> pk map (``index``): the process's ``item_index``, not a
+      copy of it.
+
+A snapshot is built from two bulk queries and labelled with the catalog
+generation it was read at.  ``get_catalog_snapshot`` keeps one per item type
+and process, shared read-only by all threads (every array is flagged
+non-writeable).  When the generation moves on, one thread builds the
+replacement while the others keep serving the previous snapshot, and the
+new one is swapped in with a single assignment.
+
+Rating statistics (``rating_count``) change on every rating write without a
+new generation, so they are not part of the snapshot; candidate selection
+keeps reading them from the database.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .catalog import catalog_version
+from .feature_signals import compute_popularity_bonus, compute_recency_bonus
+from .item_index import PK_BYTES, ItemIndex, item_index, item_model_of
+
+# (attribute columns, code columns) read per item type
+SNAPSHOT_FIELDS = {
+    "book": (("likedPercent",), ("author", "language")),
+    "tvmedia": (("startyear",), ("media_type",)),
+}
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class _Attributes:
+    """Attribute holder for the ``compute_*_bonus`` signal functions."""
+
+    def __init__(self, **values: Any):
+        self.__dict__.update(values)
+
+
+class CatalogSnapshot:
+    """Read-only columnar catalog facts of one item type and generation."""
+
+    def __init__(self, item_field: str, generation: int):
+        self.item_field = item_field
+        self.generation = generation
+        self.built_at = time.time()
+        self.index = ItemIndex(np.zeros((0, PK_BYTES), dtype=np.uint8))
+        self.present = np.zeros(0, dtype=bool)
+        self.popularity = np.zeros(0)
+        self.recency = np.zeros(0)
+        self.codes: Dict[str, np.ndarray] = {}
+        self.vocab: Dict[str, Dict[str, int]] = {}
+        self.genre_indptr = np.zeros(1, dtype=np.int64)
+        self.genre_ids = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def build(cls, item_field: str) -> "CatalogSnapshot":
+        # Generation first: an edit during the build must not label it newer
+        snapshot = cls(item_field, catalog_version(item_field))
+        item_model = item_model_of(item_field)
+        attr_fields, code_fields = SNAPSHOT_FIELDS[item_field]
+        index = item_index(item_field)
+
+        rows = list(
+            item_model.objects.filter(row_id__isnull=False).values_list(
+                "row_id", *attr_fields, *code_fields
+            )
+        )
+        # Items created since the index was read get their rows (and no pk)
+        size = max(len(index), max((row[0] for row in rows), default=-1) + 1)
+        present = np.zeros(size, dtype=bool)
+        popularity = np.zeros(size)
+        recency = np.zeros(size)
+        vocab: Dict[str, Dict[str, int]] = {f: {} for f in code_fields}
+        codes = {f: np.full(size, -1, dtype=np.int32) for f in code_fields}
+        n_attrs = len(attr_fields)
+        for row_id, *values in rows:
+            present[row_id] = True
+            attrs = _Attributes(**dict(zip(attr_fields, values[:n_attrs])))
+            popularity[row_id] = compute_popularity_bonus(attrs)
+            recency[row_id] = compute_recency_bonus(attrs)
+            for field, value in zip(code_fields, values[n_attrs:]):
+                if value:
+                    # Author matching is exact; the other signals ignore case
+                    key = value if field == "author" else value.lower()
+                    codes[field][row_id] = vocab[field].setdefault(
+                        key, len(vocab[field])
+                    )
+
+        pairs = np.array(
+            list(
+                item_model.genre.through.objects.filter(
+                    **{f"{item_field}__row_id__isnull": False}
+                ).values_list(f"{item_field}__row_id", "genre_id")
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        order = np.argsort(pairs[:, 0], kind="stable")
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs[:, 0], minlength=size), out=indptr[1:])
+
+        snapshot.index = index
+        snapshot.present = _frozen(present)
+        snapshot.popularity = _frozen(popularity)
+        snapshot.recency = _frozen(recency)
+        snapshot.codes = {f: _frozen(c) for f, c in codes.items()}
+        snapshot.vocab = vocab
+        snapshot.genre_indptr = _frozen(indptr)
+        snapshot.genre_ids = _frozen(pairs[order, 1].copy())
+        return snapshot
+
+    def __len__(self) -> int:
+        return len(self.present)
+
+    def pks_of(self, rows: Sequence[int]) -> List[Optional[Any]]:
+        return self.index.pks_of(rows)
+
+    def genres_of(self, row: int) -> np.ndarray:
+        return self.genre_ids[self.genre_indptr[row] : self.genre_indptr[row + 1]]
+
+    def _row_genres(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """The rows' genre ids, row after row, and each row's genre count."""
+        starts = self.genre_indptr[rows]
+        lengths = self.genre_indptr[rows + 1] - starts
+        # Positions of the rows' entries in genre_ids, row by row
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return self.genre_ids[np.arange(int(lengths.sum())) + offsets], lengths
+
+    def genre_counts(self, rows: np.ndarray) -> Dict[Any, int]:
+        """Number of ``rows`` in each of their genres."""
+        genres, _ = self._row_genres(np.asarray(rows, dtype=np.int64))
+        ids, counts = np.unique(genres, return_counts=True)
+        return dict(zip(ids.tolist(), counts.tolist()))
+
+    def genre_sums(
+        self, rows: np.ndarray, values: Dict[Any, float], default: float = 0.0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        For each row, the sum of ``values`` over the row's genres (``default``
+        for genres without a value) and the row's genre count.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        genres, lengths = self._row_genres(rows)
+
+        top = int(max(genres.max(initial=0), max(values, default=0))) + 1
+        lookup = np.full(top, float(default))
+        for genre_id, value in values.items():
+            lookup[genre_id] = value
+        sums = np.bincount(
+            np.repeat(np.arange(len(rows)), lengths),
+            weights=lookup[genres],
+            minlength=len(rows),
+        )
+        return sums, lengths
+
+
+_snapshots: Dict[str, CatalogSnapshot] = {}
+_build_locks = {field: threading.Lock() for field in SNAPSHOT_FIELDS}
+
+
+def install_catalog_snapshot(snapshot: CatalogSnapshot) -> None:
+    """Serve ``snapshot`` in this process (e.g. one read from disk)."""
+    _snapshots[snapshot.item_field] = snapshot
+
+
+def get_catalog_snapshot(item_field: str) -> CatalogSnapshot:
+    """The process-wide snapshot of the current catalog generation."""
+    current = _snapshots.get(item_field)
+    if current is not None and current.generation == catalog_version(item_field):
+        return current
+
+    lock = _build_locks[item_field]
+    # Another thread is already building: keep serving the previous snapshot
+    if not lock.acquire(blocking=current is None):
+        return current
+    try:
+        latest = _snapshots.get(item_field)
+        if latest is not None and latest.generation == catalog_version(item_field):
+            return latest
+        snapshot = CatalogSnapshot.build(item_field)
+        _snapshots[item_field] = snapshot
+        return snapshot
+    finally:
+        lock.release()
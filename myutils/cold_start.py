@@ -8,15 +8,319 @@ New Users:
     Users with no or few ratings receive genre-weighted popularity recommendations.
     If no genre preferences exist at all, global popularity is used as a fallback.
 
+    Popularity comes from cached per-genre leaderboards (top
+    ``LEADERBOARD_SIZE`` items per genre plus a global one) that are merged
+    in memory, weighting each genre by the user's preference for it.
+
 New Items:
     Items with fewer than ``min_ratings`` user ratings receive a genre-affinity
     bonus when they match the user's top genres, preventing them from being
     permanently buried by well-established items.
+
+    Candidates come from a cached "new-item pool": one cache entry per
+    (item type, genre) mapping the ``NEW_ITEM_POOL_SIZE`` most recently
+    added low-interaction items (highest ``row_id``) to their genre count
+    and row id.  Ratings crossing ``NEW_ITEM_MIN_RATINGS`` move items in or
+    out of the pool.  Each such update writes the pools it touches under a
+    new pool version, so concurrent updates never overwrite each other's
+    changes: a pool an update could not carry forward is simply rebuilt.
+
+Catalog edits (items, genres, genre assignments) retire both caches through
+the per-type catalog generation (see ``myutils.catalog``).
 """
 
-from typing import Any, Dict, List, Sequence, Tuple, Type
+import heapq
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Type
+
+from django.core.cache import cache
+from django.db.models import Count, F, Model
+
+from .catalog import catalog_version
+from .rated_items import RatedItems
+
+# Threshold whose pool is maintained incrementally on rating writes
+NEW_ITEM_MIN_RATINGS = 5
+NEW_ITEM_POOL_TTL = 60 * 60 * 24
+# Pools for other thresholds are only rebuilt on expiry
+ADHOC_POOL_TTL = 60 * 10
+# Most recent items kept per genre pool
+NEW_ITEM_POOL_SIZE = 200
+
+# Items kept per genre leaderboard; larger requests query the DB directly
+LEADERBOARD_SIZE = 200
+LEADERBOARD_TTL = 60 * 60 * 24
+
+
+def _first_pool_version() -> int:
+    # Seeded from the clock so a lost counter never repeats an old version
+    return time.time_ns() // 1000
+
+
+def _pool_version(item_field: str) -> int:
+    return cache.get_or_set(
+        f"new_item_pool_version:{item_field}", _first_pool_version, None
+    )
+
+
+def _next_pool_version(item_field: str) -> int:
+    key = f"new_item_pool_version:{item_field}"
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _first_pool_version()
+        cache.set(key, version, None)
+        return version
+
+
+def _pool_key(
+    item_field: str, min_ratings: int, genre_id: Any, pool_version: int
+) -> str:
+    version = catalog_version(item_field)
+    return (
+        f"new_item_pool:{item_field}:v{version}:p{pool_version}:"
+        f"{min_ratings}:{genre_id}"
+    )
+
+
+def _capped(pool: Dict[Any, Tuple[int, int]]) -> Dict[Any, Tuple[int, int]]:
+    """The ``NEW_ITEM_POOL_SIZE`` most recent entries (highest row id)."""
+    if len(pool) <= NEW_ITEM_POOL_SIZE:
+        return pool
+    newest = heapq.nlargest(
+        NEW_ITEM_POOL_SIZE, pool.items(), key=lambda entry: entry[1][1]
+    )
+    return dict(newest)
+
+
+def _leaderboard_key(item_field: str, genre_id: Any) -> str:
+    version = catalog_version(item_field)
+    return f"genre_leaderboard:{item_field}:v{version}:{genre_id}"
 
-from django.db.models import Count, Model
+
+def get_new_item_pools(
+    item_model: Type[Model],
+    item_field: str,
+    genre_ids: Iterable[Any],
+    min_ratings: int = NEW_ITEM_MIN_RATINGS,
+) -> Dict[Any, Dict[Any, Tuple[int, int]]]:
+    """
+    Return ``{genre_id: {item_pk: (item_genre_count, row_id)}}`` for the most
+    recent items with fewer than ``min_ratings`` ratings, building missing
+    genre pools from the DB.
+    """
+    pool_version = _pool_version(item_field)
+    keys = {_pool_key(item_field, min_ratings, g, pool_version): g for g in genre_ids}
+    cached = cache.get_many(list(keys))
+    pools = {keys[k]: v for k, v in cached.items()}
+
+    missing = [g for k, g in keys.items() if k not in cached]
+    if missing:
+        through = item_model.genre.through
+        column = f"{item_model._meta.model_name}_id"
+        rows = list(
+            through.objects.filter(
+                genre_id__in=missing,
+                **{f"{column[:-3]}__rating_count__lt": min_ratings},
+            ).values_list(column, "genre_id", f"{column[:-3]}__row_id")
+        )
+        built: Dict[Any, Dict[Any, Tuple[int, int]]] = {g: {} for g in missing}
+        for pk, genre_id, row_id in rows:
+            # Items still without a row id rank as the oldest
+            built[genre_id][pk] = (1, -1 if row_id is None else row_id)
+        built = {g: _capped(pool) for g, pool in built.items()}
+        genre_counts = dict(
+            through.objects.filter(
+                **{f"{column}__in": {pk for pool in built.values() for pk in pool}}
+            )
+            .values(column)
+            .annotate(n=Count("genre_id"))
+            .values_list(column, "n")
+        )
+        for pool in built.values():
+            for pk, (_, row_id) in pool.items():
+                pool[pk] = (genre_counts.get(pk, 1), row_id)
+        timeout = (
+            NEW_ITEM_POOL_TTL if min_ratings == NEW_ITEM_MIN_RATINGS else ADHOC_POOL_TTL
+        )
+        cache.set_many(
+            {
+                _pool_key(item_field, min_ratings, g, pool_version): pool
+                for g, pool in built.items()
+            },
+            timeout,
+        )
+        pools.update(built)
+    return pools
+
+
+def update_new_item_pool(
+    item_model: Type[Model],
+    item_field: str,
+    count_changes: Dict[Any, Tuple[int, int]],
+) -> None:
+    """
+    Move items in or out of the default-threshold pool when their rating
+    count crosses ``NEW_ITEM_MIN_RATINGS``.
+
+    Args:
+        count_changes: ``{item_pk: (old_rating_count, new_rating_count)}``.
+    """
+    threshold = NEW_ITEM_MIN_RATINGS
+    entering = {
+        pk for pk, (old, new) in count_changes.items() if old >= threshold > new
+    }
+    leaving = {pk for pk, (old, new) in count_changes.items() if new >= threshold > old}
+    if not entering and not leaving:
+        return
+
+    through = item_model.genre.through
+    column = f"{item_model._meta.model_name}_id"
+    item_genres: Dict[Any, List[Any]] = {}
+    for pk, genre_id in through.objects.filter(
+        **{f"{column}__in": entering | leaving}
+    ).values_list(column, "genre_id"):
+        item_genres.setdefault(pk, []).append(genre_id)
+    row_ids = dict(
+        item_model.objects.filter(pk__in=entering).values_list("pk", "row_id")
+    )
+
+    # A new pool version: pools this update does not rewrite (and pools a
+    # concurrent update writes under the version it claimed) rebuild lazily
+    pool_version = _next_pool_version(item_field)
+
+    genre_ids = {g for genres in item_genres.values() for g in genres}
+    previous = {
+        _pool_key(item_field, threshold, g, pool_version - 1): g for g in genre_ids
+    }
+    # Only carry forward pools that are already built
+    updated = {}
+    for key, pool in cache.get_many(list(previous)).items():
+        genre_id = previous[key]
+        full = len(pool) >= NEW_ITEM_POOL_SIZE
+        removed = False
+        for pk, genres in item_genres.items():
+            if genre_id not in genres:
+                continue
+            if pk in entering:
+                row_id = row_ids.get(pk)
+                pool[pk] = (len(genres), -1 if row_id is None else row_id)
+            else:
+                removed |= pool.pop(pk, None) is not None
+        if full and removed:
+            # Items cut off by the cap may belong in it now: rebuild instead
+            continue
+        updated[_pool_key(item_field, threshold, genre_id, pool_version)] = _capped(
+            pool
+        )
+    if updated:
+        cache.set_many(updated, NEW_ITEM_POOL_TTL)
+
+
+def _popularity_field(item_model: Type[Model]) -> str:
+    return "likedPercent" if hasattr(item_model, "likedPercent") else "startyear"
+
+
+def _popularity_score(score_field: str, raw: Any) -> float:
+    raw = raw or 0
+    # Normalize startyear to a 0-100 scale (1970–2026 range)
+    if score_field == "startyear":
+        return min(max((raw - 1970) / (2026 - 1970) * 100, 0), 100)
+    return float(raw)
+
+
+def _build_leaderboard(
+    item_model: Type[Model], genre_id: Any = None, size: int = LEADERBOARD_SIZE
+) -> List[Tuple[float, Any]]:
+    """Top ``size`` ``(score, pk)`` pairs of a genre (or the whole catalog)."""
+    score_field = _popularity_field(item_model)
+    if genre_id is None:
+        rows = item_model.objects.order_by(
+            F(score_field).desc(nulls_last=True), "pk"
+        ).values_list("pk", score_field)
+    else:
+        # Walk the through table so no DISTINCT over the M2M join is needed
+        name = item_model._meta.model_name
+        rows = (
+            item_model.genre.through.objects.filter(genre_id=genre_id)
+            .order_by(F(f"{name}__{score_field}").desc(nulls_last=True), f"{name}_id")
+            .values_list(f"{name}_id", f"{name}__{score_field}")
+        )
+    # Same order the in-memory merge relies on
+    return sorted(
+        ((_popularity_score(score_field, raw), pk) for pk, raw in rows[:size]),
+        key=lambda x: (-x[0], str(x[1])),
+    )
+
+
+def get_genre_leaderboards(
+    item_model: Type[Model], genre_ids: Iterable[Any]
+) -> Dict[Any, List[Tuple[float, Any]]]:
+    """
+    Return cached ``{genre_id: [(score, pk), ...]}`` leaderboards, building
+    missing ones. ``None`` as a genre id stands for the global leaderboard.
+    """
+    item_field = item_model._meta.model_name
+    keys = {
+        _leaderboard_key(item_field, "all" if g is None else g): g for g in genre_ids
+    }
+    cached = cache.get_many(list(keys))
+    boards = {keys[k]: v for k, v in cached.items()}
+    built = {
+        k: _build_leaderboard(item_model, g) for k, g in keys.items() if k not in cached
+    }
+    if built:
+        cache.set_many(built, LEADERBOARD_TTL)
+        boards.update({keys[k]: v for k, v in built.items()})
+    return boards
+
+
+def refresh_genre_leaderboards(item_model: Type[Model]) -> int:
+    """Rebuild every genre leaderboard of an item type. Returns the count."""
+    item_field = item_model._meta.model_name
+    genre_model = item_model.genre.field.related_model
+    genre_ids = [None] + list(genre_model.objects.values_list("pk", flat=True))
+    cache.set_many(
+        {
+            _leaderboard_key(item_field, "all" if g is None else g): _build_leaderboard(
+                item_model, g
+            )
+            for g in genre_ids
+        },
+        LEADERBOARD_TTL,
+    )
+    return len(genre_ids)
+
+
+def _merge_leaderboards(
+    boards: Dict[Any, List[Tuple[float, Any]]],
+    weights: Dict[Any, float],
+    rated: Optional[RatedItems],
+    limit: int,
+) -> Dict[Any, float]:
+    """The ``limit`` best unrated ``{pk: weighted score}`` of the boards."""
+    skip: Set[Any] = set()
+    if rated is not None:
+        board_pks = list({pk for board in boards.values() for _, pk in board})
+        skip = set(board_pks) - set(rated.unrated(board_pks))
+
+    # k-way merge; every weighted board stays sorted, so the first time an
+    # item appears is its best weighted score
+    merged = heapq.merge(
+        *(
+            [(score * weights[g], pk) for score, pk in board]
+            for g, board in boards.items()
+        ),
+        key=lambda x: (-x[0], str(x[1])),
+    )
+    top: Dict[Any, float] = {}
+    for score, pk in merged:
+        if pk not in top and pk not in skip:
+            top[pk] = score
+            if len(top) == limit:
+                break
+    return top
 
 
 def get_popular_by_genre(
@@ -24,6 +328,7 @@ def get_popular_by_genre(
     genre_prefs: Dict[Any, float],
     allowed_types: Sequence[str] = ("books",),
     limit: int = 100,
+    rated: Optional[RatedItems] = None,
 ) -> List[Tuple[float, Any]]:
     """
     Return popular items filtered by the user's genre preferences.
@@ -35,39 +340,91 @@ def get_popular_by_genre(
         genre_prefs: Mapping of Genre instances → preference scores.
         allowed_types: Not used directly here but kept for API consistency.
         limit: Maximum number of items to return.
+        rated: The user's ``RatedItems``; rated items are skipped.
 
     Returns:
         List of (score, item) tuples sorted by score descending.
-        Score is a simple popularity metric (0–100).
+        Score is a simple popularity metric (0–100), scaled per genre by
+        the user's preference for it (-5..5 mapped onto 0..1).
     """
-    if hasattr(item_model, "likedPercent"):
-        order_field = "-likedPercent"
-        score_field = "likedPercent"
-    else:
-        order_field = "-startyear"
-        score_field = "startyear"
-
-    if genre_prefs:
-        genre_ids = [g.pk for g in genre_prefs.keys()]
-        items = (
-            item_model.objects.filter(genre__pk__in=genre_ids)
-            .distinct()
-            .order_by(order_field)[:limit]
-        )
-    else:
-        items = item_model.objects.order_by(order_field)[:limit]
-
-    results: List[Tuple[float, Any]] = []
-    for item in items:
-        raw = getattr(item, score_field, 0) or 0
-        # Normalize startyear to a 0-100 scale (1970–2026 range)
-        if score_field == "startyear":
-            score = min(max((raw - 1970) / (2026 - 1970) * 100, 0), 100)
+    # Read past as many items as the user has rated, so the rated ones
+    # dropped below cannot leave fewer than ``limit``
+    depth = limit + (len(rated) if rated is not None else 0)
+    if limit > LEADERBOARD_SIZE:
+        score_field = _popularity_field(item_model)
+        if genre_prefs:
+            items = (
+                item_model.objects.filter(genre__pk__in=[g.pk for g in genre_prefs])
+                .distinct()
+                .order_by(f"-{score_field}")[:depth]
+            )
         else:
-            score = float(raw)
-        results.append((round(score, 2), item))
+            items = item_model.objects.order_by(f"-{score_field}")[:depth]
+        if rated is not None:
+            items = list(items)
+            rated_mask = rated.mask([item.pk for item in items])
+            items = [item for item, r in zip(items, rated_mask) if not r][:limit]
+        return [
+            (round(_popularity_score(score_field, getattr(item, score_field)), 2), item)
+            for item in items
+        ]
+
+    weights = {g.pk: max(min((p + 5) / 10, 1.0), 0.0) for g, p in genre_prefs.items()}
+    if not weights:
+        weights = {None: 1.0}
+    boards = get_genre_leaderboards(item_model, weights)
+    top = _merge_leaderboards(boards, weights, rated, limit)
+    if len(top) < limit and depth > LEADERBOARD_SIZE:
+        # Rated items took up full boards: read those past the rated ones
+        full = [g for g, board in boards.items() if len(board) >= LEADERBOARD_SIZE]
+        if full:
+            for genre_id in full:
+                boards[genre_id] = _build_leaderboard(item_model, genre_id, depth)
+            top = _merge_leaderboards(boards, weights, rated, limit)
 
-    return sorted(results, key=lambda x: x[0], reverse=True)
+    items_map = item_model.objects.in_bulk(list(top))
+    return [
+        (round(score, 2), items_map[pk]) for pk, score in top.items() if pk in items_map
+    ]
+
+
+def new_item_bonuses(
+    item_model: Type[Model],
+    item_field: str,
+    genre_ids: Iterable[Any],
+    exclude_pks: Iterable[Any] = (),
+    min_ratings: int = NEW_ITEM_MIN_RATINGS,
+    boost_factor: float = 15.0,
+    max_boosted: int = 10,
+    rated: Optional[RatedItems] = None,
+) -> List[Tuple[float, Any]]:
+    """
+    ``[(bonus, item_pk), ...]`` for the best-matching pooled new items of
+    ``genre_ids``, highest bonus first.  See ``boost_new_items``.
+    """
+    exclude_pks = set(exclude_pks)
+
+    # Count how many of the user's genres each pooled item matches
+    pools = get_new_item_pools(item_model, item_field, genre_ids, min_ratings)
+    overlap: Counter = Counter()
+    item_genre_counts: Dict[Any, int] = {}
+    for pool in pools.values():
+        for pk, (genre_count, _) in pool.items():
+            overlap[pk] += 1
+            item_genre_counts[pk] = genre_count
+    if rated is not None:
+        pooled = list(overlap)
+        exclude_pks |= set(pooled) - set(rated.unrated(pooled))
+
+    # Bonus proportional to genre overlap
+    return sorted(
+        (
+            (boost_factor * (n / max(item_genre_counts[pk], 1)), pk)
+            for pk, n in overlap.items()
+            if pk not in exclude_pks
+        ),
+        key=lambda x: (-x[0], str(x[1])),
+    )[:max_boosted]
 
 
 def boost_new_items(
@@ -76,9 +433,10 @@ def boost_new_items(
     item_field: str,
     genre_prefs: Dict[Any, float],
     item_model: Type[Model],
-    min_ratings: int = 5,
+    min_ratings: int = NEW_ITEM_MIN_RATINGS,
     boost_factor: float = 15.0,
     max_boosted: int = 10,
+    rated: Optional[RatedItems] = None,
 ) -> List[Tuple[float, Any]]:
     """
     Boost under-rated items that match the user's genre preferences.
@@ -89,12 +447,14 @@ def boost_new_items(
     Args:
         recommendations: Existing scored recommendations [(score, item), ...].
         interaction_model: Rating model (UserBookRating or UserTvMediaRating).
+            Kept for API consistency; counts come from ``item_model.rating_count``.
         item_field: FK field name on the rating model (e.g. "book", "tvmedia").
         genre_prefs: User's genre preference mapping.
         item_model: Django model class for the items.
         min_ratings: Threshold below which an item is considered "new".
         boost_factor: Maximum bonus score added to new items.
         max_boosted: Maximum number of new items to inject.
+        rated: The user's ``RatedItems``; rated items are never injected.
 
     Returns:
         Updated list of (score, item) tuples, re-sorted.
@@ -102,33 +462,21 @@ def boost_new_items(
     if not genre_prefs:
         return recommendations
 
-    existing_pks = {item.pk for _, item in recommendations}
-
-    # Find items with few ratings using the interaction model's reverse relation
-    # e.g. Book → UserBookRating reverse is "userbookrating"
-    reverse_name = interaction_model.__name__.lower()
-    low_rated_items = (
-        item_model.objects.annotate(rating_count=Count(reverse_name))
-        .filter(rating_count__lt=min_ratings)
-        .prefetch_related("genre")
-        .order_by("-rating_count")[: max_boosted * 3]
+    candidates = new_item_bonuses(
+        item_model,
+        item_field,
+        [g.pk for g in genre_prefs.keys()],
+        exclude_pks={item.pk for _, item in recommendations},
+        min_ratings=min_ratings,
+        boost_factor=boost_factor,
+        max_boosted=max_boosted,
+        rated=rated,
     )
 
-    user_genre_pks = {g.pk for g in genre_prefs.keys()}
-    boosted = []
-
-    for item in low_rated_items:
-        if item.pk in existing_pks:
-            continue
-        item_genre_pks = set(item.genre.values_list("pk", flat=True))
-        overlap = len(item_genre_pks & user_genre_pks)
-        if overlap > 0:
-            # Bonus proportional to genre overlap
-            bonus = boost_factor * (overlap / max(len(item_genre_pks), 1))
-            boosted.append((round(bonus, 2), item))
-            existing_pks.add(item.pk)
-            if len(boosted) >= max_boosted:
-                break
+    items_map = item_model.objects.in_bulk([pk for _, pk in candidates])
+    boosted = [
+        (round(bonus, 2), items_map[pk]) for bonus, pk in candidates if pk in items_map
+    ]
 
     combined = list(recommendations) + boosted
     return sorted(combined, key=lambda x: x[0], reverse=True)
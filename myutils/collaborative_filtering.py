@@ -1,13 +1,22 @@
 import math
 from collections import defaultdict
-from typing import Any, Dict, List, Optional, Tuple, Type
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
 
 from django.core.cache import cache
 from django.db.models import Model
 
+from .cache_codec import cache_get, cache_set
+from .cooccurrence import get_cooccurrence_similarities
+from .cooccurrence import is_enabled as cooccurrence_enabled
+from .item_index import item_index
+from .rated_items import RatedItems, rated_items
+
 # Cache TTL for similarity results (6 hours)
 SIMILARITY_CACHE_TTL = 60 * 60 * 6
 
+# Default shrinkage λ; results for other values are cached under a suffixed key
+DEFAULT_SHRINKAGE = 25.0
+
 
 def _similarity_cache_key(item_field: str, item_id: Any) -> str:
     """Generate a Redis cache key for item similarity data."""
@@ -23,6 +32,35 @@ def invalidate_similarity_cache(item_field: str, item_id: Any) -> None:
     cache.delete(_similarity_cache_key(item_field, item_id))
 
 
+def invalidate_similarity_cache_many(item_field: str, item_ids: Iterable[Any]) -> None:
+    """Invalidate the cached similarity data for several items in one round-trip."""
+    keys = [_similarity_cache_key(item_field, item_id) for item_id in item_ids]
+    if keys:
+        cache.delete_many(keys)
+
+
+def _ranking_to_rows(
+    item_field: str, ranking: List[Tuple[float, Any]]
+) -> List[Tuple[float, Any]]:
+    """Swap item pks for int32 row ids, which pack in 4 bytes instead of 16."""
+    index = item_index(item_field)
+    rows = index.rows(pk for _, pk in ranking)
+    if (rows < 0).any():
+        # Items without a row id yet: keep the pks
+        return ranking
+    return [(score, int(row)) for (score, _), row in zip(ranking, rows)]
+
+
+def _ranking_from_rows(
+    item_field: str, ranking: List[Tuple[float, Any]]
+) -> List[Tuple[float, Any]]:
+    """Inverse of ``_ranking_to_rows``; deleted items are dropped."""
+    if not ranking or not isinstance(ranking[0][1], int):
+        return ranking
+    pks = item_index(item_field).pks_of([row for _, row in ranking])
+    return [(score, pk) for (score, _), pk in zip(ranking, pks) if pk is not None]
+
+
 def calculate_cosine_similarity(
     ratings1: Dict[int, float], ratings2: Dict[int, float]
 ) -> float:
@@ -49,7 +87,7 @@ def get_item_similarities(
     interaction_model: Type[Model],
     item_field: str,
     use_cache: bool = True,
-    shrinkage: float = 25.0,  # Regularization term λ
+    shrinkage: float = DEFAULT_SHRINKAGE,  # Regularization term λ
 ) -> List[Tuple[float, Any]]:
     """
     Calculates similarities with shrinkage regularization:
@@ -58,11 +96,39 @@ def get_item_similarities(
     """
     # Check cache first
     if use_cache:
-        cache_key = _similarity_cache_key(item_field, f"{item_id}_shrunk_{shrinkage}")
-        cached = cache.get(cache_key)
+        cache_key = _similarity_cache_key(
+            item_field,
+            (
+                item_id
+                if shrinkage == DEFAULT_SHRINKAGE
+                else f"{item_id}_shrunk_{shrinkage}"
+            ),
+        )
+        cached = cache_get(cache_key)
         if cached is not None:
-            return cached
+            return _ranking_from_rows(item_field, cached)
+
+    if cooccurrence_enabled():
+        result = get_cooccurrence_similarities(item_field, item_id, shrinkage)
+    else:
+        result = _scan_item_similarities(
+            item_id, interaction_model, item_field, shrinkage
+        )
+
+    # Store in cache
+    if use_cache:
+        cache_set(cache_key, _ranking_to_rows(item_field, result), SIMILARITY_CACHE_TTL)
 
+    return result
+
+
+def _scan_item_similarities(
+    item_id: Any,
+    interaction_model: Type[Model],
+    item_field: str,
+    shrinkage: float,
+) -> List[Tuple[float, Any]]:
+    """Similarities computed from the ratings of the item's co-raters."""
     # Get all users who rated this item
     users_who_rated = interaction_model.objects.filter(
         **{item_field: item_id}
@@ -71,13 +137,10 @@ def get_item_similarities(
     # Get all ratings for these users
     related_ratings = interaction_model.objects.filter(
         user_id__in=users_who_rated
-    ).select_related(item_field)
+    ).values_list("user_id", f"{item_field}_id", "rating")
 
     item_ratings: Dict[Any, Dict[int, float]] = defaultdict(dict)
-    for r in related_ratings:
-        iid = getattr(r, f"{item_field}_id")
-        rating = getattr(r, "rating")
-        user_id = getattr(r, "user_id")
+    for user_id, iid, rating in related_ratings:
         item_ratings[iid][user_id] = float(rating)
 
     target_ratings = item_ratings.get(item_id, {})
@@ -102,13 +165,7 @@ def get_item_similarities(
         if shrunk_sim > 0:
             similarities.append((shrunk_sim, other_id))
 
-    result = sorted(similarities, key=lambda x: x[0], reverse=True)
-
-    # Store in cache
-    if use_cache:
-        cache.set(cache_key, result, SIMILARITY_CACHE_TTL)
-
-    return result
+    return sorted(similarities, key=lambda x: x[0], reverse=True)
 
 
 def get_collaborative_recommendations(
@@ -117,10 +174,13 @@ def get_collaborative_recommendations(
     item_model: Type[Model],
     item_field: str,
     top_n: int = 10,
-    already_rated: Optional[set[Any]] = None,
+    already_rated: Optional[RatedItems] = None,
 ) -> List[Tuple[float, Any]]:
     """
     Generates collaborative recommendations with candidate pool limiting.
+
+    Items in ``already_rated`` (by default the user's cached ``RatedItems``)
+    are dropped with one bitmap lookup over the whole candidate pool.
     """
     # Get user's high-rated items (rating >= 7)
     user_interactions = interaction_model.objects.filter(
@@ -148,15 +208,10 @@ def get_collaborative_recommendations(
     # Normalize scores and fetch objects
     recommendations = []
     if already_rated is None:
-        already_rated = set(
-            interaction_model.objects.filter(user=user).values_list(
-                item_field, flat=True
-            )
-        )
+        already_rated = rated_items(user.pk, item_field)
 
-    for item_id, total_score in item_scores.items():
-        if item_id in already_rated:
-            continue
+    for item_id in already_rated.unrated(list(item_scores)):
+        total_score = item_scores[item_id]
         weight = item_weights[item_id]
         avg_score = total_score / weight if weight > 0 else 0
         recommendations.append((avg_score, item_id))
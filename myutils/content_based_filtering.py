@@ -2,24 +2,29 @@ from typing import (
     Any,
     Callable,
     Dict,
+    Iterable,
     List,
-    Literal,
     Optional,
     Sequence,
-    Set,
     Tuple,
     Type,
-    Union,
 )
 
-from django.db.models import Count, Model
+import numpy as np
+from django.db.models import F, Model, Window
+from django.db.models.functions import RowNumber
 
 from Books.models import Book
 from Books.models import Genre as BookGenre
 from moviesNshows.models import Genre as TvGenre
 from moviesNshows.models import TvMedia
 
-from .feature_signals import compute_signal_bonus
+from .catalog_snapshot import get_catalog_snapshot
+from .feature_signals import load_user_signal_targets, snapshot_signal_bonuses
+from .rated_items import RatedItems
+
+# (genre related_name, item model, rating FK field) per item type
+_ITEM_TYPES = (("tvmedia", TvMedia, "tvmedia"), ("books", Book, "book"))
 
 
 def _sort_and_select_top_genres(
@@ -44,28 +49,72 @@ def _sort_and_select_top_genres(
     return selected_top_genres
 
 
-def _calculate_media_recommendation_score(
-    media_instance: TvMedia | Book,
-    user_needed_genres: Dict[TvGenre | BookGenre, float],
-    scoring_fn: Callable[[Any, float], float] = None,
-    default_value: float = 0,
-) -> Union[Tuple[Literal[0], Literal[0]], Tuple[float, int]]:
+def rated_genre_depths(
+    snapshot: Any,
+    genre_ids: Iterable[Any],
+    max_per_genre: int,
+    rated: Optional[RatedItems],
+) -> Dict[Any, int]:
     """
-    Calculate the total recommendation score for a single media based on all its genres and user needs.
-    scoring_fn is optional: if not supplied, just use user_pref (after float conversion) as the score.
+    Window depth per genre that still leaves ``max_per_genre`` rows once the
+    ``rated`` rows are dropped: the budget plus the rated rows in the genre.
     """
-    media_genres: List[TvGenre | BookGenre] = list(media_instance.genre.all())
-    if not media_genres:
-        return 0, 0
-    total_score: float = 0
-    for genre in media_genres:
-        user_pref: float = user_needed_genres.get(genre, default_value)
-        if scoring_fn is not None:
-            total_score += float(scoring_fn(genre, user_pref))
-        else:
-            total_score += float(user_pref)
-    total_score = max(total_score, 0)
-    return total_score, len(media_genres)
+    if rated is None:
+        return {g: max_per_genre for g in genre_ids}
+    rows = np.flatnonzero(rated.bits)
+    inside = rows[rows < len(snapshot)]
+    # Rows newer than the snapshot have unknown genres; count them everywhere
+    newer = len(rows) - len(inside)
+    counts = snapshot.genre_counts(inside)
+    return {g: max_per_genre + newer + counts.get(g, 0) for g in genre_ids}
+
+
+def ranked_genre_rows(
+    item_model: Type[Model],
+    item_field: str,
+    genre_ids: List[Any],
+    max_per_genre: int,
+    rated: Optional[RatedItems] = None,
+) -> Dict[Any, List[int]]:
+    """
+    Row ids of each genre's ``max_per_genre`` most rated items, most rated
+    first (ties by pk), from one windowed query.
+
+    With ``rated``, rated items are dropped before the budget is counted:
+    the window reaches past as many rows as there are rated ones in the
+    genre (``rated_genre_depths``).
+    """
+    depth = max_per_genre
+    if rated is not None:
+        depths = rated_genre_depths(
+            get_catalog_snapshot(item_field), genre_ids, max_per_genre, rated
+        )
+        depth = max(depths.values(), default=max_per_genre)
+    column = f"{item_field}_id"
+    ranked = (
+        item_model.genre.through.objects.filter(
+            genre_id__in=genre_ids, **{f"{item_field}__row_id__isnull": False}
+        )
+        .annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=[F("genre_id")],
+                order_by=[F(f"{item_field}__rating_count").desc(), F(column).asc()],
+            )
+        )
+        .filter(rank__lte=depth)
+        .order_by("genre_id", "rank")
+        .values_list("genre_id", f"{item_field}__row_id")
+    )
+    per_genre: Dict[Any, List[int]] = {g: [] for g in genre_ids}
+    for genre_id, row in ranked:
+        per_genre[genre_id].append(row)
+    if rated is not None:
+        for genre_id, rows in per_genre.items():
+            mask = rated.mask_rows(rows)
+            unrated = [row for row, r in zip(rows, mask) if not r]
+            per_genre[genre_id] = unrated[:max_per_genre]
+    return per_genre
 
 
 def _gather_recommendation_candidates(
@@ -75,7 +124,7 @@ def _gather_recommendation_candidates(
     scoring_fn: Callable[[Any, float], float] = None,
     fallback_pref_score: float = 0,
     allowed_types: Sequence[str] = ("tvmedia", "books"),
-    already_rated: Optional[Set[Any]] = None,
+    already_rated: Optional[RatedItems] = None,
 ) -> Tuple[List[Tuple[float, Any, int]], float]:
     """
     Given selected genres, gathers unique media or book items and calculates their raw recommendation score.
@@ -86,49 +135,74 @@ def _gather_recommendation_candidates(
         scoring_fn: function to transform user rating -> score (optional)
         fallback_pref_score: value to use if rating missing
         allowed_types: tuple/list of allowed related_names (e.g., ('tvmedia',), ('books',), or both)
+        already_rated: the user's ``RatedItems``; rated candidates are dropped
     Returns:
         tuple (recommendations_with_score, highest_score)
-    """
-
-    RELATED_NAMES: List[str] = [
-        name for name in ("tvmedia", "books") if name in allowed_types
-    ]
 
-    if already_rated is None:
-        already_rated = set()
-    already_recommended_obj_ids: Set[Any] = set(already_rated)
+    Candidates come from one windowed query per item type; their genres
+    come from the catalog snapshot, and the items themselves from one
+    ``in_bulk`` query.
+    """
     object_score_candidates: List[Tuple[float, Any, int]] = []
     greatest_found_score: float = 0
 
-    for genre in relevant_genres:
-        for related_name in RELATED_NAMES:
-            if not hasattr(genre, related_name):
-                continue
-            # Determine rating count lookup for popularity sorting
-            rating_lookup = (
-                "usertvmediarating" if related_name == "tvmedia" else "userbookrating"
-            )
+    for related_name, item_model, item_field in _ITEM_TYPES:
+        if related_name not in allowed_types:
+            continue
+        genres = [g for g in relevant_genres if hasattr(g, related_name)]
+        if not genres:
+            continue
+        per_genre = ranked_genre_rows(
+            item_model, item_field, [g.pk for g in genres], max_per_genre, already_rated
+        )
+        lists = [per_genre[g.pk] for g in genres]
+        stacked = np.array([row for rows in lists for row in rows], dtype=np.int64)
+        if not len(stacked):
+            continue
+        # First occurrence wins, in genre order
+        _, first = np.unique(stacked, return_index=True)
+        rows = stacked[np.sort(first)]
 
-            related_queryset = (
-                getattr(genre, related_name)
-                .exclude(pk__in=already_rated)
-                .annotate(num_ratings=Count(rating_lookup))
-                .order_by("-num_ratings")
-                .prefetch_related("genre")[:max_per_genre]
+        snapshot = get_catalog_snapshot(item_field)
+        rows = rows[rows < len(snapshot)]
+        values = {g.pk: float(p) for g, p in user_needed_genres.items()}
+        default = float(fallback_pref_score)
+        if scoring_fn is not None:
+            values, default = _scored_genre_values(
+                snapshot, rows, user_needed_genres, scoring_fn, fallback_pref_score
             )
-            for obj in related_queryset:
-                if obj.pk in already_recommended_obj_ids:
-                    continue
-                score, genre_count = _calculate_media_recommendation_score(
-                    obj, user_needed_genres, scoring_fn, fallback_pref_score
-                )
-                object_score_candidates.append((float(score), obj, int(genre_count)))
-                if float(score) > greatest_found_score:
-                    greatest_found_score = float(score)
-                already_recommended_obj_ids.add(obj.pk)
+        sums, genre_counts = snapshot.genre_sums(rows, values, default)
+        raw_scores = np.maximum(sums, 0)
+
+        pks = snapshot.pks_of(rows)
+        items = item_model.objects.in_bulk(pks)
+        for pk, raw, genre_count in zip(pks, raw_scores, genre_counts):
+            obj = items.get(pk)
+            if obj is None:
+                continue
+            object_score_candidates.append((float(raw), obj, int(genre_count)))
+            greatest_found_score = max(greatest_found_score, float(raw))
     return object_score_candidates, greatest_found_score
 
 
+def _scored_genre_values(
+    snapshot: Any,
+    rows: np.ndarray,
+    user_needed_genres: Dict[TvGenre | BookGenre, float],
+    scoring_fn: Callable[[Any, float], float],
+    fallback_pref_score: float,
+) -> Tuple[Dict[Any, float], float]:
+    """Per-genre ``scoring_fn`` values over every genre of ``rows``."""
+    genre_model = next(iter(user_needed_genres)).__class__
+    prefs = {g.pk: (g, p) for g, p in user_needed_genres.items()}
+    genre_ids = {int(g) for r in rows for g in snapshot.genres_of(r)}
+    missing = genre_model.objects.in_bulk([g for g in genre_ids if g not in prefs])
+    values = {pk: float(scoring_fn(genre, pref)) for pk, (genre, pref) in prefs.items()}
+    for pk, genre in missing.items():
+        values[pk] = float(scoring_fn(genre, fallback_pref_score))
+    return values, 0.0
+
+
 def _normalize_and_format_scores(
     media_score_candidates: List[Tuple[float, Any, int]],
     max_possible_score: float,
@@ -163,7 +237,7 @@ def get_content_based_recommendations(
     user: Optional[Any] = None,
     interaction_model: Optional[Type[Model]] = None,
     item_field: Optional[str] = None,
-    already_rated: Optional[Set[Any]] = None,
+    already_rated: Optional[RatedItems] = None,
 ) -> List[Tuple[float, Any]]:
     """
     Generate media (or book) recommendations based on user genre preferences.
@@ -178,7 +252,9 @@ def get_content_based_recommendations(
         allowed_types (tuple|list): Allowed related_names for objects ('tvmedia', 'books').
         user: The requesting user (for feature signal computation).
         interaction_model: Rating model class (for feature signal computation).
-        item_field: FK field name ('book' or 'tvmedia').
+        item_field: FK field name ('book' or 'tvmedia'); kept for API
+            compatibility, the candidates' own type picks their signals.
+        already_rated: The user's ``RatedItems``, excluded from the results.
 
     Returns:
         list of tuples: [(relativity_score (0-100), media_obj), ...]
@@ -199,17 +275,26 @@ def get_content_based_recommendations(
         already_rated=already_rated,
     )
 
-    # Apply feature signal bonuses to each candidate
-    enriched_candidates: List[Tuple[float, Any, int]] = []
-    for raw_score, media_obj, genre_count in media_score_candidates:
-        bonus = compute_signal_bonus(
-            item=media_obj,
-            user=user,
-            interaction_model=interaction_model,
-            item_field=item_field
-            or ("book" if "books" in allowed_types else "tvmedia"),
+    # Feature signal bonuses, vectorized per item type over snapshot rows
+    bonuses: Dict[int, float] = {}
+    for _, item_model, candidate_field in _ITEM_TYPES:
+        objs = [c[1] for c in media_score_candidates if isinstance(c[1], item_model)]
+        if not objs:
+            continue
+        targets = None
+        if user is not None and interaction_model is not None:
+            targets = load_user_signal_targets(user, interaction_model, candidate_field)
+        rows = np.array([obj.row_id for obj in objs], dtype=np.int64)
+        values = snapshot_signal_bonuses(
+            get_catalog_snapshot(candidate_field), rows, targets
         )
-        enriched_candidates.append((float(raw_score) + bonus, media_obj, genre_count))
+        for obj, bonus in zip(objs, values):
+            bonuses[id(obj)] = float(bonus)
+
+    enriched_candidates: List[Tuple[float, Any, int]] = [
+        (float(raw_score) + bonuses[id(media_obj)], media_obj, genre_count)
+        for raw_score, media_obj, genre_count in media_score_candidates
+    ]
 
     # Adjust max score to include possible bonus
     adjusted_max = float(greatest_score) + 30.0 if greatest_score > 0 else 1.0
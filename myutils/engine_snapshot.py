@@ -0,0 +1,237 @@
+"""
+Engine Snapshots on Disk
+========================
+
+The catalog snapshot of each item type (``myutils.catalog_snapshot``) and
+its item id map can be exported to a directory and loaded elsewhere
+instead of being rebuilt from the database:
+
+    <directory>/manifest.json
+    <directory>/<item_field>/<array>.npy
+
+The manifest records the format version, and per item type the catalog
+generation the snapshot was read at, the attribute vocabularies and, for
+every array file, its dtype, shape and SHA-256 checksum.  Item ids are
+stored as 16-byte UUIDs, one row per ``row_id`` (zeros for holes): the
+``ItemIndex.ids`` array itself.  Reading checks the format version and
+every checksum, and memory-maps the arrays read-only; the loaded item id
+map serves straight from the mapped array.  An export is written to a
+temporary sibling directory and renamed over the previous one.
+
+A snapshot only stands for the database it was exported from.
+``load_engine_snapshot`` compares its item id map with the ``row_id``
+column, then adopts its generation as the catalog generation of a cache
+that has none yet (or checks that it matches the current one).  Processes
+started with ``ENGINE_SNAPSHOT_DIR`` set then serve it from the
+preload hook (``myutils.preload``) without building anything; if it cannot
+be read there, they log why and build from the database instead.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .catalog import catalog_version
+from .catalog_snapshot import (
+    SNAPSHOT_FIELDS,
+    CatalogSnapshot,
+    get_catalog_snapshot,
+    install_catalog_snapshot,
+)
+from .item_index import ItemIndex, install_item_index, item_model_of
+
+logger = logging.getLogger(__name__)
+
+ENGINE_SNAPSHOT_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+
+# Array attributes of CatalogSnapshot written as-is
+_ARRAYS = ("present", "popularity", "recency", "genre_indptr", "genre_ids")
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_engine_snapshot(
+    directory: str, item_fields: Iterable[str] = tuple(SNAPSHOT_FIELDS)
+) -> Dict[str, Any]:
+    """
+    Write the current catalog snapshots to ``directory``; returns the
+    manifest.  The export is written to a sibling temporary directory and
+    renamed into place, so readers never see a half-written snapshot.
+    """
+    directory = os.path.abspath(directory)
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{os.path.basename(directory)}.", dir=parent)
+    try:
+        # mkdtemp creates it private; readers may run as another user
+        os.chmod(staging, 0o755)
+        manifest = _write_engine_snapshot(staging, item_fields)
+        _swap_into_place(staging, directory)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _swap_into_place(staging: str, directory: str) -> None:
+    """Rename ``staging`` to ``directory``, retiring a previous export."""
+    if not os.path.exists(directory):
+        os.rename(staging, directory)
+        return
+    # Processes that mapped the old arrays keep reading the unlinked files
+    retired = f"{staging}.old"
+    os.rename(directory, retired)
+    os.rename(staging, directory)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def _write_engine_snapshot(
+    directory: str, item_fields: Iterable[str]
+) -> Dict[str, Any]:
+    manifest: Dict[str, Any] = {
+        "format_version": ENGINE_SNAPSHOT_FORMAT,
+        "created_at": time.time(),
+        "types": {},
+    }
+    for item_field in item_fields:
+        snapshot = get_catalog_snapshot(item_field)
+        arrays = {name: getattr(snapshot, name) for name in _ARRAYS}
+        arrays.update({f"code_{f}": c for f, c in snapshot.codes.items()})
+        arrays["item_ids"] = snapshot.index.ids
+
+        os.makedirs(os.path.join(directory, item_field), exist_ok=True)
+        files = {}
+        for name, array in arrays.items():
+            relative = os.path.join(item_field, f"{name}.npy")
+            path = os.path.join(directory, relative)
+            np.save(path, array, allow_pickle=False)
+            files[name] = {
+                "file": relative,
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "sha256": _sha256(path),
+            }
+        manifest["types"][item_field] = {
+            "generation": snapshot.generation,
+            "rows": len(snapshot),
+            # Codes are positions in these lists
+            "vocab": {
+                f: sorted(values, key=values.get)
+                for f, values in snapshot.vocab.items()
+            },
+            "arrays": files,
+        }
+
+    with open(os.path.join(directory, MANIFEST_NAME), "w") as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
+
+
+def read_manifest(directory: str) -> Dict[str, Any]:
+    with open(os.path.join(directory, MANIFEST_NAME)) as handle:
+        manifest = json.load(handle)
+    version = manifest.get("format_version")
+    if version != ENGINE_SNAPSHOT_FORMAT:
+        raise ValueError(
+            f"Unsupported engine snapshot format {version} "
+            f"(expected {ENGINE_SNAPSHOT_FORMAT})"
+        )
+    return manifest
+
+
+def read_engine_snapshot(
+    directory: str, item_field: str, manifest: Optional[Dict[str, Any]] = None
+) -> CatalogSnapshot:
+    """The stored snapshot of ``item_field``, checksums verified."""
+    manifest = manifest or read_manifest(directory)
+    entry = manifest["types"].get(item_field)
+    if entry is None:
+        raise ValueError(f"No {item_field} snapshot in {directory}")
+
+    arrays = {}
+    for name, meta in entry["arrays"].items():
+        path = os.path.join(directory, meta["file"])
+        if _sha256(path) != meta["sha256"]:
+            raise ValueError(f"Checksum mismatch for {meta['file']}")
+        array = np.load(path, mmap_mode="r", allow_pickle=False)
+        if array.dtype.str != meta["dtype"] or list(array.shape) != meta["shape"]:
+            raise ValueError(f"Unexpected dtype or shape in {meta['file']}")
+        arrays[name] = array
+
+    snapshot = CatalogSnapshot(item_field, entry["generation"])
+    for name in _ARRAYS:
+        setattr(snapshot, name, arrays[name])
+    snapshot.codes = {f: arrays[f"code_{f}"] for f in entry["vocab"]}
+    snapshot.vocab = {
+        f: {value: code for code, value in enumerate(values)}
+        for f, values in entry["vocab"].items()
+    }
+    snapshot.index = ItemIndex(arrays["item_ids"])
+    return snapshot
+
+
+def matches_database(snapshot: CatalogSnapshot) -> bool:
+    """Whether the snapshot's item id map is the database's ``row_id`` column."""
+    pairs = (
+        item_model_of(snapshot.item_field)
+        .objects.filter(row_id__isnull=False)
+        .values_list("row_id", "pk")
+    )
+    return np.array_equal(ItemIndex.from_pairs(pairs).ids, snapshot.index.ids)
+
+
+def adopt_generation(snapshot: CatalogSnapshot) -> bool:
+    """
+    Make the snapshot's generation the cache's catalog generation if the
+    cache has none yet.  ``False`` if the cache is on another generation.
+    """
+    cache.add(f"catalog_version:{snapshot.item_field}", snapshot.generation, None)
+    return catalog_version(snapshot.item_field) == snapshot.generation
+
+
+def install_engine_snapshot(snapshot: CatalogSnapshot) -> None:
+    """Serve the snapshot and its item id map in this process."""
+    install_item_index(snapshot.item_field, snapshot.generation, snapshot.index)
+    install_catalog_snapshot(snapshot)
+
+
+def warm_start(item_field: str) -> bool:
+    """
+    Install the ``ENGINE_SNAPSHOT_DIR`` snapshot of ``item_field`` if it is
+    of the current catalog generation.  An unreadable or corrupted snapshot
+    is logged and skipped, leaving the caller to build from the database.
+    """
+    directory = getattr(settings, "ENGINE_SNAPSHOT_DIR", "")
+    if not directory or not os.path.exists(os.path.join(directory, MANIFEST_NAME)):
+        return False
+    try:
+        manifest = read_manifest(directory)
+        entry = manifest["types"].get(item_field)
+        if entry is None or entry["generation"] != catalog_version(item_field):
+            return False
+        snapshot = read_engine_snapshot(directory, item_field, manifest)
+    except (KeyError, OSError, ValueError):
+        logger.exception(
+            "Unusable %s engine snapshot in %s; building from the database",
+            item_field,
+            directory,
+        )
+        return False
+    install_engine_snapshot(snapshot)
+    return True
@@ -0,0 +1,185 @@
+"""
+Explore Page Snapshots
+======================
+
+The explore pages render from a snapshot of plain item rows per section
+(recently added, most liked, and the top genres by catalog size), stored in
+the cache under the current catalog generation.  A catalog edit starts a
+new generation, so the next render (or ``refresh_explore_snapshots`` run
+from a scheduler) builds a fresh snapshot with a fixed handful of queries.
+
+Ratings do not move the generation but do reorder the genre and "most
+liked" carousels.  Each snapshot therefore carries a build ``stamp``, kept
+for ``EXPLORE_MAX_AGE``: once it expires the next render rebuilds, and
+every refresh replaces it right away.
+
+Templates wrap the sections in ``{% cache %}`` fragments keyed on the
+generation and the stamp and pass the snapshot lazily, so a steady-state
+render reads one cached fragment and makes no database queries.  The
+explore pages' ETags carry the stamp too (``explore_stamp``).
+"""
+
+import time
+from typing import Any, Dict, List
+
+from django.core.cache import cache
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from django.utils.functional import SimpleLazyObject
+
+from .catalog import catalog_cache_key, catalog_version
+from .item_index import item_model_of
+
+# Items per carousel and number of genre carousels
+EXPLORE_SECTION_SIZE = 10
+EXPLORE_GENRES = 10
+
+# Snapshots are retired by generation; the TTL only bounds how long an
+# orphaned generation stays in the cache
+EXPLORE_SNAPSHOT_TTL = 60 * 60 * 24
+
+# Longest a snapshot (and its fragments) serves rating-driven orderings
+EXPLORE_MAX_AGE = 60 * 15
+
+# Columns copied into the snapshot rows (cover URLs are added separately)
+EXPLORE_FIELDS = {
+    "book": ("id", "title", "author", "cover_image"),
+    "tvmedia": (
+        "id",
+        "original_title",
+        "primary_title",
+        "startyear",
+        "length",
+        "over18",
+        "cover_image",
+    ),
+}
+
+# (recently added, most liked) orderings per item type
+EXPLORE_ORDERINGS = {
+    "book": ("-pk", "-likedPercent"),
+    "tvmedia": ("-startyear", "-high_rating_count"),
+}
+
+
+def _rows(item_model: Any, item_field: str, queryset) -> List[Dict[str, Any]]:
+    storage = item_model._meta.get_field("cover_image").storage
+    rows = []
+    for row in queryset.values(*EXPLORE_FIELDS[item_field]):
+        cover = row.pop("cover_image")
+        row["id"] = str(row["id"])
+        row["cover_url"] = storage.url(cover) if cover else ""
+        rows.append(row)
+    return rows
+
+
+def build_explore_snapshot(item_field: str) -> Dict[str, Any]:
+    """
+    ``{"recent": [row, ...], "most_liked": [...], "genres": [{"name",
+    "rows"}, ...]}`` straight from the database.
+    """
+    item_model = item_model_of(item_field)
+    genre_model = item_model.genre.field.related_model
+    related_name = item_model.genre.field.related_query_name()
+    recent_order, liked_order = EXPLORE_ORDERINGS[item_field]
+    size = EXPLORE_SECTION_SIZE
+
+    genres = list(
+        genre_model.objects.annotate(n_items=Count(related_name))
+        .order_by("-n_items", "pk")
+        .values_list("pk", "name")[:EXPLORE_GENRES]
+    )
+
+    # The most popular items of every top genre in one windowed query
+    column = f"{item_field}_id"
+    ranked = (
+        item_model.genre.through.objects.filter(genre_id__in=[g for g, _ in genres])
+        .annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=[F("genre_id")],
+                order_by=[F(f"{item_field}__rating_count").desc(), F(column).asc()],
+            )
+        )
+        .filter(rank__lte=size)
+        .order_by("genre_id", "rank")
+        .values_list("genre_id", column)
+    )
+    genre_pks: Dict[Any, List[Any]] = {g: [] for g, _ in genres}
+    for genre_id, pk in ranked:
+        genre_pks[genre_id].append(pk)
+    rows_by_id = {
+        row["id"]: row
+        for row in _rows(
+            item_model,
+            item_field,
+            item_model.objects.filter(
+                pk__in={pk for pks in genre_pks.values() for pk in pks}
+            ),
+        )
+    }
+
+    return {
+        "recent": _rows(
+            item_model, item_field, item_model.objects.order_by(recent_order)[:size]
+        ),
+        "most_liked": _rows(
+            item_model, item_field, item_model.objects.order_by(liked_order)[:size]
+        ),
+        "genres": [
+            {
+                "name": name,
+                "rows": [
+                    rows_by_id[str(pk)]
+                    for pk in genre_pks[genre_id]
+                    if str(pk) in rows_by_id
+                ],
+            }
+            for genre_id, name in genres
+        ],
+    }
+
+
+def _stamp_key(item_field: str) -> str:
+    return catalog_cache_key(f"explore_stamp_{item_field}", item_field)
+
+
+def refresh_explore_snapshot(item_field: str) -> Dict[str, Any]:
+    """Build and store the snapshot of the current generation, newly stamped."""
+    # Keys first: an edit during the build must not label it as newer
+    key = catalog_cache_key("explore_snapshot", item_field)
+    stamp_key = _stamp_key(item_field)
+    snapshot = build_explore_snapshot(item_field)
+    snapshot["stamp"] = time.time_ns()
+    cache.set(key, snapshot, EXPLORE_SNAPSHOT_TTL)
+    cache.set(stamp_key, snapshot["stamp"], EXPLORE_MAX_AGE)
+    return snapshot
+
+
+def explore_stamp(item_field: str) -> int:
+    """Build stamp (ns) of the live snapshot, rebuilding an expired one."""
+    stamp = cache.get(_stamp_key(item_field))
+    if stamp is None:
+        stamp = refresh_explore_snapshot(item_field)["stamp"]
+    return stamp
+
+
+def get_explore_snapshot(item_field: str) -> Dict[str, Any]:
+    snapshot = cache.get(catalog_cache_key("explore_snapshot", item_field))
+    if snapshot is None:
+        snapshot = refresh_explore_snapshot(item_field)
+    return snapshot
+
+
+def explore_context(item_field: str) -> Dict[str, Any]:
+    """
+    Template context for an explore page: the fragment cache ``generation``
+    and ``stamp``, and a lazy ``snapshot`` that is only loaded when the
+    fragment misses.
+    """
+    return {
+        "generation": catalog_version(item_field),
+        "stamp": explore_stamp(item_field),
+        "fragment_ttl": EXPLORE_MAX_AGE,
+        "snapshot": SimpleLazyObject(lambda: get_explore_snapshot(item_field)),
+    }
@@ -0,0 +1,136 @@
+"""
+Fast List Serializers
+=====================
+
+Read-only stand-ins for ``BookSerializer(items, many=True).data`` and
+``TvMediaSerializer(items, many=True).data`` on list and recommendation
+responses.  They render the same JSON (same keys, order and value types)
+from plain ``values_list`` tuples or already-loaded instances, with every
+item's genre names coming from one query against the M2M through table,
+skipping DRF's per-field, per-object machinery.
+
+Usage mirrors the DRF call they replace::
+
+    FastBookListSerializer(queryset_or_items).data
+    FastBookListSerializer(items, fields=["id", "title"]).data  # subset
+"""
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+from django.db.models import Model, QuerySet
+
+from Books.models import Book
+from moviesNshows.models import TvMedia
+
+
+def _str(value: Any) -> Any:
+    return None if value is None else str(value)
+
+
+def _int(value: Any) -> Any:
+    return None if value is None else int(value)
+
+
+class FastItemListSerializer:
+    """
+    Base class; subclasses declare ``model`` and ``fields`` as
+    ``(name, converter)`` pairs in the DRF serializer's field order, with
+    ``"genre"`` standing for the genre name list.
+    """
+
+    model: Type[Model]
+    fields: Sequence[Tuple[str, Callable[[Any], Any]]] = ()
+
+    def __init__(
+        self,
+        instance: Iterable[Any],
+        many: bool = True,
+        fields: Optional[Sequence[str]] = None,
+    ):
+        self.instance = instance
+        # Optional subset of field names (declaration order is kept)
+        self.selected = [
+            (name, convert)
+            for name, convert in self.fields
+            if fields is None or name in fields
+        ]
+
+    @classmethod
+    def _genre_map(cls, pks: List[Any]) -> Dict[Any, List[str]]:
+        column = f"{cls.model._meta.model_name}_id"
+        genres: Dict[Any, List[str]] = {pk: [] for pk in pks}
+        rows = (
+            cls.model.genre.through.objects.filter(**{f"{column}__in": pks})
+            .order_by("pk")
+            .values_list(column, "genre__name")
+        )
+        for pk, name in rows:
+            genres[pk].append(name)
+        return genres
+
+    def _render(self, rows: List[Tuple[Any, ...]]) -> List[Dict[str, Any]]:
+        # rows are (pk, *non-genre selected values)
+        with_genres = any(name == "genre" for name, _ in self.selected)
+        genre_map = self._genre_map([row[0] for row in rows]) if with_genres else {}
+        data = []
+        for row in rows:
+            values = iter(row[1:])
+            entry = {}
+            for name, convert in self.selected:
+                if name == "genre":
+                    entry[name] = genre_map.get(row[0], [])
+                else:
+                    entry[name] = convert(next(values))
+            data.append(entry)
+        return data
+
+    @property
+    def data(self) -> List[Dict[str, Any]]:
+        columns = ["pk"] + [name for name, _ in self.selected if name != "genre"]
+        if isinstance(self.instance, QuerySet):
+            rows = list(self.instance.values_list(*columns))
+        else:
+            rows = [
+                tuple(getattr(item, name) for name in columns) for item in self.instance
+            ]
+        return self._render(rows)
+
+
+class FastBookListSerializer(FastItemListSerializer):
+    model = Book
+    fields = (
+        ("id", _str),
+        ("title", _str),
+        ("author", _str),
+        ("genre", None),
+        ("isbn", _str),
+        ("description", _str),
+        ("language", _str),
+        ("edition", _str),
+        ("pages", _int),
+        ("likedPercent", _int),
+    )
+
+
+class FastTvMediaListSerializer(FastItemListSerializer):
+    model = TvMedia
+    fields = (
+        ("id", _str),
+        ("media_type", _str),
+        ("original_title", _str),
+        ("primary_title", _str),
+        ("over18", _int),
+        ("startyear", _int),
+        ("length", _int),
+        ("genre", None),
+    )
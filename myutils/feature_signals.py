@@ -13,15 +13,27 @@ Signals:
     3. Language Pref    — Books: user's preferred language
     4. Recency          — TvMedia: startyear
     5. Media Type Match — TvMedia: movie vs show preference
+
+``compute_signal_bonus`` scores one item with a few queries per call.  To
+score many candidates, ``load_user_signal_targets`` reads the user's
+inputs once and ``snapshot_signal_bonuses`` applies every signal to an
+array of catalog snapshot rows (see ``myutils.catalog_snapshot``).
 """
 
-from collections import Counter
-from typing import Any, Dict, Optional, Type
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple, Type
 
+import numpy as np
 from django.db.models import Avg, Count, Model
 
 MAX_SIGNAL_BONUS = 30.0
 
+# Item attributes the user-dependent signals read, per item type
+USER_SIGNAL_FIELDS = {
+    "book": ("author", "language"),
+    "tvmedia": ("media_type",),
+}
+
 # Default weights per signal
 DEFAULT_WEIGHTS: Dict[str, float] = {
     "popularity": 10.0,
@@ -222,3 +234,83 @@ def compute_signal_bonus(
         ) * w.get("media_type_match", 0)
 
     return min(bonus, max_bonus)
+
+
+def user_signal_targets(
+    item_field: str, ratings: List[Tuple[Any, int, Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """
+    Per-user inputs of the user-dependent signals, from the user's
+    ``(item_pk, rating, attributes)`` rows (attributes per
+    ``USER_SIGNAL_FIELDS``).
+    """
+    high = [attrs for _, rating, attrs in ratings if rating >= 7]
+    if item_field == "tvmedia":
+        types = Counter(a["media_type"] for a in high)
+        top = types.most_common(1)[0][0] if types else None
+        return {"media_type": top.lower() if top else None}
+
+    by_author: Dict[str, List[int]] = defaultdict(list)
+    for _, rating, attrs in ratings:
+        if attrs["author"]:
+            by_author[attrs["author"]].append(rating)
+    languages = Counter(a["language"] for a in high)
+    top = languages.most_common(1)[0][0] if languages else None
+    return {
+        "authors": [
+            author
+            for author, values in by_author.items()
+            if len(values) >= 2 and sum(values) / len(values) >= 7.0
+        ],
+        "language": top.lower() if top else None,
+    }
+
+
+def load_user_signal_targets(
+    user: Any, interaction_model: Type[Model], item_field: str
+) -> Dict[str, Any]:
+    """``user_signal_targets`` from one query over the user's ratings."""
+    fields = USER_SIGNAL_FIELDS[item_field]
+    rows = interaction_model.objects.filter(user=user).values_list(
+        f"{item_field}_id", "rating", *[f"{item_field}__{f}" for f in fields]
+    )
+    return user_signal_targets(
+        item_field,
+        [(pk, rating, dict(zip(fields, values))) for pk, rating, *values in rows],
+    )
+
+
+def snapshot_signal_bonuses(
+    snapshot: Any,
+    rows: np.ndarray,
+    targets: Optional[Dict[str, Any]] = None,
+    weights: Optional[Dict[str, float]] = None,
+    max_bonus: float = MAX_SIGNAL_BONUS,
+) -> np.ndarray:
+    """
+    ``compute_signal_bonus`` for every snapshot row in ``rows``.  Without
+    ``targets`` (anonymous scoring) only the static signals apply.
+    """
+    w = weights or DEFAULT_WEIGHTS
+    bonus = snapshot.popularity[rows] * w.get("popularity", 0)
+    bonus = bonus + snapshot.recency[rows] * w.get("recency", 0)
+
+    if targets is not None:
+        codes, vocab = snapshot.codes, snapshot.vocab
+        if snapshot.item_field == "book":
+            authors = [
+                vocab["author"][a] for a in targets["authors"] if a in vocab["author"]
+            ]
+            bonus = bonus + np.isin(codes["author"][rows], authors) * w.get(
+                "author_affinity", 0
+            )
+            language = vocab["language"].get(targets["language"], -2)
+            bonus = bonus + (codes["language"][rows] == language) * w.get(
+                "language_preference", 0
+            )
+        else:
+            media_type = vocab["media_type"].get(targets["media_type"], -2)
+            bonus = bonus + (codes["media_type"][rows] == media_type) * w.get(
+                "media_type_match", 0
+            )
+    return np.minimum(bonus, max_bonus)
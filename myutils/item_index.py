@@ -0,0 +1,227 @@
+"""
+Item Row Ids
+============
+
+Every ``Book`` and ``TvMedia`` carries a persisted ``row_id``: a dense
+int32 handed out on creation from a per-type sequence (``ItemRowSequence``)
+and never reused.  Arrays indexed by row id therefore stay valid across
+catalog edits; a deleted item only leaves a hole.  Items inserted with
+``bulk_create`` skip ``save()`` and get theirs from ``assign_row_ids`` (the
+``assign_row_ids`` management command).
+
+Items without a row id are invisible to the recommendation engines: they
+are never candidates, and rating one does not mask it out.  ``item_index``
+logs a warning while any remain.
+
+``item_index`` maps row ids and pks both ways.  It is built per process
+from one query and rebuilt when the catalog generation moves on (item
+creation and deletion bump it, see ``myutils.catalog``).  The map is kept
+in NumPy arrays (16 bytes per row id plus a sorted copy for pk lookups)
+rather than a list and a dict of ``UUID`` objects: no Python object per
+item, so reference counting in a forked worker never copies its pages.
+"""
+
+import logging
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max
+
+from .catalog import catalog_version, invalidate_catalog_caches
+
+logger = logging.getLogger(__name__)
+
+ROW_ID_DTYPE = np.int32
+
+# Item pks are UUIDs, held as their 16 bytes; all-zero rows are holes
+PK_BYTES = 16
+# Two big-endian words order the same as the bytes they cover
+_KEY_DTYPE = np.dtype([("hi", ">u8"), ("lo", ">u8")])
+
+
+def item_model_of(item_field: str) -> Any:
+    """The item model of ``item_field`` ("book" or "tvmedia")."""
+    from Books.models import Book
+    from moviesNshows.models import TvMedia
+
+    if item_field == "book":
+        return Book
+    if item_field == "tvmedia":
+        return TvMedia
+    raise ValueError(f"Unknown item field: {item_field}")
+
+
+def rating_model_of(item_field: str) -> Any:
+    """The rating model of ``item_field`` ("book" or "tvmedia")."""
+    from users.models import UserBookRating, UserTvMediaRating
+
+    if item_field == "book":
+        return UserBookRating
+    if item_field == "tvmedia":
+        return UserTvMediaRating
+    raise ValueError(f"Unknown item field: {item_field}")
+
+
+def reserve_row_ids(item_field: str, count: int = 1) -> int:
+    """Reserve ``count`` consecutive row ids and return the first one."""
+    from .models import ItemRowSequence
+
+    with transaction.atomic():
+        sequence, created = ItemRowSequence.objects.select_for_update().get_or_create(
+            item_field=item_field
+        )
+        if created:
+            # Continue after any ids assigned before the sequence existed
+            top = item_model_of(item_field).objects.aggregate(top=Max("row_id"))["top"]
+            sequence.next_row = 0 if top is None else top + 1
+        start = sequence.next_row
+        sequence.next_row = start + count
+        sequence.save(update_fields=["next_row"])
+    return start
+
+
+def assign_row_ids(item_field: str, batch_size: int = 1000) -> int:
+    """
+    Give every item without a ``row_id`` one, in pk order.  Rated-item
+    bitmaps of their raters (built while the items had no row id) are
+    dropped.
+    """
+    from .rated_items import invalidate_rated_items_many
+
+    item_model = item_model_of(item_field)
+    assigned = 0
+    while True:
+        pks = list(
+            item_model.objects.filter(row_id__isnull=True)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            break
+        start = reserve_row_ids(item_field, len(pks))
+        item_model.objects.bulk_update(
+            [item_model(pk=pk, row_id=start + n) for n, pk in enumerate(pks)],
+            ["row_id"],
+        )
+        invalidate_rated_items_many(
+            item_field,
+            rating_model_of(item_field)
+            .objects.filter(**{f"{item_field}_id__in": pks})
+            .values_list("user_id", flat=True)
+            .distinct(),
+        )
+        assigned += len(pks)
+    if assigned:
+        invalidate_catalog_caches(item_field)
+    return assigned
+
+
+def pk_bytes(pks: Iterable[Any]) -> np.ndarray:
+    """``(n, 16)`` uint8 bytes of the UUID ``pks`` (zeros for non-UUIDs)."""
+
+    def raw(pk: Any) -> bytes:
+        if isinstance(pk, uuid.UUID):
+            return pk.bytes
+        try:
+            return uuid.UUID(str(pk)).bytes
+        except ValueError:
+            return bytes(PK_BYTES)
+
+    data = b"".join(raw(pk) for pk in pks)
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, PK_BYTES)
+
+
+def _keys(ids: np.ndarray) -> np.ndarray:
+    return np.ascontiguousarray(ids).view(_KEY_DTYPE).ravel()
+
+
+class ItemIndex:
+    """
+    Bidirectional ``row_id`` <-> pk mapping of an item type, held in arrays
+    rather than Python objects: ``ids[row]`` is the row's pk as 16 UUID
+    bytes (zeros for holes), and the rows sorted by those bytes answer
+    pk -> row id lookups with a binary search.
+    """
+
+    def __init__(self, ids: np.ndarray):
+        self.ids = ids
+        keys = _keys(ids)
+        rows = np.flatnonzero(ids.any(axis=1)).astype(ROW_ID_DTYPE)
+        order = np.argsort(keys[rows], kind="stable")
+        self.sorted_keys = keys[rows][order]
+        self.sorted_rows = rows[order]
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tuple[int, Any]]) -> "ItemIndex":
+        pairs = list(pairs)
+        size = max((row for row, _ in pairs), default=-1) + 1
+        ids = np.zeros((size, PK_BYTES), dtype=np.uint8)
+        if pairs:
+            rows = np.fromiter((row for row, _ in pairs), dtype=np.int64)
+            ids[rows] = pk_bytes(pk for _, pk in pairs)
+        return cls(ids)
+
+    def __len__(self) -> int:
+        """Row id span (the largest row id plus one)."""
+        return len(self.ids)
+
+    def rows(self, pks: Iterable[Any]) -> np.ndarray:
+        """Row ids of ``pks`` (``-1`` for items without one)."""
+        keys = _keys(pk_bytes(pks))
+        if not len(self.sorted_keys):
+            return np.full(len(keys), -1, dtype=ROW_ID_DTYPE)
+        found = np.searchsorted(self.sorted_keys, keys)
+        found = np.minimum(found, len(self.sorted_keys) - 1)
+        hit = self.sorted_keys[found] == keys
+        return np.where(hit, self.sorted_rows[found], -1).astype(ROW_ID_DTYPE)
+
+    def row(self, pk: Any) -> Optional[int]:
+        """Row id of ``pk``, ``None`` without one."""
+        row = int(self.rows([pk])[0])
+        return row if row >= 0 else None
+
+    def pks_of(self, rows: Sequence[int]) -> List[Optional[uuid.UUID]]:
+        """Pks of ``rows`` (``None`` for holes and out-of-range rows)."""
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        inside = (rows >= 0) & (rows < len(self.ids))
+        ids = np.zeros((len(rows), PK_BYTES), dtype=np.uint8)
+        ids[inside] = self.ids[rows[inside]]
+        present = ids.any(axis=1)
+        data = ids.tobytes()
+        return [
+            uuid.UUID(bytes=data[i * PK_BYTES : (i + 1) * PK_BYTES]) if p else None
+            for i, p in enumerate(present.tolist())
+        ]
+
+
+# item_field -> (catalog generation, index), per process
+_indexes: Dict[str, Tuple[int, ItemIndex]] = {}
+
+
+def install_item_index(item_field: str, generation: int, index: ItemIndex) -> None:
+    """Serve ``index`` in this process while ``generation`` is current."""
+    _indexes[item_field] = (generation, index)
+
+
+def item_index(item_field: str) -> ItemIndex:
+    """The row id index of the current catalog generation."""
+    version = catalog_version(item_field)
+    cached = _indexes.get(item_field)
+    if cached is None or cached[0] != version:
+        pairs = list(item_model_of(item_field).objects.values_list("row_id", "pk"))
+        missing = sum(1 for row, _ in pairs if row is None)
+        if missing:
+            logger.warning(
+                "%d %s items have no row_id and are skipped by the recommenders; "
+                "run `manage.py assign_row_ids`",
+                missing,
+                item_field,
+            )
+        cached = (
+            version,
+            ItemIndex.from_pairs(pair for pair in pairs if pair[0] is not None),
+        )
+        _indexes[item_field] = cached
+    return cached[1]
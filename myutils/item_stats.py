@@ -0,0 +1,123 @@
+"""
+Item Rating Statistics
+======================
+
+Maintains the denormalized ``rating_count``, ``rating_sum`` and
+``high_rating_count`` columns on ``Book`` and ``TvMedia`` so popularity
+ordering is an index scan instead of a join + GROUP BY over the rating table.
+
+The columns are kept in step by the rating write path (signals, the
+deferred rating queue and bulk imports).  ``recompute_item_stats`` rebuilds
+them from the rating tables and backs the ``reconcile_rating_stats`` command.
+Both report rating-count moves to the cold-start new-item pool.
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .cold_start import update_new_item_pool
+from .item_index import item_model_of, rating_model_of
+
+# Ratings at or above this value count as "high" (matches the CF seed filter)
+HIGH_RATING_THRESHOLD = 7
+
+
+def _is_high(rating: Optional[int]) -> int:
+    return int(rating is not None and rating >= HIGH_RATING_THRESHOLD)
+
+
+def apply_item_stats_changes(
+    item_field: str,
+    changes: Iterable[Tuple[Any, Optional[int], Optional[int]]],
+) -> None:
+    """
+    Shift item statistics by ``(item_id, old_rating, new_rating)`` changes.
+
+    ``None`` marks a created (old) or deleted (new) rating.  Changes for the
+    same item are combined into a single UPDATE.
+    """
+    item_model = item_model_of(item_field)
+    deltas: Dict[Any, Tuple[int, int, int]] = defaultdict(lambda: (0, 0, 0))
+    for item_id, old_rating, new_rating in changes:
+        count, total, high = deltas[item_id]
+        deltas[item_id] = (
+            count + (new_rating is not None) - (old_rating is not None),
+            total + (new_rating or 0) - (old_rating or 0),
+            high + _is_high(new_rating) - _is_high(old_rating),
+        )
+
+    with transaction.atomic():
+        for item_id, (count, total, high) in deltas.items():
+            if (count, total, high) == (0, 0, 0):
+                continue
+            item_model.objects.filter(pk=item_id).update(
+                rating_count=F("rating_count") + count,
+                rating_sum=F("rating_sum") + total,
+                high_rating_count=F("high_rating_count") + high,
+            )
+
+    count_deltas = {k: v[0] for k, v in deltas.items() if v[0]}
+    if count_deltas:
+        new_counts = item_model.objects.filter(pk__in=list(count_deltas)).values_list(
+            "pk", "rating_count"
+        )
+        update_new_item_pool(
+            item_model,
+            item_field,
+            {pk: (count - count_deltas[pk], count) for pk, count in new_counts},
+        )
+
+
+def recompute_item_stats(
+    item_field: str, item_ids: Optional[Iterable[Any]] = None
+) -> int:
+    """
+    Rebuild item statistics from the rating table.
+
+    Args:
+        item_field: "book" or "tvmedia".
+        item_ids: Restrict the rebuild to these items (default: whole catalog).
+
+    Returns:
+        Number of items whose stored statistics were wrong and got fixed.
+    """
+    item_model = item_model_of(item_field)
+    rating_model = rating_model_of(item_field)
+    column = f"{item_field}_id"
+
+    ratings = rating_model.objects.all()
+    items = item_model.objects.all()
+    if item_ids is not None:
+        item_ids = list(item_ids)
+        ratings = ratings.filter(**{f"{column}__in": item_ids})
+        items = items.filter(pk__in=item_ids)
+
+    actual = {
+        row[column]: (row["count"], row["total"], row["high"])
+        for row in ratings.values(column).annotate(
+            count=Count("pk"),
+            total=Sum("rating"),
+            high=Count("pk", filter=Q(rating__gte=HIGH_RATING_THRESHOLD)),
+        )
+    }
+
+    fixed = []
+    count_changes: Dict[Any, Tuple[int, int]] = {}
+    for item in items.only(
+        "pk", "rating_count", "rating_sum", "high_rating_count"
+    ).iterator(chunk_size=2000):
+        expected = actual.get(item.pk, (0, 0, 0))
+        stored = (item.rating_count, item.rating_sum, item.high_rating_count)
+        if stored != expected:
+            count_changes[item.pk] = (item.rating_count, expected[0])
+            item.rating_count, item.rating_sum, item.high_rating_count = expected
+            fixed.append(item)
+
+    item_model.objects.bulk_update(
+        fixed, ["rating_count", "rating_sum", "high_rating_count"], batch_size=1000
+    )
+    update_new_item_pool(item_model, item_field, count_changes)
+    return len(fixed)
@@ -0,0 +1,34 @@
+"""
+Management command to give every book and TV media item its dense
+``row_id``.
+
+Items saved through the ORM get one on creation; run this after loading
+items with ``bulk_create`` (or on a database from before row ids existed).
+
+Usage:
+    python manage.py assign_row_ids [--type book|tvmedia]
+"""
+
+from django.core.management.base import BaseCommand
+
+from myutils.item_index import assign_row_ids
+
+
+class Command(BaseCommand):
+    help = "Assign row ids to items that do not have one yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--type",
+            type=str,
+            choices=["book", "tvmedia"],
+            default=None,
+            help="Only assign row ids of one item type (default: both)",
+        )
+
+    def handle(self, *args, **options):
+        item_fields = [options["type"]] if options["type"] else ["book", "tvmedia"]
+        for item_field in item_fields:
+            assigned = assign_row_ids(item_field)
+            self.stdout.write(f"  {item_field}: {assigned} items assigned")
+        self.stdout.write(self.style.SUCCESS("Row ids assigned."))
@@ -0,0 +1,115 @@
+"""
+Management command to compare DRF's stdlib ``JSONRenderer`` against
+``FastJSONRenderer`` on the payloads the API actually returns: the catalog
+list, and public recommendations in both response versions, full and
+compact.
+
+Books are seeded inside a transaction that is rolled back afterwards.
+Payloads are built once; only rendering is timed.
+
+Usage:
+    python manage.py benchmark_renderers [--items 100] [--repeat 200]
+"""
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from Books.models import Book, Genre
+from Books.serializers import BookSerializer
+from myutils import renderers
+from myutils.fast_serializers import FastBookListSerializer
+from myutils.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = "Benchmark stdlib vs fast JSON rendering of API payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--items", type=int, default=100, help="Items per payload (default: 100)"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=200, help="Timed runs (default: 200)"
+        )
+
+    def _time(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def _payloads(self, books):
+        queryset = Book.objects.filter(pk__in=[b.pk for b in books]).order_by("pk")
+        full = FastBookListSerializer(queryset).data
+        compact = FastBookListSerializer(queryset, fields=["id", "title"]).data
+        scores = [round(100 - i * 0.37, 1) for i in range(len(full))]
+
+        def v1(items):
+            data = {
+                str(i): {"relativity": s, "book": e}
+                for i, (s, e) in enumerate(zip(scores, items))
+            }
+            return {"length": len(data), "data": data}
+
+        def v2(items):
+            data = [{"relativity": s, "book": e} for s, e in zip(scores, items)]
+            return {"version": 2, "length": len(data), "data": data}
+
+        return {
+            "list (DRF ReturnList)": {"data": BookSerializer(queryset, many=True).data},
+            "list (fast)": {"data": full},
+            "recommend v1": v1(full),
+            "recommend v2": v2(full),
+            "recommend v2 compact": v2(compact),
+        }
+
+    def handle(self, *args, **options):
+        items, repeat = options["items"], options["repeat"]
+        if renderers.orjson is None:
+            self.stdout.write(
+                self.style.WARNING("  orjson is not installed; timing the fallback.")
+            )
+
+        with transaction.atomic():
+            genres = [Genre.objects.create(name=f"bench-genre-{i}") for i in range(8)]
+            books = Book.objects.bulk_create(
+                Book(
+                    title=f"Benchmark book {i}",
+                    author="Bench Author",
+                    isbn=f"bench-render-{i}",
+                    description="Lorem ipsum dolor sit amet. " * 20,
+                    language="English",
+                    pages=300,
+                    likedPercent=i % 101,
+                )
+                for i in range(items)
+            )
+            Book.genre.through.objects.bulk_create(
+                Book.genre.through(book_id=book.pk, genre_id=genres[j].pk)
+                for i, book in enumerate(books)
+                for j in {i % 8, (i * 3) % 8}
+            )
+            payloads = self._payloads(books)
+            transaction.set_rollback(True)
+
+        stdlib, fast = JSONRenderer(), FastJSONRenderer()
+        self.stdout.write(
+            f"  {'payload':<24}{'KiB':>8}{'stdlib ms':>11}{'fast ms':>9}{'speedup':>9}"
+        )
+        for name, payload in payloads.items():
+            rendered = fast.render(payload)
+            if rendered != stdlib.render(payload):
+                self.stdout.write(self.style.ERROR(f"  {name}: output mismatch!"))
+            slow_ms = self._time(lambda payload=payload: stdlib.render(payload), repeat)
+            fast_ms = self._time(lambda payload=payload: fast.render(payload), repeat)
+            self.stdout.write(
+                f"  {name:<24}{len(rendered) / 1024:>8.1f}{slow_ms:>11.3f}"
+                f"{fast_ms:>9.3f}{slow_ms / fast_ms:>8.1f}x"
+            )
+        self.stdout.write(self.style.SUCCESS("Benchmark complete (data rolled back)."))
@@ -0,0 +1,99 @@
+"""
+Management command to measure catalog substring search latency.
+
+Seeds a synthetic book catalog inside a transaction, times plain
+``icontains`` filtering against ``search_catalog`` for a set of queries, and
+rolls everything back.  On PostgreSQL run ``migrate`` first so the trigram
+indexes exist.
+
+Usage:
+    python manage.py benchmark_search [--rows 1000000] [--repeat 5]
+"""
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from Books.models import Book
+from myutils.catalog import invalidate_catalog_caches
+from myutils.search import search_catalog
+
+WORDS = (
+    "shadow river crown glass winter ember silent garden iron hollow "
+    "storm paper lantern forest ocean mirror stone golden broken night"
+).split()
+QUERIES = ["river", "ember sil", "lantern", "olde", "zzq"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark substring search on a seeded (rolled back) catalog"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=1_000_000, help="Books to seed (default: 1M)"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Timed runs per query (default: 5)"
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Random seed")
+
+    def _time(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        # Seeded, non-cryptographic: it only generates synthetic titles
+        rng = random.Random(options["seed"])  # noqa: S311
+        rows, repeat = options["rows"], options["repeat"]
+
+        with transaction.atomic():
+            self.stdout.write(f"  Seeding {rows} books...")
+            start = time.perf_counter()
+            for offset in range(0, rows, 10_000):
+                Book.objects.bulk_create(
+                    Book(
+                        title=" ".join(rng.choices(WORDS, k=4)),
+                        author=" ".join(rng.choices(WORDS, k=2)).title(),
+                        isbn=f"bench-{i}",
+                        description="",
+                        language="English",
+                        pages=100,
+                        likedPercent=rng.randint(0, 100),
+                    )
+                    for i in range(offset, min(offset + 10_000, rows))
+                )
+            self.stdout.write(f"  Seeded in {time.perf_counter() - start:.1f}s")
+            invalidate_catalog_caches("book")
+
+            # The first search builds the in-process index on non-Postgres DBs
+            warmup = self._time(lambda: search_catalog(Book, QUERIES[0]), 1)
+            self.stdout.write(f"  First search (incl. index build): {warmup:.1f} ms\n")
+
+            self.stdout.write(f"  {'query':<12}{'icontains ms':>14}{'search ms':>12}")
+            for query in QUERIES:
+                baseline = self._time(
+                    lambda query=query: list(
+                        Book.objects.filter(
+                            Q(title__icontains=query) | Q(author__icontains=query)
+                        ).values_list("pk", flat=True)
+                    ),
+                    repeat,
+                )
+                searched = self._time(
+                    lambda query=query: search_catalog(Book, query), repeat
+                )
+                self.stdout.write(f"  {query:<12}{baseline:>14.1f}{searched:>12.1f}")
+
+            transaction.set_rollback(True)
+        invalidate_catalog_caches("book")
+        self.stdout.write(
+            self.style.SUCCESS("Benchmark complete (catalog rolled back).")
+        )
@@ -0,0 +1,99 @@
+"""
+Management command to compare list serialization throughput of
+``BookSerializer(many=True)`` against ``FastBookListSerializer``.
+
+Books are seeded inside a transaction that is rolled back afterwards.  Both
+paths are timed from an unevaluated queryset, so query time is included.
+
+Usage:
+    python manage.py benchmark_serializers [--sizes 100 1000] [--repeat 20]
+"""
+
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from Books.models import Book, Genre
+from Books.serializers import BookSerializer
+from myutils.fast_serializers import FastBookListSerializer
+
+
+class Command(BaseCommand):
+    help = "Benchmark DRF vs fast list serializers for books"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[100, 1000],
+            help="Payload sizes to time (default: 100 1000)",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Timed runs per size (default: 20)"
+        )
+
+    def _time(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        sizes, repeat = sorted(options["sizes"]), options["repeat"]
+
+        with transaction.atomic():
+            genres = [Genre.objects.create(name=f"bench-genre-{i}") for i in range(8)]
+            books = Book.objects.bulk_create(
+                Book(
+                    title=f"Benchmark book {i}",
+                    author="Bench Author",
+                    isbn=f"bench-ser-{i}",
+                    description="Lorem ipsum dolor sit amet. " * 20,
+                    language="English",
+                    pages=300,
+                    likedPercent=i % 101,
+                )
+                for i in range(sizes[-1])
+            )
+            Book.genre.through.objects.bulk_create(
+                Book.genre.through(book_id=book.pk, genre_id=genres[j].pk)
+                for i, book in enumerate(books)
+                for j in {i % 8, (i * 3) % 8}
+            )
+
+            self.stdout.write(
+                f"  {'items':>6}{'drf ms':>10}{'fast ms':>10}{'speedup':>10}"
+            )
+            for size in sizes:
+                ids = [book.pk for book in books[:size]]
+
+                def queryset(ids=ids):
+                    return Book.objects.filter(pk__in=ids).order_by("pk")
+
+                slow_data = BookSerializer(queryset(), many=True).data
+                fast_data = FastBookListSerializer(queryset()).data
+                if json.dumps(slow_data) != json.dumps(fast_data):
+                    self.stdout.write(self.style.ERROR("  Output mismatch!"))
+
+                slow = self._time(
+                    lambda queryset=queryset: BookSerializer(
+                        queryset(), many=True
+                    ).data,
+                    repeat,
+                )
+                fast = self._time(
+                    lambda queryset=queryset: FastBookListSerializer(queryset()).data,
+                    repeat,
+                )
+                self.stdout.write(
+                    f"  {size:>6}{slow:>10.1f}{fast:>10.1f}{slow / fast:>9.1f}x"
+                )
+
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Benchmark complete (data rolled back)."))
@@ -12,6 +12,7 @@ from django.core.management.base import BaseCommand
 from Books.models import Book
 from moviesNshows.models import TvMedia
 from myutils.evaluation import evaluate_recommendations, train_test_split
+from myutils.rated_items import RatedItems
 from myutils.recommendation import get_hybrid_recommendation
 from users.models import (
     CustomUser,
@@ -170,7 +171,9 @@ class Command(BaseCommand):
 
             try:
                 # Exclude only train items so that test items remain recommendable
-                already_rated = train_items_by_user.get(user_id, set())
+                already_rated = RatedItems.from_pks(
+                    item_field, train_items_by_user.get(user_id, ())
+                )
 
                 if mode == "content":
                     from myutils.content_based_filtering import (
@@ -191,20 +194,15 @@ class Command(BaseCommand):
                         already_rated=already_rated,
                     )
                 elif mode == "popularity":
-                    from django.db.models import Count
-
-                    rating_lookup = (
-                        "userbookrating"
-                        if item_field == "book"
-                        else "usertvmediarating"
-                    )
                     # Simple popularity baseline: most rated items in the whole catalog
-                    pop_items = (
-                        item_model.objects.exclude(pk__in=already_rated)
-                        .annotate(num_ratings=Count(rating_lookup))
-                        .order_by("-num_ratings")[: k * 10]
-                    )
-                    recs = [(0.0, item) for item in pop_items]
+                    pop_items = item_model.objects.order_by("-rating_count")[
+                        : k * 10 + len(already_rated)
+                    ]
+                    recs = [
+                        (0.0, item)
+                        for item in pop_items
+                        if item.pk not in already_rated
+                    ][: k * 10]
                 else:
                     recs = get_hybrid_recommendation(
                         user=user,
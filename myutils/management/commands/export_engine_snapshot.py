@@ -0,0 +1,36 @@
+"""
+Management command to export the engines' catalog snapshots to a
+directory (``.npy`` arrays and a JSON manifest, see
+``myutils.engine_snapshot``).
+
+Usage:
+    python manage.py export_engine_snapshot DIR [--type book|tvmedia]
+"""
+
+from django.core.management.base import BaseCommand
+
+from myutils.engine_snapshot import export_engine_snapshot
+
+
+class Command(BaseCommand):
+    help = "Export the catalog snapshots to a versioned snapshot directory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", type=str, help="Output directory")
+        parser.add_argument(
+            "--type",
+            type=str,
+            choices=["book", "tvmedia"],
+            default=None,
+            help="Only export one item type (default: both)",
+        )
+
+    def handle(self, *args, **options):
+        item_fields = [options["type"]] if options["type"] else ["book", "tvmedia"]
+        manifest = export_engine_snapshot(options["directory"], item_fields)
+        for item_field, entry in manifest["types"].items():
+            self.stdout.write(
+                f"  {item_field}: {entry['rows']} rows, "
+                f"generation {entry['generation']}"
+            )
+        self.stdout.write(self.style.SUCCESS("Engine snapshot exported."))
@@ -0,0 +1,82 @@
+"""
+Management command to import a user's rating history from a CSV file.
+
+The CSV needs an item id column (``book``, ``tvmedia`` or ``id``) and a
+``rating`` column (1-10).
+
+Usage:
+    python manage.py import_ratings ratings.csv --user someone@example.com --type book
+"""
+
+import csv
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myutils.bulk_ratings import MAX_BULK_RATINGS, bulk_upsert_ratings
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Bulk import ratings for one user from a CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=str, help="Path to the CSV file")
+        parser.add_argument(
+            "--user", type=str, required=True, help="Email of the rating user"
+        )
+        parser.add_argument(
+            "--type",
+            type=str,
+            choices=["book", "tvmedia"],
+            default="book",
+            help="Item type being rated (default: book)",
+        )
+
+    def handle(self, *args, **options):
+        item_field = options["type"]
+        try:
+            user = CustomUser.objects.get(email=options["user"])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        pairs = []
+        with open(options["path"], newline="", encoding="utf-8") as fh:
+            reader = csv.DictReader(fh)
+            id_column = next(
+                (c for c in (item_field, "id") if c in (reader.fieldnames or [])),
+                None,
+            )
+            if id_column is None or "rating" not in reader.fieldnames:
+                raise CommandError(
+                    f"CSV needs '{item_field}' (or 'id') and 'rating' columns"
+                )
+            for line_no, row in enumerate(reader, start=2):
+                try:
+                    pairs.append((uuid.UUID(row[id_column]), int(row["rating"])))
+                except (ValueError, TypeError):
+                    raise CommandError(f"Invalid row at line {line_no}: {row}")
+
+        if not pairs:
+            self.stdout.write(self.style.WARNING("No ratings found."))
+            return
+
+        totals = {"created": 0, "updated": 0, "not_found": []}
+        for start in range(0, len(pairs), MAX_BULK_RATINGS):
+            try:
+                result = bulk_upsert_ratings(
+                    user, item_field, pairs[start : start + MAX_BULK_RATINGS]
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+            totals["created"] += result["created"]
+            totals["updated"] += result["updated"]
+            totals["not_found"] += result["not_found"]
+
+        self.stdout.write(f"  Created: {totals['created']}")
+        self.stdout.write(f"  Updated: {totals['updated']}")
+        if totals["not_found"]:
+            self.stdout.write(
+                self.style.WARNING(f"  Unknown items: {len(totals['not_found'])}")
+            )
+        self.stdout.write(self.style.SUCCESS("Import complete."))
@@ -0,0 +1,64 @@
+"""
+Management command to load an exported engine snapshot on a new node.
+
+Verifies the snapshot's checksums and its item id map against the
+database, then adopts its catalog generation in the shared cache, so
+processes preloading from ``ENGINE_SNAPSHOT_DIR`` serve it without
+rebuilding.  Fails when the cache is already on another generation.
+
+Usage:
+    python manage.py load_engine_snapshot DIR [--type book|tvmedia]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myutils.catalog import catalog_version
+from myutils.engine_snapshot import (
+    adopt_generation,
+    matches_database,
+    read_engine_snapshot,
+    read_manifest,
+)
+
+
+class Command(BaseCommand):
+    help = "Verify an engine snapshot and adopt its catalog generation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", type=str, help="Snapshot directory")
+        parser.add_argument(
+            "--type",
+            type=str,
+            choices=["book", "tvmedia"],
+            default=None,
+            help="Only load one item type (default: every type in the snapshot)",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["directory"]
+        try:
+            manifest = read_manifest(directory)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        item_fields = [options["type"]] if options["type"] else list(manifest["types"])
+
+        for item_field in item_fields:
+            try:
+                snapshot = read_engine_snapshot(directory, item_field, manifest)
+            except (OSError, ValueError) as exc:
+                raise CommandError(str(exc))
+            if not matches_database(snapshot):
+                raise CommandError(
+                    f"{item_field}: the snapshot's items do not match the database"
+                )
+            if not adopt_generation(snapshot):
+                raise CommandError(
+                    f"{item_field}: the catalog is on generation "
+                    f"{catalog_version(item_field)}, the snapshot on "
+                    f"{snapshot.generation}; export a new snapshot"
+                )
+            self.stdout.write(
+                f"  {item_field}: {len(snapshot)} rows, "
+                f"generation {snapshot.generation}"
+            )
+        self.stdout.write(self.style.SUCCESS("Engine snapshot loaded."))
@@ -0,0 +1,50 @@
+"""
+Management command to drain the deferred rating work queue.
+
+Usage:
+    python manage.py process_rating_events [--batch-size 500] [--loop] [--interval 2]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from myutils.rating_queue import process_pending_events
+
+
+class Command(BaseCommand):
+    help = "Process queued rating events (preference updates and cache invalidation)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Maximum events claimed per transaction (default: 500)",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new events instead of exiting when empty",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep between polls when the queue is empty (default: 2)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        total = 0
+        while True:
+            processed = process_pending_events(batch_size=batch_size)
+            total += processed
+            if processed:
+                self.stdout.write(f"  Processed {processed} events")
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Done. {total} events processed."))
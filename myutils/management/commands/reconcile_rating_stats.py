@@ -0,0 +1,31 @@
+"""
+Management command to rebuild the denormalized item rating statistics
+(``rating_count``, ``rating_sum``, ``high_rating_count``) from the rating tables.
+
+Usage:
+    python manage.py reconcile_rating_stats [--type book|tvmedia]
+"""
+
+from django.core.management.base import BaseCommand
+
+from myutils.item_stats import recompute_item_stats
+
+
+class Command(BaseCommand):
+    help = "Reconcile denormalized per-item rating statistics with the rating tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--type",
+            type=str,
+            choices=["book", "tvmedia"],
+            default=None,
+            help="Only reconcile one item type (default: both)",
+        )
+
+    def handle(self, *args, **options):
+        item_fields = [options["type"]] if options["type"] else ["book", "tvmedia"]
+        for item_field in item_fields:
+            fixed = recompute_item_stats(item_field)
+            self.stdout.write(f"  {item_field}: {fixed} items corrected")
+        self.stdout.write(self.style.SUCCESS("Reconciliation complete."))
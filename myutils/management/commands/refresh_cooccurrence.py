@@ -0,0 +1,43 @@
+"""
+Management command to maintain the materialized item co-occurrence table
+read by ``SIMILARITY_BACKEND = "cooccurrence"``.
+
+By default only pairs touching items rated/unrated since the last refresh
+are recomputed; ``--full`` rebuilds the table from scratch.
+
+Usage:
+    python manage.py refresh_cooccurrence [--type book|tvmedia] [--full]
+"""
+
+from django.core.management.base import BaseCommand
+
+from myutils.cooccurrence import rebuild_cooccurrence, refresh_cooccurrence
+
+
+class Command(BaseCommand):
+    help = "Rebuild or incrementally refresh the item co-occurrence table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--type",
+            type=str,
+            choices=["book", "tvmedia"],
+            default=None,
+            help="Only refresh one item type (default: both)",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild the whole table instead of refreshing changed items",
+        )
+
+    def handle(self, *args, **options):
+        item_fields = [options["type"]] if options["type"] else ["book", "tvmedia"]
+        for item_field in item_fields:
+            if options["full"]:
+                rows = rebuild_cooccurrence(item_field)
+                self.stdout.write(f"  {item_field}: rebuilt, {rows} pair rows")
+            else:
+                changed = refresh_cooccurrence(item_field)
+                self.stdout.write(f"  {item_field}: {changed} items refreshed")
+        self.stdout.write(self.style.SUCCESS("Co-occurrence refresh complete."))
@@ -0,0 +1,36 @@
+"""
+Management command to rebuild the explore page snapshots.
+
+Snapshots are rebuilt lazily on the first render after a catalog change;
+running this command from a scheduler (or after a catalog import) builds
+them ahead of that render.
+
+Usage:
+    python manage.py refresh_explore_snapshots [--type book|tvmedia]
+"""
+
+from django.core.management.base import BaseCommand
+
+from myutils.explore import refresh_explore_snapshot
+
+
+class Command(BaseCommand):
+    help = "Rebuild the cached explore page snapshots"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--type",
+            type=str,
+            choices=["book", "tvmedia"],
+            default=None,
+            help="Only refresh one item type (default: both)",
+        )
+
+    def handle(self, *args, **options):
+        item_fields = [options["type"]] if options["type"] else ["book", "tvmedia"]
+        for item_field in item_fields:
+            snapshot = refresh_explore_snapshot(item_field)
+            self.stdout.write(
+                f"  {item_field}: {len(snapshot['genres'])} genre sections built"
+            )
+        self.stdout.write(self.style.SUCCESS("Explore snapshots refreshed."))
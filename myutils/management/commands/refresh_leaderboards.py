@@ -0,0 +1,37 @@
+"""
+Management command to rebuild the cached per-genre popularity leaderboards
+used for cold-start recommendations.
+
+Leaderboards are rebuilt lazily after catalog changes; running this command
+(e.g. after a catalog import) warms them ahead of the first request.
+
+Usage:
+    python manage.py refresh_leaderboards [--type book|tvmedia]
+"""
+
+from django.core.management.base import BaseCommand
+
+from Books.models import Book
+from moviesNshows.models import TvMedia
+from myutils.cold_start import refresh_genre_leaderboards
+
+
+class Command(BaseCommand):
+    help = "Rebuild the cached per-genre popularity leaderboards"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--type",
+            type=str,
+            choices=["book", "tvmedia"],
+            default=None,
+            help="Only refresh one item type (default: both)",
+        )
+
+    def handle(self, *args, **options):
+        models = {"book": Book, "tvmedia": TvMedia}
+        item_fields = [options["type"]] if options["type"] else list(models)
+        for item_field in item_fields:
+            count = refresh_genre_leaderboards(models[item_field])
+            self.stdout.write(f"  {item_field}: {count} leaderboards built")
+        self.stdout.write(self.style.SUCCESS("Leaderboards refreshed."))
@@ -0,0 +1,62 @@
+from django.db import models
+
+
+class ItemCoRating(models.Model):
+    """
+    Co-rating aggregates of an item pair, over the users who rated both.
+
+    Rows exist in both directions (``a -> b`` and ``b -> a``) so the
+    neighbours of an item are a single indexed lookup on ``item_a``.  The
+    diagonal row (``a -> a``) holds the item's own rating count and squared
+    rating sum.  Maintained by the ``refresh_cooccurrence`` command.
+    """
+
+    item_field = models.CharField(max_length=10)  # "book" or "tvmedia"
+    item_a = models.UUIDField()
+    item_b = models.UUIDField()
+    co_count = models.PositiveIntegerField()
+    dot_product = models.BigIntegerField()
+    # Squared rating sums of each side, over the common users only
+    sq_sum_a = models.BigIntegerField()
+    sq_sum_b = models.BigIntegerField()
+
+    class Meta:
+        unique_together = ("item_field", "item_a", "item_b")
+
+    def __str__(self):
+        return f"{self.item_field}:{self.item_a}~{self.item_b} ({self.co_count})"
+
+
+class CoRatingWatermark(models.Model):
+    """Time of the last co-rating refresh of an item type."""
+
+    item_field = models.CharField(max_length=10, unique=True)
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.item_field}: {self.refreshed_at}"
+
+
+class StaleCoRatingItem(models.Model):
+    """
+    An item that lost a rating since the last refresh.
+
+    Deleted ratings leave no ``updated_at`` behind, so the rating write path
+    records their items here for the incremental refresh.
+    """
+
+    item_field = models.CharField(max_length=10)
+    item_id = models.UUIDField()
+
+    class Meta:
+        unique_together = ("item_field", "item_id")
+
+
+class ItemRowSequence(models.Model):
+    """Next unassigned ``row_id`` of an item type."""
+
+    item_field = models.CharField(max_length=10, unique=True)
+    next_row = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.item_field}: {self.next_row}"
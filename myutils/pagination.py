@@ -0,0 +1,78 @@
+"""
+Keyset Pagination
+=================
+
+Seek-based paging for the catalog filter endpoints.  Pages are ordered by a
+sort column (descending, NULLs last) with the primary key as tie-breaker,
+and the opaque ``next`` cursor encodes the last row's ``(value, id)``.  Each
+page is a bounded ``WHERE ... LIMIT`` query no matter how deep the client
+pages, unlike ``OFFSET`` paging.
+"""
+
+import base64
+import json
+import uuid
+from typing import Any, List, Optional, Tuple
+
+from django.db.models import F, Q, QuerySet
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(value: Any, pk: Any) -> str:
+    payload = json.dumps([value, str(pk)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, uuid.UUID]:
+    """Inverse of ``encode_cursor``. Raises ``ValueError`` on malformed input."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if value is not None and not isinstance(value, int):
+            raise ValueError
+        return value, uuid.UUID(pk)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor.") from e
+
+
+def parse_page_size(raw: Optional[str]) -> int:
+    """Clamp the ``page_size`` query parameter. Raises ``ValueError``."""
+    if raw is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        return max(1, min(int(raw), MAX_PAGE_SIZE))
+    except (TypeError, ValueError) as e:
+        raise ValueError("page_size must be an integer.") from e
+
+
+def keyset_page(
+    queryset: QuerySet,
+    order_field: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Return one page of ``queryset`` ordered by ``-order_field, -pk`` and the
+    cursor of the following page (``None`` on the last page).
+    """
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        if value is None:
+            queryset = queryset.filter(**{f"{order_field}__isnull": True, "pk__lt": pk})
+        else:
+            queryset = queryset.filter(
+                Q(**{f"{order_field}__lt": value})
+                | Q(**{order_field: value, "pk__lt": pk})
+                | Q(**{f"{order_field}__isnull": True})
+            )
+
+    rows = list(
+        queryset.order_by(F(order_field).desc(nulls_last=True), "-pk")[: page_size + 1]
+    )
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, order_field), last.pk)
@@ -0,0 +1,55 @@
+"""
+Engine State Preloading
+=======================
+
+The engines keep process-local state: the row id index
+(``myutils.item_index``) and the catalog snapshot
+(``myutils.catalog_snapshot``) of each item type.  Under a prefork server,
+every worker would build its own copy on its first request.
+
+With ``PRELOAD_ENGINE_STATE`` on, the WSGI/ASGI entry points build that
+state once in the master process (gunicorn needs ``--preload`` to import
+the application before forking).  The catalog columns and the item id
+maps are NumPy buffers, so the forked workers share one physical copy of
+them.  Everything
+allocated by then is moved out of the garbage collector's reach with
+``gc.freeze()``, so collections in the workers do not write to those pages
+and copy them.
+
+With ``ENGINE_SNAPSHOT_DIR`` pointing at an exported engine snapshot of
+the current catalog generation (see ``myutils.engine_snapshot``), the
+master reads it from disk instead of querying the database.
+
+Workers keep checking the catalog generation and build a new snapshot of
+their own once the catalog changes; the preloaded one only covers the
+generation current at startup.
+"""
+
+import gc
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from .catalog_snapshot import SNAPSHOT_FIELDS, get_catalog_snapshot
+from .engine_snapshot import warm_start
+from .item_index import item_index
+
+
+def preload_enabled() -> bool:
+    return getattr(settings, "PRELOAD_ENGINE_STATE", False)
+
+
+def preload_engine_state() -> None:
+    """Build the process-local engine state, then freeze it for forking."""
+    for item_field in SNAPSHOT_FIELDS:
+        # A stored snapshot of the current generation skips the database
+        if warm_start(item_field):
+            continue
+        item_index(item_field)
+        get_catalog_snapshot(item_field)
+
+    # Connections opened while loading must not be shared with the workers
+    connections.close_all()
+    caches.close_all()
+    gc.freeze()
@@ -0,0 +1,136 @@
+"""
+Rated Items
+===========
+
+Helpers for "what has this user (not) rated" questions.
+
+In SQL, unrated items are selected with a ``NOT EXISTS`` anti-join against
+the rating table, which the ``(user, item)`` unique index answers per
+candidate row, so a page costs the same whatever the user's rating history
+(an ``exclude(pk__in=[...every rated id...])`` list grows with it).
+
+In memory, the recommendation engines filter candidates through
+``RatedItems``: one bit per item ``row_id`` (see ``myutils.item_index``),
+so a candidate list is masked with a single array lookup instead of
+hashing every pk against a set of UUIDs.  Each user's bitmap is cached
+(``rated`` codec, see ``myutils.cache_codec``), built from one query on a
+miss and dropped by every rating write.
+"""
+
+from typing import Any, Iterable, List, Optional, Sequence
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, QuerySet
+
+from .cache_codec import cache_get, cache_set
+from .item_index import (
+    ROW_ID_DTYPE,
+    ItemIndex,
+    item_index,
+    item_model_of,
+    rating_model_of,
+)
+
+RATED_ITEMS_TTL = 60 * 60 * 24
+
+
+def _rated_subquery(user: Any, item_field: str) -> Exists:
+    rating_model = rating_model_of(item_field)
+    return Exists(
+        rating_model.objects.filter(user=user, **{item_field: OuterRef("pk")})
+    )
+
+
+def unrated_items(user: Any, item_field: str) -> QuerySet:
+    """Items of ``item_field`` type that ``user`` has not rated."""
+    return item_model_of(item_field).objects.filter(~_rated_subquery(user, item_field))
+
+
+def filter_rated(queryset: QuerySet, user: Any, item_field: str, rated: bool):
+    """Narrow ``queryset`` to items ``user`` has (or has not) rated."""
+    subquery = _rated_subquery(user, item_field)
+    return queryset.filter(subquery if rated else ~subquery)
+
+
+class RatedItems:
+    """A user's rated items as a boolean bitmap over item row ids."""
+
+    def __init__(self, index: ItemIndex, bits: np.ndarray):
+        self.index = index
+        self.bits = bits
+
+    @classmethod
+    def from_rows(cls, item_field: str, rows: Iterable[Any]) -> "RatedItems":
+        index = item_index(item_field)
+        rows = np.fromiter((r for r in rows if r is not None), dtype=ROW_ID_DTYPE)
+        size = max(len(index), int(rows.max()) + 1) if len(rows) else len(index)
+        bits = np.zeros(size, dtype=bool)
+        bits[rows] = True
+        return cls(index, bits)
+
+    @classmethod
+    def from_pks(cls, item_field: str, pks: Iterable[Any]) -> "RatedItems":
+        rows = item_index(item_field).rows(pks)
+        return cls.from_rows(item_field, rows[rows >= 0].tolist())
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.bits))
+
+    def __contains__(self, pk: Any) -> bool:
+        row = self.index.row(pk)
+        return row is not None and row < len(self.bits) and bool(self.bits[row])
+
+    def mask_rows(self, rows: Sequence[Optional[int]]) -> np.ndarray:
+        """Boolean array, ``True`` where the row id is rated (``None``: no)."""
+        rows = np.fromiter(
+            (-1 if r is None else r for r in rows), dtype=np.int64, count=len(rows)
+        )
+        inside = (rows >= 0) & (rows < len(self.bits))
+        mask = np.zeros(len(rows), dtype=bool)
+        mask[inside] = self.bits[rows[inside]]
+        return mask
+
+    def mask(self, pks: Sequence[Any]) -> np.ndarray:
+        """Boolean array, ``True`` where the matching pk is rated."""
+        return self.mask_rows(self.index.rows(pks).tolist())
+
+    def unrated(self, pks: Sequence[Any]) -> List[Any]:
+        """``pks`` without the rated ones, order kept."""
+        keep = ~self.mask(pks)
+        return [pk for pk, k in zip(pks, keep) if k]
+
+
+def rated_items_cache_key(item_field: str, user_id: Any) -> str:
+    return f"rated:{item_field}:{user_id}"
+
+
+def rated_items(user_id: Any, item_field: str) -> RatedItems:
+    """The user's ``RatedItems``, from the cache or one rating query."""
+    key = rated_items_cache_key(item_field, user_id)
+    bits: Optional[np.ndarray] = cache_get(key)
+    if bits is not None:
+        # Row ids are never reused, so a bitmap outlives catalog generations
+        return RatedItems(item_index(item_field), bits)
+
+    rating_model = rating_model_of(item_field)
+    rated = RatedItems.from_rows(
+        item_field,
+        rating_model.objects.filter(user_id=user_id).values_list(
+            f"{item_field}__row_id", flat=True
+        ),
+    )
+    cache_set(key, rated.bits, RATED_ITEMS_TTL)
+    return rated
+
+
+def invalidate_rated_items(item_field: str, user_id: Any) -> None:
+    """Drop the user's cached bitmap; call on every rating write."""
+    cache.delete(rated_items_cache_key(item_field, user_id))
+
+
+def invalidate_rated_items_many(item_field: str, user_ids: Iterable[Any]) -> None:
+    """Drop several users' cached bitmaps in one round-trip."""
+    keys = [rated_items_cache_key(item_field, user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
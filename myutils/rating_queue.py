@@ -0,0 +1,231 @@
+"""
+Deferred Rating Work Queue
+==========================
+
+Moves post-rating maintenance (genre preference totals, recommendation cache
+and similarity cache invalidation) out of the rating request.
+
+Modes (``settings.RATING_WORK_MODE``):
+    - ``"sync"``      The ``post_save``/``post_delete`` receivers do the work
+                      inline.  Default, and what the test-suite relies on.
+    - ``"deferred"``  Receivers only write a ``RatingEvent`` row.  The
+                      ``process_rating_events`` command drains the queue,
+                      coalescing all pending events of a user into one
+                      preference update, one item statistics update per item
+                      and one round of cache invalidation.
+
+Each user's events are replayed in their own savepoint.  A replay that
+raises is logged and its events stay queued with ``attempts`` bumped; after
+``MAX_EVENT_ATTEMPTS`` they are flagged ``failed`` and skipped from then on,
+so one bad user cannot hold up everybody else's events.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .cache_codec import recommendation_cache_key
+from .collaborative_filtering import invalidate_similarity_cache_many
+from .cooccurrence import mark_items_stale
+from .item_stats import apply_item_stats_changes, recompute_item_stats
+
+logger = logging.getLogger(__name__)
+
+# Replays of an event before it is set aside as failed
+MAX_EVENT_ATTEMPTS = 5
+
+
+def is_deferred() -> bool:
+    return getattr(settings, "RATING_WORK_MODE", "sync") == "deferred"
+
+
+def _domains() -> Dict[str, Dict[str, Any]]:
+    # Import here to avoid circular imports (users.models imports this module)
+    from Books.models import Book
+    from moviesNshows.models import TvMedia
+    from users.models import UserBooksGenrePreference, UserTvMediaGenrePreference
+
+    return {
+        "book": {
+            "through": Book.genre.through,
+            "item_column": "book_id",
+            "pref_model": UserBooksGenrePreference,
+            "rebuild": "update_books_genre_preferences",
+        },
+        "tvmedia": {
+            "through": TvMedia.genre.through,
+            "item_column": "tvmedia_id",
+            "pref_model": UserTvMediaGenrePreference,
+            "rebuild": "update_media_genre_preferences",
+        },
+    }
+
+
+def enqueue_rating_changes(
+    user_id: int,
+    item_field: str,
+    changes: Iterable[Tuple[Any, Optional[int], Optional[int]]],
+) -> None:
+    """Record many ``(item_id, old_rating, new_rating)`` changes in one insert."""
+    from users.models import RatingEvent
+
+    RatingEvent.objects.bulk_create(
+        [
+            RatingEvent(
+                user_id=user_id,
+                item_field=item_field,
+                item_id=item_id,
+                old_rating=old_rating,
+                new_rating=new_rating,
+            )
+            for item_id, old_rating, new_rating in changes
+        ]
+    )
+
+
+def enqueue_rating_change(
+    user_id: int,
+    item_field: str,
+    item_id: Any,
+    old_rating: Optional[int],
+    new_rating: Optional[int],
+    rebuild: bool = False,
+) -> None:
+    """Record a rating change for the worker."""
+    from users.models import RatingEvent
+
+    RatingEvent.objects.create(
+        user_id=user_id,
+        item_field=item_field,
+        item_id=item_id,
+        old_rating=old_rating,
+        new_rating=new_rating,
+        rebuild=rebuild,
+    )
+
+
+def apply_rating_changes(
+    user_id: int,
+    item_field: str,
+    changes: Iterable[Tuple[Any, Optional[int], Optional[int]]],
+    rebuild: bool = False,
+) -> None:
+    """
+    Apply the combined effect of many rating changes of one user at once:
+    genre preference totals, item rating statistics and cache invalidation.
+
+    Args:
+        user_id: The user whose ratings changed.
+        item_field: "book" or "tvmedia".
+        changes: ``(item_id, old_rating, new_rating)`` triples; ``None`` marks
+            a created (old) or deleted (new) rating.
+        rebuild: Force a full preference recompute instead of deltas.
+    """
+    from users.models import CustomUser, apply_genre_totals_delta
+
+    domain = _domains()[item_field]
+    changes = list(changes)
+    item_deltas: Dict[Any, Tuple[int, int]] = defaultdict(lambda: (0, 0))
+    for item_id, old_rating, new_rating in changes:
+        sum_delta, count_delta = item_deltas[item_id]
+        item_deltas[item_id] = (
+            sum_delta + (new_rating or 0) - (old_rating or 0),
+            count_delta + (new_rating is not None) - (old_rating is not None),
+        )
+
+    if rebuild:
+        recompute_item_stats(item_field, item_deltas.keys())
+    else:
+        apply_item_stats_changes(item_field, changes)
+    mark_items_stale(item_field, {c[0] for c in changes if c[2] is None})
+
+    # Item statistics still apply when the user has been deleted meanwhile
+    user = CustomUser.objects.filter(pk=user_id).first()
+    if user is None:
+        return
+
+    if not rebuild:
+        genre_deltas: Dict[int, Tuple[int, int]] = defaultdict(lambda: (0, 0))
+        item_genres = (
+            domain["through"]
+            .objects.filter(**{f"{domain['item_column']}__in": list(item_deltas)})
+            .values_list(domain["item_column"], "genre_id")
+        )
+        for item_id, genre_id in item_genres:
+            sum_delta, count_delta = genre_deltas[genre_id]
+            item_sum, item_count = item_deltas[item_id]
+            genre_deltas[genre_id] = (sum_delta + item_sum, count_delta + item_count)
+        rebuild = not apply_genre_totals_delta(
+            domain["pref_model"], user_id, genre_deltas
+        )
+
+    if rebuild:
+        getattr(user, domain["rebuild"])()
+
+    cache.delete(recommendation_cache_key(item_field, user_id))
+    invalidate_similarity_cache_many(item_field, item_deltas.keys())
+
+
+def _replay_user_events(user_id: int, item_field: str, events: List[Any]) -> bool:
+    """Replay one user's events in a savepoint; ``False`` if it raised."""
+    from users.models import RatingEvent
+
+    pks = [event.pk for event in events]
+    try:
+        with transaction.atomic():
+            apply_rating_changes(
+                user_id,
+                item_field,
+                [(e.item_id, e.old_rating, e.new_rating) for e in events],
+                rebuild=any(e.rebuild for e in events),
+            )
+            RatingEvent.objects.filter(pk__in=pks).delete()
+        return True
+    except Exception as exc:
+        logger.exception(
+            "Replaying %d %s rating events of user %s failed",
+            len(events),
+            item_field,
+            user_id,
+        )
+        attempts = max(e.attempts for e in events) + 1
+        RatingEvent.objects.filter(pk__in=pks).update(
+            attempts=attempts,
+            failed=attempts >= MAX_EVENT_ATTEMPTS,
+            last_error=repr(exc),
+        )
+        return False
+
+
+def process_pending_events(batch_size: int = 500) -> int:
+    """
+    Drain up to ``batch_size`` queued events, oldest first.
+
+    Events are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` where the
+    database supports it, so several workers can run side by side.  Events
+    flagged ``failed`` are not claimed again.
+
+    Returns:
+        Number of events claimed, replayed or not.
+    """
+    from users.models import RatingEvent
+
+    with transaction.atomic():
+        events = list(
+            RatingEvent.objects.select_for_update(skip_locked=True)
+            .filter(failed=False)
+            .order_by("pk")[:batch_size]
+        )
+        if not events:
+            return 0
+
+        grouped: Dict[Tuple[int, str], List[Any]] = defaultdict(list)
+        for event in events:
+            grouped[(event.user_id, event.item_field)].append(event)
+        for (user_id, item_field), user_events in grouped.items():
+            _replay_user_events(user_id, item_field, user_events)
+    return len(events)
@@ -17,6 +17,9 @@ Where:
 Adaptive Alpha:
     α = 1.0 - min(rating_count / threshold, 1.0) * cf_weight
     Default threshold = 15 ratings, default cf_weight = 0.4.
+
+Both scores come from the vectorized scorers of
+``myutils.batch_recommendation``, run for a chunk of one user.
 """
 
 from collections import defaultdict
@@ -25,8 +28,11 @@ from typing import Any, Dict, List, Optional, Tuple
 from Books.models import Genre as BookGenre
 from moviesNshows.models import Genre as TvGenre
 
-from .collaborative_filtering import get_collaborative_recommendations
-from .content_based_filtering import get_content_based_recommendations
+from .content_based_filtering import (  # noqa: F401 (used via this module)
+    get_content_based_recommendations,
+)
+from .feature_signals import user_signal_targets
+from .rated_items import RatedItems, rated_items
 
 
 def compute_adaptive_alpha(
@@ -63,13 +69,15 @@ def get_hybrid_recommendation(
     top_n: int = 100,
     cf_weight: float = 0.4,
     rating_count: Optional[int] = None,
-    already_rated: Optional[set[Any]] = None,
+    already_rated: Optional[RatedItems] = None,
 ) -> List[Tuple[float, Any]]:
     """
     Combines genre-based recommendations with collaborative filtering.
 
     When ``rating_count`` is provided the hybrid weight adapts automatically
     via ``compute_adaptive_alpha``.  Otherwise ``cf_weight`` is used directly.
+    ``already_rated`` (the user's ``RatedItems``) is masked out of both the
+    content and the CF candidates, loaded from the cache when omitted.
     """
     # Determine effective alpha
     if rating_count is not None:
@@ -77,47 +85,64 @@ def get_hybrid_recommendation(
     else:
         alpha = 1.0 - cf_weight
 
+    if already_rated is None:
+        already_rated = rated_items(user.pk, item_field)
+
+    # Imported here: batch_recommendation imports compute_adaptive_alpha
+    from .batch_recommendation import (
+        CandidateCatalog,
+        SimilarityIndex,
+        cf_scores,
+        content_scores,
+        load_ratings,
+    )
+
+    ratings, _ = load_ratings(interaction_model, item_field, [user.pk])
+    user_ratings = ratings.get(user.pk, [])
+    prefs = sorted(
+        ((genre.pk, float(pref)) for genre, pref in user_needed_genres.items()),
+        key=lambda x: x[1],
+        reverse=True,
+    )
+
     # 1. Get genre-based recommendations
-    if item_field == "tvmedia":
-        allowed_types = ("tvmedia",)
-    else:
-        allowed_types = ("books",)
-
-    genre_recs = get_content_based_recommendations(
-        user_needed_genres,
-        max_num_genres,
-        max_media_per_genre,
-        allowed_types=allowed_types,
-        user=user,
-        interaction_model=interaction_model,
-        item_field=item_field,
-        already_rated=already_rated,
+    catalog = CandidateCatalog(item_model, item_field, int(max_media_per_genre))
+    catalog.load_genres(
+        catalog.genre_depths(
+            [g for g, _ in prefs[: int(max_num_genres)]], already_rated
+        )
+    )
+    genre_recs = content_scores(
+        catalog,
+        prefs,
+        user_signal_targets(item_field, user_ratings),
+        already_rated,
+        int(max_num_genres),
     )
 
     # 2. Get collaborative recommendations
-    cf_recs = get_collaborative_recommendations(
-        user,
-        interaction_model,
-        item_model,
-        item_field,
-        top_n=top_n,
-        already_rated=already_rated,
+    cf_recs = cf_scores(
+        SimilarityIndex(interaction_model, item_field),
+        user_ratings,
+        already_rated,
+        top_n,
     )
 
     # 3. Merge: FinalScore = α · C_content + (1 - α) · C_cf
+    items_map = item_model.objects.in_bulk(
+        {pk for _, pk in genre_recs} | {pk for _, pk in cf_recs}
+    )
     combined_scores = defaultdict(float)
-    items_map = {}
 
-    for score, item in genre_recs:
-        combined_scores[item.pk] += score * alpha
-        items_map[item.pk] = item
+    for score, pk in genre_recs:
+        combined_scores[pk] += score * alpha
 
-    for score, item in cf_recs:
-        combined_scores[item.pk] += score * (1 - alpha)
-        items_map[item.pk] = item
+    for score, pk in cf_recs:
+        combined_scores[pk] += score * (1 - alpha)
 
     final_list = []
     for pk, score in combined_scores.items():
-        final_list.append((round(score, 2), items_map[pk]))
+        if pk in items_map:
+            final_list.append((round(score, 2), items_map[pk]))
 
     return sorted(final_list, key=lambda x: x[0], reverse=True)[:top_n]
@@ -0,0 +1,57 @@
+"""
+JSON Renderers
+==============
+
+``FastJSONRenderer`` is a drop-in replacement for DRF's ``JSONRenderer``
+backed by ``orjson`` when it is installed.  orjson encodes dicts, lists
+(including DRF's ``ReturnDict``/``ReturnList`` subclasses), UUIDs and floats
+natively in C, without an intermediate ``str``.  Anything else (``Decimal``,
+datetimes, lazy translation strings, querysets) goes through DRF's own
+encoder so the bytes match ``JSONRenderer`` output.
+
+When orjson is missing, or a client asks for indented output (the browsable
+API does), rendering falls back to the stdlib path of ``JSONRenderer``.
+
+Selected through ``REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"]``; the
+``JSON_RENDERER`` environment variable picks the class.
+"""
+
+from typing import Any
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_fallback_encoder = JSONEncoder()
+
+
+def _default(obj: Any) -> Any:
+    return _fallback_encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` that encodes with orjson when possible."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        # Same strict-javascript-subset escaping as JSONRenderer
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
@@ -0,0 +1,167 @@
+"""
+Catalog Search
+==============
+
+Ranked substring search over book and TV/media titles.
+
+PostgreSQL:
+    ``pg_trgm`` GIN indexes on ``UPPER(column)`` (created after ``migrate``,
+    see ``ensure_search_indexes``) make the ``icontains`` lookups Django
+    emits index scans.  Matches are ranked with ``TrigramSimilarity``.
+
+Other databases (SQLite test runs):
+    An in-process inverted index maps every lowercase trigram to the items
+    containing it.  A query intersects the posting sets of its trigrams,
+    confirms the substring on the survivors and ranks them by trigram
+    overlap, mirroring ``pg_trgm`` similarity.  The index is rebuilt when
+    the catalog version changes.
+"""
+
+import threading
+from typing import Any, Dict, List, Set, Tuple, Type
+
+from django.db import connection
+from django.db.models import Model, Q
+from django.db.models.functions import Greatest
+
+from .catalog import catalog_version
+
+# Columns searched per item type
+SEARCH_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "book": ("title", "author"),
+    "tvmedia": ("original_title", "primary_title"),
+}
+
+DEFAULT_SEARCH_LIMIT = 50
+
+
+def _trigrams(text: str) -> Set[str]:
+    # Padded like pg_trgm so short words and word starts still match
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _query_trigrams(text: str) -> Set[str]:
+    # Substrings can start/end mid-word, so only inner trigrams are required
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Inverted trigram index over the searchable text of one item type."""
+
+    def __init__(self, rows: List[Tuple[Any, List[str]]]):
+        # pk -> [(lowercase text, size of its padded trigram set), ...]
+        self.texts: Dict[Any, List[Tuple[str, int]]] = {}
+        self.postings: Dict[str, Set[Any]] = {}
+        for pk, values in rows:
+            texts = [v.lower() for v in values if v]
+            self.texts[pk] = [(text, len(_trigrams(text))) for text in texts]
+            for text in texts:
+                for gram in _query_trigrams(text):
+                    self.postings.setdefault(gram, set()).add(pk)
+
+    def search(self, query: str, limit: int) -> List[Tuple[float, Any]]:
+        query = query.lower()
+        grams = _query_trigrams(query)
+        if grams:
+            postings = sorted((self.postings.get(g, set()) for g in grams), key=len)
+            candidates = set.intersection(*postings)
+        else:
+            candidates = set(self.texts)
+
+        query_grams = _trigrams(query)
+        results = []
+        for pk in candidates:
+            best = 0.0
+            matched = False
+            for text, n_text_grams in self.texts[pk]:
+                if query not in text:
+                    continue
+                matched = True
+                padded = f"  {text} "
+                shared = sum(1 for gram in query_grams if gram in padded)
+                best = max(best, shared / (len(query_grams) + n_text_grams - shared))
+            if matched:
+                results.append((round(best, 4), pk))
+        results.sort(key=lambda x: (-x[0], str(x[1])))
+        return results[:limit]
+
+
+_indexes: Dict[str, Tuple[int, TrigramIndex]] = {}
+_indexes_lock = threading.Lock()
+
+
+def _get_trigram_index(item_model: Type[Model], item_field: str) -> TrigramIndex:
+    version = catalog_version(item_field)
+    cached = _indexes.get(item_field)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with _indexes_lock:
+        cached = _indexes.get(item_field)
+        if cached is None or cached[0] != version:
+            fields = SEARCH_FIELDS[item_field]
+            rows = [
+                (row[0], list(row[1:]))
+                for row in item_model.objects.values_list("pk", *fields).iterator()
+            ]
+            cached = (version, TrigramIndex(rows))
+            _indexes[item_field] = cached
+    return cached[1]
+
+
+def search_catalog(
+    item_model: Type[Model], query: str, limit: int = DEFAULT_SEARCH_LIMIT
+) -> List[Tuple[float, Any]]:
+    """
+    Return up to ``limit`` ``(relevance, item)`` pairs whose searchable
+    fields contain ``query`` (case-insensitive), most relevant first.
+    """
+    query = query.strip()
+    if not query:
+        return []
+    item_field = item_model._meta.model_name
+    fields = SEARCH_FIELDS[item_field]
+
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        match = Q()
+        for field in fields:
+            match |= Q(**{f"{field}__icontains": query})
+        similarity = [TrigramSimilarity(field, query) for field in fields]
+        items = (
+            item_model.objects.filter(match)
+            .annotate(relevance=Greatest(*similarity))
+            .order_by("-relevance", "pk")[:limit]
+        )
+        return [(round(float(item.relevance or 0), 4), item) for item in items]
+
+    ranked = _get_trigram_index(item_model, item_field).search(query, limit)
+    items_map = item_model.objects.in_bulk([pk for _, pk in ranked])
+    return [(score, items_map[pk]) for score, pk in ranked if pk in items_map]
+
+
+def ensure_search_indexes(using: str = "default", **kwargs) -> None:
+    """
+    Create the ``pg_trgm`` extension and GIN indexes (PostgreSQL only).
+
+    Connected to ``post_migrate``; the statements are idempotent.
+    """
+    from django.db import connections
+
+    from Books.models import Book
+    from moviesNshows.models import TvMedia
+
+    conn = connections[using]
+    if conn.vendor != "postgresql":
+        return
+    with conn.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for model in (Book, TvMedia):
+            table = model._meta.db_table
+            for field in SEARCH_FIELDS[model._meta.model_name]:
+                column = model._meta.get_field(field).column
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{table}_{column}_trgm" '
+                    f'ON "{table}" USING gin (UPPER("{column}") gin_trgm_ops)'
+                )
@@ -0,0 +1,15 @@
+from django.db.models import prefetch_related_objects
+from rest_framework import serializers
+
+
+class GenrePrefetchListSerializer(serializers.ListSerializer):
+    """
+    List serializer for catalog items that loads every item's genres in one
+    batched query before rendering, whatever queryset or list it is given.
+    Items whose genres are already prefetched are left alone.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, "all") else data)
+        prefetch_related_objects(items, "genre")
+        return super().to_representation(items)
@@ -0,0 +1,201 @@
+import json
+import random
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from Books.models import Book, Genre
+from moviesNshows.models import Genre as TvGenre
+from moviesNshows.models import TvMedia
+from myutils.batch_recommendation import iter_batch_recommendations
+from myutils.cold_start import boost_new_items
+from myutils.collaborative_filtering import get_collaborative_recommendations
+from myutils.content_based_filtering import get_content_based_recommendations
+from myutils.rated_items import rated_items
+from myutils.recommendation import compute_adaptive_alpha, get_hybrid_recommendation
+from users.models import CustomUser, UserBookRating, UserTvMediaRating
+
+
+def _single_user(user, item_field):
+    """The private endpoint's hybrid ranking as ``{item_pk: score}``."""
+    if item_field == "book":
+        prefs = user.get_books_genre_preferences()
+        rating_model, item_model = UserBookRating, Book
+    else:
+        prefs = user.get_media_genre_preferences()
+        rating_model, item_model = UserTvMediaRating, TvMedia
+    rated = rated_items(user.pk, item_field)
+    recs = get_hybrid_recommendation(
+        user=user,
+        user_needed_genres=prefs,
+        interaction_model=rating_model,
+        item_model=item_model,
+        item_field=item_field,
+        top_n=100,
+        rating_count=rating_model.objects.filter(user=user).count(),
+        already_rated=rated,
+    )
+    recs = boost_new_items(
+        recs, rating_model, item_field, prefs, item_model, rated=rated
+    )
+    return {item.pk: score for score, item in recs}
+
+
+def _legacy_hybrid(user, prefs, rating_model, item_model, item_field, count, rated):
+    """``get_hybrid_recommendation`` before it ran the batch scorers."""
+    alpha = compute_adaptive_alpha(count, 0.4)
+    genre_recs = get_content_based_recommendations(
+        prefs,
+        30,
+        100,
+        allowed_types=("tvmedia",) if item_field == "tvmedia" else ("books",),
+        user=user,
+        interaction_model=rating_model,
+        item_field=item_field,
+        already_rated=rated,
+    )
+    cf_recs = get_collaborative_recommendations(
+        user, rating_model, item_model, item_field, top_n=100, already_rated=rated
+    )
+    combined = defaultdict(float)
+    for score, item in genre_recs:
+        combined[item.pk] += score * alpha
+    for score, item in cf_recs:
+        combined[item.pk] += score * (1 - alpha)
+    return sorted(
+        ((round(score, 2), pk) for pk, score in combined.items()),
+        key=lambda x: x[0],
+        reverse=True,
+    )[:100]
+
+
+class BatchRecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        rng = random.Random(7)
+        genres = [Genre.objects.create(name=f"BatchG{i}") for i in range(4)]
+        tv_genres = [TvGenre.objects.create(name=f"BatchTv{i}") for i in range(3)]
+        books, media = [], []
+        for i in range(16):
+            book = Book.objects.create(
+                title=f"Batch {i}",
+                author=f"Author {i % 4}",
+                isbn=f"batchrec-{i}",
+                language="English" if i % 3 else "French",
+                pages=100,
+                likedPercent=rng.randint(0, 100),
+            )
+            book.genre.set(rng.sample(genres, rng.randint(1, 3)))
+            books.append(book)
+            show = TvMedia.objects.create(
+                media_type="Movie" if i % 2 else "Series",
+                original_title=f"Batch {i}",
+                startyear=1980 + i,
+            )
+            show.genre.set(rng.sample(tv_genres, rng.randint(1, 2)))
+            media.append(show)
+
+        self.users = []
+        for u in range(5):
+            user = CustomUser.objects.create_user(
+                email=f"batch{u}@example.com", password="password", first_name="B"
+            )
+            for book in rng.sample(books, 4 + u * 2):
+                UserBookRating.objects.create(
+                    user=user, book=book, rating=rng.randint(1, 10)
+                )
+            for show in rng.sample(media, 3 + u):
+                UserTvMediaRating.objects.create(
+                    user=user, tvmedia=show, rating=rng.randint(1, 10)
+                )
+            self.users.append(user)
+        self.cold = CustomUser.objects.create_user(
+            email="batchcold@example.com", password="password", first_name="C"
+        )
+
+    def _assert_matches_single_user(self, item_field):
+        ids = [u.pk for u in self.users]
+        results = dict(iter_batch_recommendations(item_field, ids, chunk_size=2))
+        for user in self.users:
+            expected = _single_user(user, item_field)
+            got = dict((pk, score) for score, pk in results[user.pk])
+            self.assertEqual(set(got), set(expected))
+            for pk, score in expected.items():
+                self.assertAlmostEqual(got[pk], score, delta=0.02)
+            scores = [score for score, _ in results[user.pk]]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def _assert_matches_legacy_hybrid(self, item_field):
+        if item_field == "book":
+            rating_model, item_model = UserBookRating, Book
+        else:
+            rating_model, item_model = UserTvMediaRating, TvMedia
+        for user in self.users:
+            prefs = (
+                user.get_books_genre_preferences()
+                if item_field == "book"
+                else user.get_media_genre_preferences()
+            )
+            rated = rated_items(user.pk, item_field)
+            count = rating_model.objects.filter(user=user).count()
+            recs = get_hybrid_recommendation(
+                user=user,
+                user_needed_genres=prefs,
+                interaction_model=rating_model,
+                item_model=item_model,
+                item_field=item_field,
+                top_n=100,
+                rating_count=count,
+                already_rated=rated,
+            )
+            legacy = _legacy_hybrid(
+                user, prefs, rating_model, item_model, item_field, count, rated
+            )
+            # Same items and scores in the same order (ties may swap)
+            self.assertEqual([s for s, _ in recs], [s for s, _ in legacy])
+            self.assertEqual({i.pk: s for s, i in recs}, {pk: s for s, pk in legacy})
+
+    def test_single_user_keeps_pre_batch_ranking(self):
+        self._assert_matches_legacy_hybrid("book")
+        self._assert_matches_legacy_hybrid("tvmedia")
+
+    def test_books_match_single_user_path(self):
+        self._assert_matches_single_user("book")
+
+    def test_tvmedia_match_single_user_path(self):
+        self._assert_matches_single_user("tvmedia")
+
+    def test_cold_and_unknown_users(self):
+        results = list(
+            iter_batch_recommendations("book", [self.cold.pk, 999999, self.cold.pk])
+        )
+        self.assertEqual([u for u, _ in results], [self.cold.pk, 999999, self.cold.pk])
+        self.assertTrue(results[0][1])
+        self.assertIsNone(results[1][1])
+
+    def test_api_streams_ndjson_for_admins(self):
+        url = reverse("books-recommend-batch")
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        body = {"user_ids": [self.users[1].pk, 999999]}
+        self.assertEqual(client.post(url, body, format="json").status_code, 403)
+
+        admin = CustomUser.objects.create_superuser(
+            email="batchadmin@example.com", password="password", first_name="A"
+        )
+        client.force_authenticate(admin)
+        response = client.post(url, body, format="json")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual([line["user"] for line in lines], body["user_ids"])
+        self.assertEqual(set(lines[0]["data"][0]["book"]), {"id", "title"})
+        self.assertEqual(lines[1]["error"], "User not found.")
+
+        bad = client.post(url, {"user_ids": ["x"]}, format="json")
+        self.assertEqual(bad.status_code, 400)
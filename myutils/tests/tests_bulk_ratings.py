@@ -0,0 +1,88 @@
+import os
+import tempfile
+import uuid
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from Books.models import Book, Genre
+from myutils.bulk_ratings import bulk_upsert_ratings
+from users.models import CustomUser, UserBookRating, UserBooksGenrePreference
+
+
+class BulkUpsertRatingsTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email="bulk@example.com", password="password", first_name="Bulk"
+        )
+        self.genre = Genre.objects.create(name="BulkGenre")
+        self.books = []
+        for i in range(5):
+            book = Book.objects.create(
+                title=f"Bulk{i}",
+                author="A",
+                isbn=f"bulk-{i}",
+                pages=100,
+                likedPercent=70,
+            )
+            book.genre.add(self.genre)
+            self.books.append(book)
+
+    def test_creates_and_updates(self):
+        UserBookRating.objects.create(user=self.user, book=self.books[0], rating=2)
+        result = bulk_upsert_ratings(self.user, "book", [(b.pk, 8) for b in self.books])
+        self.assertEqual(result["created"], 4)
+        self.assertEqual(result["updated"], 1)
+        self.assertEqual(
+            UserBookRating.objects.filter(user=self.user, rating=8).count(), 5
+        )
+        pref = UserBooksGenrePreference.objects.get(user=self.user, genre=self.genre)
+        self.assertEqual((pref.weighted_sum, pref.count), (40, 5))
+
+    def test_preferences_maintained_once(self):
+        with patch("myutils.rating_queue.apply_rating_changes") as apply:
+            bulk_upsert_ratings(self.user, "book", [(b.pk, 7) for b in self.books])
+        self.assertEqual(apply.call_count, 1)
+
+    def test_unknown_items_reported(self):
+        missing = uuid.uuid4()
+        result = bulk_upsert_ratings(
+            self.user, "book", [(self.books[0].pk, 5), (missing, 5)]
+        )
+        self.assertEqual(result["not_found"], [missing])
+        self.assertEqual(result["created"], 1)
+
+    def test_invalid_rating_rejected(self):
+        with self.assertRaises(ValueError):
+            bulk_upsert_ratings(self.user, "book", [(self.books[0].pk, 11)])
+
+    def test_api_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(
+            "/api/books/rate/bulk/",
+            {"ratings": [{"book": str(b.pk), "rating": 6} for b in self.books]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 5)
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False, encoding="utf-8"
+        ) as fh:
+            fh.write("book,rating\n")
+            for book in self.books:
+                fh.write(f"{book.pk},9\n")
+        try:
+            out = StringIO()
+            call_command(
+                "import_ratings", fh.name, user=self.user.email, type="book", stdout=out
+            )
+        finally:
+            os.unlink(fh.name)
+        self.assertIn("Created: 5", out.getvalue())
+        self.assertEqual(UserBookRating.objects.filter(user=self.user).count(), 5)
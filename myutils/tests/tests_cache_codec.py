@@ -0,0 +1,70 @@
+import uuid
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from myutils.cache_codec import (
+    COMPRESS_THRESHOLD,
+    cache_get,
+    cache_set,
+    decode_payload,
+    decode_ranking,
+    encode_payload,
+    encode_ranking,
+)
+
+
+class RankingCodecTests(TestCase):
+    def test_uuid_round_trip(self):
+        pairs = [(0.75, uuid.uuid4()), (0.5, uuid.uuid4()), (0.125, uuid.uuid4())]
+        decoded = decode_ranking(encode_ranking(pairs))
+        self.assertEqual(decoded, pairs)
+
+    def test_int_round_trip(self):
+        pairs = [(0.9, 7), (0.3, 12)]
+        decoded = decode_ranking(encode_ranking(pairs))
+        self.assertEqual([i for _, i in decoded], [7, 12])
+        self.assertAlmostEqual(decoded[0][0], 0.9, places=6)
+
+    def test_empty_ranking(self):
+        self.assertEqual(decode_ranking(encode_ranking([])), [])
+
+    def test_packed_size(self):
+        """Each entry costs 4 bytes of score plus 16 bytes of UUID."""
+        pairs = [(0.5, uuid.uuid4()) for _ in range(100)]
+        self.assertLess(len(encode_ranking(pairs)), 100 * 20 + 16)
+
+
+class PayloadCodecTests(TestCase):
+    def test_small_payload_round_trip(self):
+        data = {"0": {"relativity": 91.5, "book": {"title": "Dune"}}}
+        self.assertEqual(decode_payload(encode_payload(data)), data)
+
+    def test_large_payload_is_compressed(self):
+        data = {
+            str(i): {"relativity": 50.0, "book": {"description": "lorem ipsum " * 20}}
+            for i in range(50)
+        }
+        raw = encode_payload(data)
+        self.assertGreater(len(str(data)), COMPRESS_THRESHOLD)
+        self.assertLess(len(raw), len(str(data)) // 4)
+        self.assertEqual(decode_payload(raw), data)
+
+
+class CacheHelperTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_keys_are_encoded_by_type(self):
+        pairs = [(0.5, uuid.uuid4())]
+        cache_set("item_sim:book:x", pairs)
+        self.assertIsInstance(cache.get("item_sim:book:x"), bytes)
+        self.assertEqual(cache_get("item_sim:book:x"), pairs)
+
+    def test_unknown_prefix_is_passed_through(self):
+        cache_set("all_books", [1, 2, 3])
+        self.assertEqual(cache.get("all_books"), [1, 2, 3])
+
+    def test_legacy_values_are_misses(self):
+        cache.set("rec:book:1", {"0": {}})
+        self.assertIsNone(cache_get("rec:book:1"))
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from Books.models import Book, Genre
+from moviesNshows.models import Genre as TvGenre
+from myutils.catalog import catalog_version
+
+
+class CatalogConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        genre = Genre.objects.create(name="Etag")
+        book = Book.objects.create(
+            title="Cached", author="A", isbn="etag-1", pages=1, likedPercent=1
+        )
+        book.genre.add(genre)
+
+    def _etag_round_trip(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        with self.assertNumQueries(0):
+            repeat = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(repeat.status_code, 304)
+        return first
+
+    def test_catalog_endpoints_return_304(self):
+        for name in (
+            "books-all",
+            "books-all-genres",
+            "tvmedia-all",
+            "tvmedia-all-genres",
+        ):
+            with self.subTest(name=name):
+                self._etag_round_trip(reverse(name))
+
+    def test_last_modified(self):
+        first = self.client.get(reverse("books-all"))
+        response = self.client.get(
+            reverse("books-all"), HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_catalog_edit_changes_etag_and_content(self):
+        url = reverse("books-all")
+        etag = self._etag_round_trip(url)["ETag"]
+        version = catalog_version("book")
+
+        Genre.objects.create(name="Brand New")
+        self.assertEqual(catalog_version("book"), version + 1)
+        Book.objects.create(
+            title="Fresh", author="A", isbn="etag-2", pages=1, likedPercent=99
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["data"][0]["title"], "Fresh")
+
+        tv_version = catalog_version("tvmedia")
+        TvGenre.objects.create(name="Brand New")
+        self.assertEqual(catalog_version("tvmedia"), tv_version + 1)
+
+    def test_explore_pages(self):
+        self._etag_round_trip(reverse("explore books"))
+        anon = self._etag_round_trip(reverse("explore tvmedia"))
+        self.assertNotIn("Last-Modified", anon)
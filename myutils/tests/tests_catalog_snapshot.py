@@ -0,0 +1,82 @@
+import gc
+
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase
+
+from Books.models import Book, Genre
+from myutils.catalog import invalidate_catalog_caches
+from myutils.catalog_snapshot import CatalogSnapshot, get_catalog_snapshot
+from myutils.item_index import item_index
+from myutils.preload import preload_engine_state
+
+
+class CatalogSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.genres = [Genre.objects.create(name=f"Snap {i}") for i in range(3)]
+        self.books = []
+        for i, genres in enumerate([self.genres[:2], self.genres[2:], [], self.genres]):
+            book = Book.objects.create(
+                title=f"Snap {i}",
+                author="Ann" if i % 2 else "Bob",
+                language="English" if i else "",
+                isbn=f"snap-{i}",
+                pages=1,
+                likedPercent=20 * i,
+            )
+            book.genre.set(genres)
+            self.books.append(book)
+
+    def test_columns(self):
+        snapshot = CatalogSnapshot.build("book")
+        rows = [b.row_id for b in self.books]
+        self.assertEqual(snapshot.pks_of(rows), [b.pk for b in self.books])
+        np.testing.assert_allclose(snapshot.popularity[rows], [0, 0.2, 0.4, 0.6])
+        english = snapshot.vocab["language"]["english"]
+        self.assertEqual(
+            snapshot.codes["language"][rows].tolist(), [-1, english, english, english]
+        )
+        self.assertEqual(
+            sorted(snapshot.genres_of(rows[0]).tolist()),
+            sorted(g.pk for g in self.genres[:2]),
+        )
+        self.assertEqual(len(snapshot.genres_of(rows[2])), 0)
+        self.assertFalse(snapshot.genre_ids.flags.writeable)
+
+    def test_shares_item_index(self):
+        index = item_index("book")
+        # Attributes and genres only: the row id map is not read again
+        with self.assertNumQueries(2):
+            snapshot = CatalogSnapshot.build("book")
+        self.assertIs(snapshot.index, index)
+
+    def test_genre_sums(self):
+        snapshot = CatalogSnapshot.build("book")
+        rows = np.array([b.row_id for b in self.books])
+        values = {self.genres[0].pk: 2.0, self.genres[2].pk: 5.0}
+        sums, lengths = snapshot.genre_sums(rows, values, default=-1.0)
+        self.assertEqual(sums.tolist(), [1.0, 5.0, 0.0, 6.0])
+        self.assertEqual(lengths.tolist(), [2, 1, 0, 3])
+
+    def test_swapped_on_new_generation(self):
+        snapshot = get_catalog_snapshot("book")
+        with self.assertNumQueries(0):
+            self.assertIs(get_catalog_snapshot("book"), snapshot)
+        invalidate_catalog_caches("book")
+        fresh = get_catalog_snapshot("book")
+        self.assertIsNot(fresh, snapshot)
+        self.assertGreater(fresh.generation, snapshot.generation)
+
+    def test_preload_builds_state_up_front(self):
+        invalidate_catalog_caches("book")
+        invalidate_catalog_caches("tvmedia")
+        try:
+            preload_engine_state()
+        finally:
+            gc.unfreeze()
+        with self.assertNumQueries(0):
+            snapshot = get_catalog_snapshot("book")
+            get_catalog_snapshot("tvmedia")
+            item_index("book")
+        self.assertEqual(len(snapshot), len(self.books))
@@ -4,6 +4,7 @@ from django.core.cache import cache
 from django.test import TestCase
 
 from Books.models import Book, Genre
+from myutils.cache_codec import cache_get
 from myutils.collaborative_filtering import (
     _similarity_cache_key,
     calculate_cosine_similarity,
@@ -156,9 +157,13 @@ class SimilarityCacheTests(TestCase):
         # First call populates cache
         result1 = get_item_similarities(self.book1.id, UserBookRating, "book")
         key = _similarity_cache_key("book", self.book1.id)
-        cached = cache.get(key)
+        cached = cache_get(key)
         self.assertIsNotNone(cached)
-        self.assertEqual(result1, cached)
+        # Cached as int32 row ids
+        row_of = dict(Book.objects.values_list("pk", "row_id"))
+        self.assertEqual([row_of[i] for _, i in result1], [i for _, i in cached])
+        for (s1, _), (s2, _) in zip(result1, cached):
+            self.assertAlmostEqual(s1, s2, places=5)
 
     def test_similarity_cache_invalidation(self):
         """Cache should be cleared after invalidation."""
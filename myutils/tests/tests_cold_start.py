@@ -1,7 +1,15 @@
+from unittest import mock
+
 from django.test import TestCase
 
 from Books.models import Book, Genre
-from myutils.cold_start import boost_new_items, get_popular_by_genre
+from myutils.cold_start import (
+    NEW_ITEM_MIN_RATINGS,
+    boost_new_items,
+    get_new_item_pools,
+    get_genre_leaderboards,
+    get_popular_by_genre,
+)
 from users.models import CustomUser, UserBookRating
 
 
@@ -75,6 +83,27 @@ class GetPopularByGenreTests(TestCase):
         self.assertIn(self.book1, result_items)
         self.assertNotIn(self.book2, result_items)
 
+    def test_preference_weighted_merge(self):
+        """Genre weights scale scores before the leaderboards are merged."""
+        results = get_popular_by_genre(
+            item_model=Book,
+            genre_prefs={self.genre1: -5.0, self.genre2: 5.0},
+            limit=10,
+        )
+        self.assertEqual(results, [(60.0, self.book2), (0.0, self.book1)])
+
+    def test_leaderboards_cached_until_catalog_change(self):
+        get_genre_leaderboards(Book, [self.genre1.pk])
+        with self.assertNumQueries(0):
+            boards = get_genre_leaderboards(Book, [self.genre1.pk])
+        self.assertEqual(boards[self.genre1.pk], [(95.0, self.book1.pk)])
+
+        self.book3.genre.add(self.genre1)
+        boards = get_genre_leaderboards(Book, [self.genre1.pk])
+        self.assertEqual(
+            boards[self.genre1.pk], [(95.0, self.book1.pk), (80.0, self.book3.pk)]
+        )
+
 
 class BoostNewItemsTests(TestCase):
     def setUp(self):
@@ -142,3 +171,90 @@ class BoostNewItemsTests(TestCase):
         )
         boosted_pks = {item.pk for _, item in boosted}
         self.assertNotIn(self.new_book.pk, boosted_pks)
+
+
+class NewItemPoolTests(TestCase):
+    def setUp(self):
+        self.genre = Genre.objects.create(name="PoolGenre")
+        self.other_genre = Genre.objects.create(name="PoolOtherGenre")
+        self.book = Book.objects.create(
+            title="Pool Book",
+            author="Author",
+            isbn="pool-1",
+            description="Desc",
+            language="English",
+            pages=100,
+            likedPercent=50,
+        )
+        self.book.genre.add(self.genre, self.other_genre)
+        self.raters = [
+            CustomUser.objects.create_user(
+                email=f"pool{i}@example.com", password="password", first_name="Pool"
+            )
+            for i in range(NEW_ITEM_MIN_RATINGS)
+        ]
+
+    def _pool(self):
+        return get_new_item_pools(Book, "book", [self.genre.pk])[self.genre.pk]
+
+    def test_pool_maps_item_to_genre_count(self):
+        self.assertEqual(self._pool(), {self.book.pk: (2, self.book.row_id)})
+
+    def test_item_leaves_and_reenters_pool_on_threshold(self):
+        self._pool()
+        for user in self.raters:
+            UserBookRating.objects.create(user=user, book=self.book, rating=6)
+        self.assertNotIn(self.book.pk, self._pool())
+
+        UserBookRating.objects.filter(user=self.raters[0]).delete()
+        self.assertEqual(self._pool(), {self.book.pk: (2, self.book.row_id)})
+
+    def test_pool_keeps_most_recent_items(self):
+        newer = Book.objects.create(
+            title="Newer Pool Book",
+            author="Author",
+            isbn="pool-3",
+            language="English",
+            pages=100,
+            likedPercent=50,
+        )
+        newer.genre.add(self.genre)
+        with mock.patch("myutils.cold_start.NEW_ITEM_POOL_SIZE", 1):
+            self.assertEqual(self._pool(), {newer.pk: (1, newer.row_id)})
+            for user in self.raters:
+                UserBookRating.objects.create(user=user, book=newer, rating=6)
+            # A full pool losing an item is rebuilt, refilling it from the DB
+            self.assertEqual(self._pool(), {self.book.pk: (2, self.book.row_id)})
+
+    def test_update_writes_a_new_pool_version(self):
+        stale = self._pool()
+        for user in self.raters:
+            UserBookRating.objects.create(user=user, book=self.book, rating=6)
+        self.assertIn(self.book.pk, stale)
+        self.assertNotIn(self.book.pk, self._pool())
+
+    def test_genre_change_invalidates_pool(self):
+        self._pool()
+        self.book.genre.remove(self.genre)
+        self.assertEqual(self._pool(), {})
+
+    def test_boost_prefers_full_genre_overlap(self):
+        partial = Book.objects.create(
+            title="Partial Book",
+            author="Author",
+            isbn="pool-2",
+            description="Desc",
+            language="English",
+            pages=100,
+            likedPercent=50,
+        )
+        partial.genre.add(self.genre, Genre.objects.create(name="PoolThirdGenre"))
+        boosted = boost_new_items(
+            recommendations=[],
+            interaction_model=UserBookRating,
+            item_field="book",
+            genre_prefs={self.genre: 5.0, self.other_genre: 3.0},
+            item_model=Book,
+        )
+        self.assertEqual([item for _, item in boosted], [self.book, partial])
+        self.assertEqual([score for score, _ in boosted], [15.0, 7.5])
@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from Books.models import Book
+from myutils.collaborative_filtering import get_item_similarities
+from myutils.cooccurrence import rebuild_cooccurrence, refresh_cooccurrence
+from myutils.models import ItemCoRating, StaleCoRatingItem
+from users.models import CustomUser, UserBookRating
+
+
+@override_settings(SIMILARITY_BACKEND="cooccurrence")
+class CooccurrenceTests(TestCase):
+    def setUp(self):
+        self.users = [
+            CustomUser.objects.create_user(
+                email=f"cooc{i}@example.com", password="password", first_name="C"
+            )
+            for i in range(4)
+        ]
+        self.books = [
+            Book.objects.create(
+                title=f"Cooc{i}", author="A", isbn=f"cooc-{i}", pages=1, likedPercent=1
+            )
+            for i in range(4)
+        ]
+        for i, user in enumerate(self.users):
+            for j, book in enumerate(self.books[: i + 2]):
+                UserBookRating.objects.create(
+                    user=user, book=book, rating=(i * 3 + j) % 10 + 1
+                )
+
+    def _similarities(self, book, backend):
+        with self.settings(SIMILARITY_BACKEND=backend):
+            return {
+                pk: sim
+                for sim, pk in get_item_similarities(
+                    book.pk, UserBookRating, "book", use_cache=False
+                )
+            }
+
+    def _assert_matches_scan(self):
+        for book in self.books:
+            expected = self._similarities(book, "python")
+            actual = self._similarities(book, "cooccurrence")
+            self.assertEqual(expected.keys(), actual.keys())
+            for pk, sim in expected.items():
+                self.assertAlmostEqual(actual[pk], sim)
+
+    def test_rebuild_matches_python_scan(self):
+        rebuild_cooccurrence("book")
+        diagonal = ItemCoRating.objects.get(
+            item_field="book", item_a=self.books[0].pk, item_b=self.books[0].pk
+        )
+        self.assertEqual(diagonal.co_count, 4)
+        self._assert_matches_scan()
+
+    def test_incremental_refresh_after_update_and_delete(self):
+        rebuild_cooccurrence("book")
+        UserBookRating.objects.update_or_create(
+            user=self.users[0], book=self.books[1], defaults={"rating": 10}
+        )
+        UserBookRating.objects.filter(user=self.users[3], book=self.books[3]).delete()
+        self.assertTrue(StaleCoRatingItem.objects.exists())
+
+        changed = refresh_cooccurrence("book")
+        self.assertEqual(changed, 2)
+        self.assertFalse(StaleCoRatingItem.objects.exists())
+        self._assert_matches_scan()
+
+    def test_command(self):
+        out = StringIO()
+        call_command("refresh_cooccurrence", "--type", "book", "--full", stdout=out)
+        self.assertIn("rebuilt", out.getvalue())
+        call_command("refresh_cooccurrence", "--type", "book", stdout=out)
+        self.assertIn("0 items refreshed", out.getvalue())
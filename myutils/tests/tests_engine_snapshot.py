@@ -0,0 +1,113 @@
+import gc
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from Books.models import Book, Genre
+from myutils.catalog import catalog_version
+from myutils.catalog_snapshot import CatalogSnapshot, get_catalog_snapshot
+from myutils.engine_snapshot import read_engine_snapshot, warm_start
+from myutils.item_index import item_index
+from myutils.preload import preload_engine_state
+
+
+class EngineSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.parent = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.parent)
+        self.directory = os.path.join(self.parent, "snapshot")
+        genres = [Genre.objects.create(name=f"Disk {i}") for i in range(2)]
+        self.books = []
+        for i in range(3):
+            book = Book.objects.create(
+                title=f"Disk {i}",
+                author=f"Author {i % 2}",
+                language="English",
+                isbn=f"disk-{i}",
+                pages=1,
+                likedPercent=30 * i,
+            )
+            book.genre.set(genres[: i + 1])
+            self.books.append(book)
+        self.books[1].delete()
+
+    def _export(self):
+        call_command(
+            "export_engine_snapshot",
+            self.directory,
+            "--type",
+            "book",
+            stdout=StringIO(),
+        )
+
+    def test_round_trip(self):
+        self._export()
+        built = CatalogSnapshot.build("book")
+        loaded = read_engine_snapshot(self.directory, "book")
+        self.assertEqual(loaded.generation, built.generation)
+        np.testing.assert_array_equal(loaded.index.ids, built.index.ids)
+        self.assertIsInstance(loaded.index.ids, np.memmap)
+        self.assertEqual(
+            loaded.pks_of([0, 1, 2]), [self.books[0].pk, None, self.books[2].pk]
+        )
+        self.assertEqual(loaded.vocab, built.vocab)
+        for name in ("present", "popularity", "genre_indptr", "genre_ids"):
+            np.testing.assert_array_equal(getattr(loaded, name), getattr(built, name))
+        self.assertFalse(loaded.genre_ids.flags.writeable)
+
+    def test_corrupted_array_rejected(self):
+        self._export()
+        with open(os.path.join(self.directory, "book", "genre_ids.npy"), "ab") as f:
+            f.write(b"\0")
+        with self.assertRaisesMessage(CommandError, "Checksum mismatch"):
+            call_command("load_engine_snapshot", self.directory, stdout=StringIO())
+
+    def test_load_adopts_generation_and_warm_starts(self):
+        self._export()
+        generation = catalog_version("book")
+        cache.clear()
+        call_command("load_engine_snapshot", self.directory, stdout=StringIO())
+        self.assertEqual(catalog_version("book"), generation)
+
+        with override_settings(ENGINE_SNAPSHOT_DIR=self.directory):
+            with self.assertNumQueries(0):
+                self.assertTrue(warm_start("book"))
+                snapshot = get_catalog_snapshot("book")
+                index = item_index("book")
+        self.assertEqual(snapshot.generation, generation)
+        self.assertEqual(index.rows([self.books[2].pk]).tolist(), [2])
+
+    def test_load_rejects_other_generation(self):
+        self._export()
+        cache.set("catalog_version:book", 1, None)
+        with self.assertRaisesMessage(CommandError, "export a new snapshot"):
+            call_command("load_engine_snapshot", self.directory, stdout=StringIO())
+
+    def test_reexport_replaces_directory(self):
+        self._export()
+        Book.objects.create(title="Disk 3", isbn="disk-3", pages=1, likedPercent=5)
+        self._export()
+        self.assertEqual(os.listdir(self.parent), ["snapshot"])
+        loaded = read_engine_snapshot(self.directory, "book")
+        self.assertEqual(loaded.generation, catalog_version("book"))
+
+    def test_corrupted_snapshot_falls_back_to_database(self):
+        self._export()
+        with open(os.path.join(self.directory, "book", "item_ids.npy"), "ab") as f:
+            f.write(b"\0")
+        with override_settings(ENGINE_SNAPSHOT_DIR=self.directory):
+            with self.assertLogs("myutils.engine_snapshot", "ERROR") as logs:
+                self.assertFalse(warm_start("book"))
+                try:
+                    preload_engine_state()
+                finally:
+                    gc.unfreeze()
+        self.assertIn("Checksum mismatch", logs.output[0])
+        self.assertEqual(len(get_catalog_snapshot("book")), 3)
@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from Books.models import Book, Genre
+from moviesNshows.models import Genre as TvGenre
+from moviesNshows.models import TvMedia
+from myutils.catalog import catalog_cache_key
+from myutils.explore import (
+    build_explore_snapshot,
+    explore_stamp,
+    get_explore_snapshot,
+)
+
+
+class ExploreSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.genres = [Genre.objects.create(name=f"Explore{i}") for i in range(3)]
+        for i in range(12):
+            book = Book.objects.create(
+                title=f"Explored {i}",
+                author=f"Author {i}",
+                isbn=f"explore-{i}",
+                pages=100,
+                likedPercent=i,
+            )
+            book.genre.set(self.genres[: i % 3 + 1])
+        tv_genre = TvGenre.objects.create(name="ExploreTv")
+        show = TvMedia.objects.create(
+            media_type="Movie", original_title="Explored Show", startyear=2020
+        )
+        show.genre.add(tv_genre)
+
+    def test_snapshot_sections(self):
+        snapshot = build_explore_snapshot("book")
+        self.assertEqual(len(snapshot["recent"]), 10)
+        self.assertEqual(
+            [row["title"] for row in snapshot["most_liked"][:2]],
+            ["Explored 11", "Explored 10"],
+        )
+        self.assertEqual(snapshot["genres"][0]["name"], "Explore0")
+        self.assertEqual(len(snapshot["genres"][0]["rows"]), 10)
+        self.assertTrue(snapshot["recent"][0]["cover_url"])
+        tv = build_explore_snapshot("tvmedia")
+        self.assertEqual(tv["genres"][0]["rows"][0]["original_title"], "Explored Show")
+
+    def test_steady_state_renders_without_queries(self):
+        for name in ("explore books", "explore tvmedia"):
+            with self.subTest(name=name):
+                url = reverse(name)
+                self.assertEqual(self.client.get(url).status_code, 200)
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                self.assertContains(response, "Explored")
+
+    def test_catalog_edit_rebuilds_sections(self):
+        url = reverse("explore books")
+        self.client.get(url)
+        Book.objects.create(
+            title="Newly Liked",
+            author="A",
+            isbn="explore-new",
+            pages=1,
+            likedPercent=99,
+        )
+        self.assertContains(self.client.get(url), "Newly Liked")
+
+    def test_refresh_command(self):
+        out = StringIO()
+        call_command("refresh_explore_snapshots", type="book", stdout=out)
+        self.assertIn("book: 3 genre sections built", out.getvalue())
+        with self.assertNumQueries(0):
+            get_explore_snapshot("book")
+
+    def test_refresh_reaches_fragments_and_etag(self):
+        url = reverse("explore books")
+        first = self.client.get(url)
+        last = get_explore_snapshot("book")["genres"][0]["rows"][-1]["title"]
+        # Ratings reorder the genre carousels without a catalog edit
+        Book.objects.filter(title=last).update(rating_count=50)
+        self.assertEqual(self.client.get(url).content, first.content)
+        call_command("refresh_explore_snapshots", type="book", stdout=StringIO())
+        genre = get_explore_snapshot("book")["genres"][0]
+        self.assertEqual(genre["rows"][0]["title"], last)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+        self.assertNotEqual(response.content, first.content)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_expired_stamp_rebuilds(self):
+        stamp = explore_stamp("book")
+        last = get_explore_snapshot("book")["genres"][0]["rows"][-1]["title"]
+        Book.objects.filter(title=last).update(rating_count=50)
+        cache.delete(catalog_cache_key("explore_stamp_book", "book"))
+        self.assertGreater(explore_stamp("book"), stamp)
+        genre = get_explore_snapshot("book")["genres"][0]
+        self.assertEqual(genre["rows"][0]["title"], last)
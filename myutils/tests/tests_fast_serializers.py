@@ -0,0 +1,67 @@
+import json
+
+from django.test import TestCase
+
+from Books.models import Book, Genre
+from Books.serializers import BookSerializer
+from moviesNshows.models import Genre as TvGenre
+from moviesNshows.models import TvMedia
+from moviesNshows.serializers import TvMediaSerializer
+from myutils.fast_serializers import FastBookListSerializer, FastTvMediaListSerializer
+
+
+class FastSerializerTests(TestCase):
+    def setUp(self):
+        genres = [Genre.objects.create(name=n) for n in ("Zeta", "Alpha", "Mid")]
+        for i in range(4):
+            book = Book.objects.create(
+                title=f"Fast {i}",
+                author="Author",
+                isbn=f"fast-{i}",
+                description="Desc",
+                language="English",
+                pages=100 + i,
+                likedPercent=i * 10,
+            )
+            book.genre.set(genres[i % 3 :][::-1])
+        tv_genres = [TvGenre.objects.create(name=n) for n in ("Drama", "Action")]
+        TvMedia.objects.create(
+            media_type="Movie", original_title="No Year", primary_title=None
+        )
+        media = TvMedia.objects.create(
+            media_type="Series",
+            original_title="Adult",
+            primary_title="Adult",
+            over18=True,
+            startyear=1999,
+            length=42,
+        )
+        media.genre.set(tv_genres)
+
+    def _assert_same_json(self, fast, slow):
+        self.assertEqual(json.dumps(fast), json.dumps(slow))
+
+    def test_books_match_drf_output(self):
+        queryset = Book.objects.order_by("isbn")
+        slow = BookSerializer(queryset, many=True).data
+        self._assert_same_json(FastBookListSerializer(queryset).data, slow)
+        self._assert_same_json(FastBookListSerializer(list(queryset)).data, slow)
+
+    def test_tvmedia_match_drf_output(self):
+        queryset = TvMedia.objects.order_by("original_title")
+        slow = TvMediaSerializer(queryset, many=True).data
+        self._assert_same_json(FastTvMediaListSerializer(queryset).data, slow)
+        self._assert_same_json(FastTvMediaListSerializer(list(queryset)).data, slow)
+
+    def test_two_queries_for_queryset(self):
+        with self.assertNumQueries(2):
+            FastBookListSerializer(Book.objects.all()).data
+        self.assertEqual(FastBookListSerializer([]).data, [])
+
+    def test_field_subset_skips_genre_query(self):
+        slow = BookSerializer(Book.objects.order_by("isbn"), many=True).data
+        with self.assertNumQueries(1):
+            fast = FastBookListSerializer(
+                Book.objects.order_by("isbn"), fields=["title", "id"]
+            ).data
+        self.assertEqual(fast, [{"id": e["id"], "title": e["title"]} for e in slow])
@@ -0,0 +1,72 @@
+import uuid
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from Books.models import Book
+from moviesNshows.models import TvMedia
+from myutils.item_index import assign_row_ids, item_index
+from myutils.rated_items import rated_items
+from users.models import CustomUser, UserBookRating
+
+
+def _book(i):
+    return Book(title=f"Row {i}", author="A", isbn=f"row-{i}", pages=1, likedPercent=1)
+
+
+class ItemRowIdTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_assigned_on_create_and_never_reused(self):
+        first = _book(0)
+        first.save()
+        second = _book(1)
+        second.save()
+        self.assertEqual(second.row_id, first.row_id + 1)
+        second.delete()
+        third = _book(2)
+        third.save()
+        self.assertEqual(third.row_id, first.row_id + 2)
+        show = TvMedia.objects.create(media_type="Movie", original_title="Row")
+        self.assertEqual(show.row_id, 0)
+
+    def test_bulk_created_items_backfilled(self):
+        Book.objects.bulk_create([_book(i) for i in range(3)])
+        call_command("assign_row_ids", "--type", "book", stdout=StringIO())
+        rows = sorted(Book.objects.values_list("row_id", flat=True))
+        self.assertEqual(rows, [0, 1, 2])
+
+    def test_index_maps_both_ways(self):
+        books = [_book(i) for i in range(3)]
+        for book in books:
+            book.save()
+        books[1].delete()
+        index = item_index("book")
+        self.assertEqual(
+            index.pks_of([0, 1, 2, 9]), [books[0].pk, None, books[2].pk, None]
+        )
+        self.assertEqual(index.rows([books[2].pk]).tolist(), [2])
+        self.assertEqual(
+            index.rows([uuid.uuid4(), books[0].pk, "not-a-uuid"]).tolist(), [-1, 0, -1]
+        )
+        self.assertEqual(index.row(str(books[2].pk)), 2)
+        self.assertIsNone(index.row(books[1].pk))
+        self.assertEqual(index.ids.shape, (3, 16))
+
+    def test_backfill_drops_stale_rated_bitmaps(self):
+        (book,) = Book.objects.bulk_create([_book(0)])
+        user = CustomUser.objects.create_user(
+            email="rows@example.com", password="password", first_name="R"
+        )
+        UserBookRating.objects.create(user=user, book=book, rating=8)
+        # Built while the book had no row id, so it cannot hold it
+        with self.assertLogs("myutils.item_index", "WARNING") as logs:
+            self.assertEqual(len(rated_items(user.pk, "book")), 0)
+        self.assertIn("1 book items have no row_id", logs.output[0])
+
+        assign_row_ids("book")
+        with self.assertNoLogs("myutils.item_index", "WARNING"):
+            self.assertIn(book.pk, rated_items(user.pk, "book"))
@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from Books.models import Book
+from myutils.bulk_ratings import bulk_upsert_ratings
+from myutils.item_stats import recompute_item_stats
+from users.models import CustomUser, UserBookRating
+
+
+class ItemStatsTests(TestCase):
+    def setUp(self):
+        self.users = [
+            CustomUser.objects.create_user(
+                email=f"stats{i}@example.com", password="password", first_name="S"
+            )
+            for i in range(3)
+        ]
+        self.book = Book.objects.create(
+            title="Stats", author="A", isbn="stats-1", pages=100, likedPercent=70
+        )
+
+    def _stats(self):
+        self.book.refresh_from_db()
+        return (
+            self.book.rating_count,
+            self.book.rating_sum,
+            self.book.high_rating_count,
+        )
+
+    def test_create_update_delete(self):
+        UserBookRating.objects.create(user=self.users[0], book=self.book, rating=9)
+        UserBookRating.objects.create(user=self.users[1], book=self.book, rating=4)
+        self.assertEqual(self._stats(), (2, 13, 1))
+
+        UserBookRating.objects.update_or_create(
+            user=self.users[1], book=self.book, defaults={"rating": 8}
+        )
+        self.assertEqual(self._stats(), (2, 17, 2))
+
+        UserBookRating.objects.get(user=self.users[0], book=self.book).delete()
+        self.assertEqual(self._stats(), (1, 8, 1))
+
+    def test_bulk_import_updates_stats(self):
+        for user in self.users:
+            bulk_upsert_ratings(user, "book", [(self.book.pk, 7)])
+        self.assertEqual(self._stats(), (3, 21, 3))
+
+    def test_user_deletion_removes_ratings_from_stats(self):
+        UserBookRating.objects.create(user=self.users[0], book=self.book, rating=9)
+        self.users[0].delete()
+        self.assertEqual(self._stats(), (0, 0, 0))
+
+    def test_reconcile(self):
+        UserBookRating.objects.create(user=self.users[0], book=self.book, rating=9)
+        Book.objects.filter(pk=self.book.pk).update(rating_count=40, rating_sum=1)
+        self.assertEqual(recompute_item_stats("book"), 1)
+        self.assertEqual(self._stats(), (1, 9, 1))
+
+        out = StringIO()
+        call_command("reconcile_rating_stats", stdout=out)
+        self.assertIn("book: 0 items corrected", out.getvalue())
@@ -0,0 +1,96 @@
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from Books.models import Book, Genre
+from myutils.bulk_ratings import bulk_upsert_ratings
+from myutils.cache_codec import decode_bitmap, encode_bitmap
+from myutils.content_based_filtering import (
+    get_content_based_recommendations,
+    ranked_genre_rows,
+)
+from myutils.rated_items import RatedItems, rated_items, rated_items_cache_key
+from users.models import CustomUser, UserBookRating
+
+
+class BitmapCodecTests(TestCase):
+    def test_round_trip(self):
+        for size in (0, 1, 9, 1000):
+            bits = np.zeros(size, dtype=bool)
+            bits[::7] = True
+            np.testing.assert_array_equal(decode_bitmap(encode_bitmap(bits)), bits)
+
+    def test_sparse_bitmap_is_small(self):
+        bits = np.zeros(100_000, dtype=bool)
+        bits[[3, 500, 99_999]] = True
+        self.assertLess(len(encode_bitmap(bits)), 200)
+
+
+class RatedItemsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.genre = Genre.objects.create(name="Rated")
+        self.books = []
+        for i in range(6):
+            book = Book.objects.create(
+                title=f"Rated {i}",
+                author="A",
+                isbn=f"rated-{i}",
+                pages=1,
+                likedPercent=90 - i,
+            )
+            book.genre.add(self.genre)
+            self.books.append(book)
+        self.user = CustomUser.objects.create_user(
+            email="rated@example.com", password="password", first_name="R"
+        )
+
+    def test_mask(self):
+        rated = RatedItems.from_pks("book", [self.books[1].pk, self.books[4].pk])
+        pks = [b.pk for b in self.books]
+        self.assertEqual(
+            rated.mask(pks).tolist(), [False, True, False, False, True, False]
+        )
+        self.assertEqual(len(rated), 2)
+        self.assertIn(self.books[1].pk, rated)
+
+    def test_cached_and_dropped_on_rating_writes(self):
+        rating = UserBookRating.objects.create(
+            user=self.user, book=self.books[0], rating=8
+        )
+        self.assertIn(self.books[0].pk, rated_items(self.user.pk, "book"))
+        with self.assertNumQueries(0):
+            rated_items(self.user.pk, "book")
+
+        bulk_upsert_ratings(self.user, "book", [(self.books[2].pk, 5)])
+        self.assertIsNone(cache.get(rated_items_cache_key("book", self.user.pk)))
+        self.assertIn(self.books[2].pk, rated_items(self.user.pk, "book"))
+
+        rating.delete()
+        self.assertNotIn(self.books[0].pk, rated_items(self.user.pk, "book"))
+
+    def test_private_recommendations_skip_rated_items(self):
+        for book in self.books[:3]:
+            UserBookRating.objects.create(user=self.user, book=book, rating=9)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = client.get(reverse("books-recommend-private") + "?version=2").json()
+        ids = {entry["book"]["id"] for entry in data["data"]}
+        self.assertEqual(ids, {str(b.pk) for b in self.books[3:]})
+
+    def test_genre_budget_counts_unrated_items(self):
+        # Rating makes these the genre's most rated items
+        for book in self.books[:3]:
+            UserBookRating.objects.create(user=self.user, book=book, rating=9)
+        rated = rated_items(self.user.pk, "book")
+        unrated = {b.row_id for b in self.books[3:]}
+
+        rows = ranked_genre_rows(Book, "book", [self.genre.pk], 3, rated)
+        self.assertEqual(set(rows[self.genre.pk]), unrated)
+
+        recs = get_content_based_recommendations(
+            {self.genre: 5.0}, 1, 3, allowed_types=("books",), already_rated=rated
+        )
+        self.assertEqual({item.row_id for _, item in recs}, unrated)
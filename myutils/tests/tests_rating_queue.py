@@ -0,0 +1,117 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from Books.models import Book, Genre
+from myutils.cache_codec import recommendation_cache_key
+from myutils import rating_queue
+from myutils.rating_queue import MAX_EVENT_ATTEMPTS, process_pending_events
+from users.models import (
+    CustomUser,
+    RatingEvent,
+    UserBookRating,
+    UserBooksGenrePreference,
+)
+
+
+@override_settings(RATING_WORK_MODE="deferred")
+class DeferredRatingQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email="queue@example.com", password="password", first_name="Queue"
+        )
+        self.genre = Genre.objects.create(name="QueueGenre")
+        self.book1 = Book.objects.create(
+            title="Q1", author="A", isbn="q-1", pages=100, likedPercent=80
+        )
+        self.book1.genre.add(self.genre)
+        self.book2 = Book.objects.create(
+            title="Q2", author="A", isbn="q-2", pages=100, likedPercent=80
+        )
+        self.book2.genre.add(self.genre)
+
+    def test_rating_write_only_enqueues(self):
+        UserBookRating.objects.create(user=self.user, book=self.book1, rating=8)
+        self.assertEqual(RatingEvent.objects.count(), 1)
+        self.assertFalse(
+            UserBooksGenrePreference.objects.filter(user=self.user).exists()
+        )
+
+    def test_burst_is_coalesced(self):
+        cache_key = recommendation_cache_key("book", self.user.pk)
+        cache.set(cache_key, "stale")
+        UserBookRating.objects.create(user=self.user, book=self.book1, rating=8)
+        UserBookRating.objects.create(user=self.user, book=self.book2, rating=4)
+        UserBookRating.objects.update_or_create(
+            user=self.user, book=self.book2, defaults={"rating": 6}
+        )
+        self.assertEqual(RatingEvent.objects.count(), 3)
+        self.assertEqual(cache.get(cache_key), "stale")
+
+        self.assertEqual(process_pending_events(), 3)
+
+        pref = UserBooksGenrePreference.objects.get(user=self.user, genre=self.genre)
+        self.assertEqual((pref.weighted_sum, pref.count), (14, 2))
+        self.assertIsNone(cache.get(cache_key))
+        self.assertFalse(RatingEvent.objects.exists())
+
+    def test_delete_is_deferred(self):
+        rating = UserBookRating.objects.create(
+            user=self.user, book=self.book1, rating=8
+        )
+        process_pending_events()
+        rating.delete()
+        process_pending_events()
+        self.assertFalse(
+            UserBooksGenrePreference.objects.filter(user=self.user).exists()
+        )
+
+    def test_command_drains_queue(self):
+        UserBookRating.objects.create(user=self.user, book=self.book1, rating=8)
+        out = StringIO()
+        call_command("process_rating_events", stdout=out)
+        self.assertIn("1 events processed", out.getvalue())
+        self.assertFalse(RatingEvent.objects.exists())
+
+    def test_failing_user_does_not_block_the_queue(self):
+        other = CustomUser.objects.create_user(
+            email="queue2@example.com", password="password", first_name="Other"
+        )
+        UserBookRating.objects.create(user=self.user, book=self.book1, rating=8)
+        UserBookRating.objects.create(user=other, book=self.book1, rating=6)
+        apply = rating_queue.apply_rating_changes
+
+        def fail_for_first_user(user_id, *args, **kwargs):
+            if user_id == self.user.pk:
+                raise RuntimeError("boom")
+            return apply(user_id, *args, **kwargs)
+
+        with mock.patch.object(
+            rating_queue, "apply_rating_changes", side_effect=fail_for_first_user
+        ), self.assertLogs("myutils.rating_queue", "ERROR"):
+            for _ in range(MAX_EVENT_ATTEMPTS):
+                process_pending_events()
+            self.assertEqual(process_pending_events(), 0)
+
+        self.assertTrue(UserBooksGenrePreference.objects.filter(user=other).exists())
+        event = RatingEvent.objects.get()
+        self.assertEqual(event.user_id, self.user.pk)
+        self.assertTrue(event.failed)
+        self.assertEqual(event.attempts, MAX_EVENT_ATTEMPTS)
+        self.assertIn("boom", event.last_error)
+
+
+class SyncRatingModeTests(TestCase):
+    def test_sync_mode_does_not_enqueue(self):
+        user = CustomUser.objects.create_user(
+            email="sync@example.com", password="password", first_name="Sync"
+        )
+        book = Book.objects.create(
+            title="S1", author="A", isbn="s-1", pages=100, likedPercent=80
+        )
+        UserBookRating.objects.create(user=user, book=book, rating=8)
+        self.assertFalse(RatingEvent.objects.exists())
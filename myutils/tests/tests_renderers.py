@@ -0,0 +1,51 @@
+import datetime
+import uuid
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from Books.models import Book, Genre
+from myutils import renderers
+from myutils.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(TestCase):
+    payload = {
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "score": 95.5,
+        "price": Decimal("9.99"),
+        "when": datetime.datetime(2024, 1, 2, 3, 4, 5, 678901),
+        "text": "café   line",
+        "nested": ReturnList([ReturnDict({"a": 1}, serializer=None)], serializer=None),
+        3: None,
+    }
+
+    def test_matches_stdlib_renderer(self):
+        expected = JSONRenderer().render(self.payload)
+        self.assertEqual(FastJSONRenderer().render(self.payload), expected)
+
+    def test_fallbacks(self):
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+        indented = FastJSONRenderer().render(self.payload, "application/json; indent=2")
+        self.assertEqual(
+            indented, JSONRenderer().render(self.payload, "application/json; indent=2")
+        )
+        with patch.object(renderers, "orjson", None):
+            self.assertEqual(
+                FastJSONRenderer().render(self.payload),
+                JSONRenderer().render(self.payload),
+            )
+
+    def test_api_uses_fast_renderer(self):
+        genre = Genre.objects.create(name="Render")
+        book = Book.objects.create(
+            title="Rendered", author="A", isbn="render-1", pages=1, likedPercent=1
+        )
+        book.genre.add(genre)
+        response = self.client.get(reverse("books-all"))
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.json()["data"][0]["genre"], ["Render"])
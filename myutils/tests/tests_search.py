@@ -0,0 +1,70 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from Books.models import Book
+from myutils.search import TrigramIndex, search_catalog
+
+
+class TrigramIndexTests(TestCase):
+    def test_substring_match_and_ranking(self):
+        index = TrigramIndex(
+            [
+                (1, ["The Winter Garden", "Ann Lee"]),
+                (2, ["Winter", "Bo Chan"]),
+                (3, ["Summer Nights", "Wint Ers"]),
+            ]
+        )
+        results = index.search("Winter", 10)
+        self.assertEqual([pk for _, pk in results], [2, 1])
+        self.assertEqual(results[0][0], 1.0)
+
+    def test_short_queries_scan(self):
+        index = TrigramIndex([(1, ["ab cd"]), (2, ["xy"])])
+        self.assertEqual([pk for _, pk in index.search("b", 10)], [1])
+
+
+class SearchCatalogTests(TestCase):
+    def setUp(self):
+        self.exact = Book.objects.create(
+            title="Dune", author="Frank Herbert", isbn="s-1", pages=1, likedPercent=1
+        )
+        self.partial = Book.objects.create(
+            title="Dune Messiah",
+            author="Frank Herbert",
+            isbn="s-2",
+            pages=1,
+            likedPercent=1,
+        )
+        Book.objects.create(
+            title="Emma", author="Jane Austen", isbn="s-3", pages=1, likedPercent=1
+        )
+
+    def test_ranked_results(self):
+        results = search_catalog(Book, "dune")
+        self.assertEqual([item for _, item in results], [self.exact, self.partial])
+
+    def test_index_follows_catalog_changes(self):
+        search_catalog(Book, "dune")
+        self.exact.title = "Children of Dune"
+        self.exact.save()
+        new = Book.objects.create(
+            title="Dunes", author="X", isbn="s-4", pages=1, likedPercent=1
+        )
+        results = {item for _, item in search_catalog(Book, "dune")}
+        self.assertEqual(results, {self.exact, self.partial, new})
+        self.assertEqual(search_catalog(Book, "austen")[0][1].title, "Emma")
+
+    def test_search_endpoint(self):
+        response = self.client.get(reverse("books-search"), {"q": "herbert"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["length"], 2)
+        self.assertIn("relevance", response.json()["data"][0])
+        self.assertEqual(self.client.get(reverse("books-search")).status_code, 400)
+
+    def test_filter_id_is_exact(self):
+        url = reverse("books-filter")
+        response = self.client.get(url, {"id": str(self.exact.pk)})
+        self.assertEqual(
+            [b["id"] for b in response.json()["data"]], [str(self.exact.pk)]
+        )
+        self.assertEqual(self.client.get(url, {"id": "abc"}).status_code, 400)
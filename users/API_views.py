@@ -4,8 +4,12 @@ from rest_framework.response import Response
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 from rest_framework.views import APIView
 
+from myutils.bulk_ratings import bulk_upsert_ratings
+
 from .serializers import (
     BookRatingSerializer,
+    BulkBookRatingSerializer,
+    BulkTvMediaRatingSerializer,
     CustomUser,
     TvMediaRatingSerializer,
     UserBookRating,
@@ -72,6 +76,38 @@ class RateTvMedia(generics.CreateAPIView):
         serializer.save(user=self.request.user)
 
 
+class BulkRateBooks(APIView):
+    throttle_classes = [UserRateThrottle]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkBookRatingSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        result = bulk_upsert_ratings(
+            request.user,
+            "book",
+            [(r["book"], r["rating"]) for r in serializer.validated_data["ratings"]],
+        )
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class BulkRateTvMedia(APIView):
+    throttle_classes = [UserRateThrottle]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkTvMediaRatingSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        result = bulk_upsert_ratings(
+            request.user,
+            "tvmedia",
+            [(r["tvmedia"], r["rating"]) for r in serializer.validated_data["ratings"]],
+        )
+        return Response(result, status=status.HTTP_200_OK)
+
+
 class UserGenrePreferencesView(APIView):
     permission_classes = [IsAuthenticated]
 
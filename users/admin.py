@@ -2,6 +2,7 @@ from django.contrib import admin
 
 from .models import (
     CustomUser,
+    RatingEvent,
     UserBookRating,
     UserBooksGenrePreference,
     UserTvMediaGenrePreference,
@@ -13,3 +14,4 @@ admin.site.register(UserBooksGenrePreference)
 admin.site.register(UserBookRating)
 admin.site.register(UserTvMediaGenrePreference)
 admin.site.register(UserTvMediaRating)
+admin.site.register(RatingEvent)
@@ -3,18 +3,27 @@ from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models, transaction
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 from Books.models import Book
 from Books.models import Genre as BookGenre
 from moviesNshows.models import Genre as TvGenre
 from moviesNshows.models import TvMedia
+from myutils.cache_codec import recommendation_cache_key
 from myutils.ExtraTools import scale
+from myutils.rated_items import invalidate_rated_items
 
 Genre: BookGenre | TvGenre | None = None
 
 
+def genre_preference_from_totals(weighted_sum: float, count: int) -> float:
+    """Map a genre's rating totals (1-10 scale) onto the -5..5 preference scale."""
+    # Cap percentage at 100 for safety
+    percentage = min(round((weighted_sum / count) * 10, 2), 100.0)
+    return scale(percentage, (0, 100), (-5, 5))
+
+
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
 
@@ -52,13 +61,14 @@ class CustomUser(AbstractUser):
         return f"{self.get_full_name()}"
 
     def update_books_genre_preferences(self):
-        cache.delete(f"{self.pk}_books_recomendation")
+        cache.delete(recommendation_cache_key("book", self.pk))
         ratings = (
             self.rated_books.select_related("book")
             .prefetch_related("book__genre")
             .all()
         )
         if not ratings.exists():
+            UserBooksGenrePreference.objects.filter(user=self).delete()
             return {}
 
         genre_ratings = {}
@@ -76,41 +86,49 @@ class CustomUser(AbstractUser):
             existing_prefs = UserBooksGenrePreference.objects.filter(
                 user=self, genre__in=genres_to_update
             )
+            # Genres without ratings left keep no preference
+            UserBooksGenrePreference.objects.filter(user=self).exclude(
+                genre__in=genres_to_update
+            ).delete()
             existing_prefs_map = {pref.genre: pref for pref in existing_prefs}
 
             to_update = []
             to_create = []
             for genre, data in genre_ratings.items():
-                # Cap percentage at 100 for safety
-                percentage = min(
-                    round((data["weighted_sum"] / data["count"]) * 10, 2), 100.0
-                )
-                perf = scale(percentage, (0, 100), (-5, 5))
+                perf = genre_preference_from_totals(data["weighted_sum"], data["count"])
                 if genre in existing_prefs_map:
                     pref_obj = existing_prefs_map[genre]
-                    if pref_obj.preference != perf:
-                        pref_obj.preference = perf
-                        to_update.append(pref_obj)
+                    pref_obj.preference = perf
+                    pref_obj.weighted_sum = data["weighted_sum"]
+                    pref_obj.count = data["count"]
+                    to_update.append(pref_obj)
                 else:
                     to_create.append(
                         UserBooksGenrePreference(
-                            user=self, genre=genre, preference=perf
+                            user=self,
+                            genre=genre,
+                            preference=perf,
+                            weighted_sum=data["weighted_sum"],
+                            count=data["count"],
                         )
                     )
 
             if to_update:
-                UserBooksGenrePreference.objects.bulk_update(to_update, ["preference"])
+                UserBooksGenrePreference.objects.bulk_update(
+                    to_update, ["preference", "weighted_sum", "count"]
+                )
             if to_create:
                 UserBooksGenrePreference.objects.bulk_create(to_create)
 
     def update_media_genre_preferences(self):
-        cache.delete(f"{self.pk}_tvmedia_recomendation")
+        cache.delete(recommendation_cache_key("tvmedia", self.pk))
         ratings = (
             self.rated_tvmedia.select_related("tvmedia")
             .prefetch_related("tvmedia__genre")
             .all()
         )
         if not ratings.exists():
+            UserTvMediaGenrePreference.objects.filter(user=self).delete()
             return {}
 
         genre_ratings = {}
@@ -127,34 +145,74 @@ class CustomUser(AbstractUser):
             existing_prefs = UserTvMediaGenrePreference.objects.filter(
                 user=self, genre__in=genres_to_update
             )
+            UserTvMediaGenrePreference.objects.filter(user=self).exclude(
+                genre__in=genres_to_update
+            ).delete()
             existing_prefs_map = {pref.genre: pref for pref in existing_prefs}
 
             to_update = []
             to_create = []
             for genre, data in genre_ratings.items():
-                percentage = min(
-                    round((data["weighted_sum"] / data["count"]) * 10, 2), 100.0
-                )
-                perf = scale(percentage, (0, 100), (-5, 5))
+                perf = genre_preference_from_totals(data["weighted_sum"], data["count"])
                 if genre in existing_prefs_map:
                     pref_obj = existing_prefs_map[genre]
-                    if pref_obj.preference != perf:
-                        pref_obj.preference = perf
-                        to_update.append(pref_obj)
+                    pref_obj.preference = perf
+                    pref_obj.weighted_sum = data["weighted_sum"]
+                    pref_obj.count = data["count"]
+                    to_update.append(pref_obj)
                 else:
                     to_create.append(
                         UserTvMediaGenrePreference(
-                            user=self, genre=genre, preference=perf
+                            user=self,
+                            genre=genre,
+                            preference=perf,
+                            weighted_sum=data["weighted_sum"],
+                            count=data["count"],
                         )
                     )
 
             if to_update:
                 UserTvMediaGenrePreference.objects.bulk_update(
-                    to_update, ["preference"]
+                    to_update, ["preference", "weighted_sum", "count"]
                 )
             if to_create:
                 UserTvMediaGenrePreference.objects.bulk_create(to_create)
 
+    def apply_books_rating_change(self, book_id, old_rating, new_rating):
+        """
+        Incrementally apply one rating change to the user's book genre preferences.
+
+        ``old_rating`` is None for a new rating, ``new_rating`` is None for a
+        deleted one.  Only the rated book's genres are touched.
+        """
+        cache.delete(recommendation_cache_key("book", self.pk))
+        genre_ids = Book.genre.through.objects.filter(book_id=book_id).values_list(
+            "genre_id", flat=True
+        )
+        if not _apply_genre_rating_delta(
+            UserBooksGenrePreference, self.pk, list(genre_ids), old_rating, new_rating
+        ):
+            self.update_books_genre_preferences()
+
+    def apply_media_rating_change(self, tvmedia_id, old_rating, new_rating):
+        """
+        Incrementally apply one rating change to the user's TV media genre preferences.
+
+        See ``apply_books_rating_change``.
+        """
+        cache.delete(recommendation_cache_key("tvmedia", self.pk))
+        genre_ids = TvMedia.genre.through.objects.filter(
+            tvmedia_id=tvmedia_id
+        ).values_list("genre_id", flat=True)
+        if not _apply_genre_rating_delta(
+            UserTvMediaGenrePreference,
+            self.pk,
+            list(genre_ids),
+            old_rating,
+            new_rating,
+        ):
+            self.update_media_genre_preferences()
+
     def get_books_genre_preferences(self) -> dict[BookGenre, float]:
         return {
             pref.genre: float(pref.preference)
@@ -172,7 +230,20 @@ class CustomUser(AbstractUser):
         }
 
 
-class UserBookRating(models.Model):
+class LoadedRatingMixin:
+    """
+    Remembers the rating value as loaded from the database so that signal
+    handlers can compute the delta of an update without re-querying.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_rating = instance.__dict__.get("rating")
+        return instance
+
+
+class UserBookRating(LoadedRatingMixin, models.Model):
     user = models.ForeignKey(
         CustomUser, on_delete=models.CASCADE, related_name="rated_books"
     )
@@ -180,9 +251,21 @@ class UserBookRating(models.Model):
     rating = models.IntegerField(
         validators=[MinValueValidator(1), MaxValueValidator(10)]
     )  # 1 to 10
+    # Watermark column for the incremental co-occurrence refresh
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ("user", "book")
+        indexes = [
+            # A user's high ratings (CF seeds); covers the item column too
+            models.Index(
+                fields=["user", "rating", "book"], name="ubr_user_rating_book"
+            ),
+            # Co-raters of an item, index-only with the rating
+            models.Index(
+                fields=["book", "user", "rating"], name="ubr_book_user_rating"
+            ),
+        ]
 
     def clean(self):
         if not (1 <= self.rating <= 10):
@@ -195,15 +278,21 @@ class UserBooksGenrePreference(models.Model):
     )
     genre = models.ForeignKey(BookGenre, on_delete=models.CASCADE)
     preference = models.FloatField()
+    # Running totals of the user's ratings on items of this genre
+    weighted_sum = models.IntegerField(default=0)
+    count = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = ("user", "genre")
+        indexes = [
+            models.Index(fields=["user", "-preference"], name="ubgp_user_preference"),
+        ]
 
     def __str__(self):
         return f"{self.genre.name}: {self.preference:.2f}%"
 
 
-class UserTvMediaRating(models.Model):
+class UserTvMediaRating(LoadedRatingMixin, models.Model):
     user = models.ForeignKey(
         CustomUser, on_delete=models.CASCADE, related_name="rated_tvmedia"
     )
@@ -211,9 +300,21 @@ class UserTvMediaRating(models.Model):
     rating = models.IntegerField(
         validators=[MinValueValidator(1), MaxValueValidator(10)]
     )  # 1 to 10
+    # Watermark column for the incremental co-occurrence refresh
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ("user", "tvmedia")
+        indexes = [
+            # A user's high ratings (CF seeds); covers the item column too
+            models.Index(
+                fields=["user", "rating", "tvmedia"], name="utr_user_rating_tvmedia"
+            ),
+            # Co-raters of an item, index-only with the rating
+            models.Index(
+                fields=["tvmedia", "user", "rating"], name="utr_tvmedia_user_rating"
+            ),
+        ]
 
     def clean(self):
         if not (1 <= self.rating <= 10):
@@ -226,25 +327,275 @@ class UserTvMediaGenrePreference(models.Model):
     )
     genre = models.ForeignKey(TvGenre, on_delete=models.CASCADE)
     preference = models.FloatField()
+    # Running totals of the user's ratings on items of this genre
+    weighted_sum = models.IntegerField(default=0)
+    count = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = ("user", "genre")
+        indexes = [
+            models.Index(fields=["user", "-preference"], name="utgp_user_preference"),
+        ]
 
     def __str__(self):
         return f"{self.genre.name}: {self.preference:.2f}%"
 
 
+class RatingEvent(models.Model):
+    """
+    A rating change whose preference/cache maintenance has been deferred to
+    the ``process_rating_events`` worker (``RATING_WORK_MODE = "deferred"``).
+
+    ``user_id`` is deliberately not a foreign key: events are written while a
+    user's ratings are being cascade-deleted and the worker skips users that
+    no longer exist.  Events whose replay keeps failing are kept with
+    ``failed`` set for inspection instead of blocking the queue.
+    """
+
+    user_id = models.BigIntegerField(db_index=True)
+    item_field = models.CharField(max_length=10)  # "book" or "tvmedia"
+    item_id = models.UUIDField()
+    old_rating = models.IntegerField(null=True)
+    new_rating = models.IntegerField(null=True)
+    # Set when the delta is unknown and the worker must recompute from scratch
+    rebuild = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Failed replays; at MAX_EVENT_ATTEMPTS the event is set aside (dead letter)
+    attempts = models.PositiveIntegerField(default=0)
+    failed = models.BooleanField(default=False, db_index=True)
+    last_error = models.TextField(blank=True, default="")
+
+    def __str__(self):
+        return f"{self.item_field}:{self.item_id} {self.old_rating}->{self.new_rating}"
+
+
+def _apply_genre_rating_delta(
+    pref_model, user_id, genre_ids, old_rating, new_rating
+) -> bool:
+    """
+    Shift the running totals of ``genre_ids`` by one rating change.
+
+    ``old_rating`` is None for a new rating, ``new_rating`` is None for a
+    deleted one.  See ``apply_genre_totals_delta`` for the return value.
+    """
+    sum_delta = (new_rating or 0) - (old_rating or 0)
+    count_delta = (new_rating is not None) - (old_rating is not None)
+    return apply_genre_totals_delta(
+        pref_model,
+        user_id,
+        {genre_id: (sum_delta, count_delta) for genre_id in genre_ids},
+    )
+
+
+def apply_genre_totals_delta(pref_model, user_id, deltas) -> bool:
+    """
+    Shift per-genre running totals by ``{genre_id: (sum_delta, count_delta)}``
+    and re-derive the affected preferences.  Rows whose count drops to zero
+    are removed.
+
+    Returns False when the stored totals cannot be trusted (rows written
+    before totals were tracked), in which case the caller should rebuild.
+    """
+    deltas = {g: d for g, d in deltas.items() if d != (0, 0)}
+    if not deltas:
+        return True
+
+    with transaction.atomic():
+        existing = {
+            pref.genre_id: pref
+            for pref in pref_model.objects.select_for_update().filter(
+                user_id=user_id, genre_id__in=list(deltas)
+            )
+        }
+        if any(pref.count == 0 for pref in existing.values()):
+            return False
+
+        to_update, to_create, to_delete = [], [], []
+        for genre_id, (sum_delta, count_delta) in deltas.items():
+            pref = existing.get(genre_id)
+            if pref is None:
+                if count_delta <= 0:
+                    return False
+                pref = pref_model(user_id=user_id, genre_id=genre_id, preference=0)
+                to_create.append(pref)
+            else:
+                to_update.append(pref)
+            pref.weighted_sum += sum_delta
+            pref.count += count_delta
+            if pref.count <= 0:
+                to_delete.append(pref.pk)
+                to_update.remove(pref)
+            else:
+                pref.preference = genre_preference_from_totals(
+                    pref.weighted_sum, pref.count
+                )
+
+        if to_update:
+            pref_model.objects.bulk_update(
+                to_update, ["preference", "weighted_sum", "count"]
+            )
+        if to_create:
+            pref_model.objects.bulk_create(to_create)
+        if to_delete:
+            pref_model.objects.filter(pk__in=to_delete).delete()
+    return True
+
+
+def _rating_change(instance, created: bool):
+    """Return (old_rating, new_rating) for a saved rating, or None if unknown."""
+    if created:
+        old_rating = None
+    elif hasattr(instance, "_loaded_rating"):
+        old_rating = instance._loaded_rating
+    else:
+        return None
+    instance._loaded_rating = instance.rating
+    return old_rating, instance.rating
+
+
+def _defer_rating_change(user_id, item_field, item_id, change) -> bool:
+    """Queue the change for the worker when running in deferred mode."""
+    from myutils import rating_queue
+
+    if not rating_queue.is_deferred():
+        return False
+    old_rating, new_rating = change if change is not None else (None, None)
+    rating_queue.enqueue_rating_change(
+        user_id, item_field, item_id, old_rating, new_rating, rebuild=change is None
+    )
+    return True
+
+
 @receiver(post_save, sender=UserBookRating)
-def update_books_preferences(sender, instance, **kwargs):
+def update_books_preferences(sender, instance, created, **kwargs):
     from myutils.collaborative_filtering import invalidate_similarity_cache
-
-    instance.user.update_books_genre_preferences()
+    from myutils.item_stats import apply_item_stats_changes, recompute_item_stats
+
+    change = _rating_change(instance, created)
+    if change is not None and change[0] == change[1]:
+        return
+    if created:
+        invalidate_rated_items("book", instance.user_id)
+    if _defer_rating_change(instance.user_id, "book", instance.book_id, change):
+        return
+    if change is None:
+        instance.user.update_books_genre_preferences()
+        recompute_item_stats("book", [instance.book_id])
+    else:
+        instance.user.apply_books_rating_change(instance.book_id, *change)
+        apply_item_stats_changes("book", [(instance.book_id, *change)])
     invalidate_similarity_cache("book", instance.book_id)
 
 
 @receiver(post_save, sender=UserTvMediaRating)
-def update_media_preferences(sender, instance, **kwargs):
+def update_media_preferences(sender, instance, created, **kwargs):
     from myutils.collaborative_filtering import invalidate_similarity_cache
+    from myutils.item_stats import apply_item_stats_changes, recompute_item_stats
+
+    change = _rating_change(instance, created)
+    if change is not None and change[0] == change[1]:
+        return
+    if created:
+        invalidate_rated_items("tvmedia", instance.user_id)
+    if _defer_rating_change(instance.user_id, "tvmedia", instance.tvmedia_id, change):
+        return
+    if change is None:
+        instance.user.update_media_genre_preferences()
+        recompute_item_stats("tvmedia", [instance.tvmedia_id])
+    else:
+        instance.user.apply_media_rating_change(instance.tvmedia_id, *change)
+        apply_item_stats_changes("tvmedia", [(instance.tvmedia_id, *change)])
+    invalidate_similarity_cache("tvmedia", instance.tvmedia_id)
+
+
+@receiver(post_delete, sender=UserBookRating)
+def remove_books_rating(sender, instance, **kwargs):
+    from myutils.collaborative_filtering import invalidate_similarity_cache
+    from myutils.cooccurrence import mark_items_stale
+    from myutils.item_stats import apply_item_stats_changes
+
+    old_rating = getattr(instance, "_loaded_rating", instance.rating)
+    invalidate_rated_items("book", instance.user_id)
+    if _defer_rating_change(
+        instance.user_id, "book", instance.book_id, (old_rating, None)
+    ):
+        return
+    if not _apply_genre_rating_delta(
+        UserBooksGenrePreference,
+        instance.user_id,
+        list(
+            Book.genre.through.objects.filter(book_id=instance.book_id).values_list(
+                "genre_id", flat=True
+            )
+        ),
+        old_rating,
+        None,
+    ):
+        instance.user.update_books_genre_preferences()
+    apply_item_stats_changes("book", [(instance.book_id, old_rating, None)])
+    mark_items_stale("book", [instance.book_id])
+    cache.delete(recommendation_cache_key("book", instance.user_id))
+    invalidate_similarity_cache("book", instance.book_id)
+
 
-    instance.user.update_media_genre_preferences()
+@receiver(post_delete, sender=UserTvMediaRating)
+def remove_media_rating(sender, instance, **kwargs):
+    from myutils.collaborative_filtering import invalidate_similarity_cache
+    from myutils.cooccurrence import mark_items_stale
+    from myutils.item_stats import apply_item_stats_changes
+
+    old_rating = getattr(instance, "_loaded_rating", instance.rating)
+    invalidate_rated_items("tvmedia", instance.user_id)
+    if _defer_rating_change(
+        instance.user_id, "tvmedia", instance.tvmedia_id, (old_rating, None)
+    ):
+        return
+    if not _apply_genre_rating_delta(
+        UserTvMediaGenrePreference,
+        instance.user_id,
+        list(
+            TvMedia.genre.through.objects.filter(
+                tvmedia_id=instance.tvmedia_id
+            ).values_list("genre_id", flat=True)
+        ),
+        old_rating,
+        None,
+    ):
+        instance.user.update_media_genre_preferences()
+    apply_item_stats_changes("tvmedia", [(instance.tvmedia_id, old_rating, None)])
+    mark_items_stale("tvmedia", [instance.tvmedia_id])
+    cache.delete(recommendation_cache_key("tvmedia", instance.user_id))
     invalidate_similarity_cache("tvmedia", instance.tvmedia_id)
+
+
+@receiver(pre_save, sender=Book)
+@receiver(pre_save, sender=TvMedia)
+def assign_item_row_id(sender, instance, **kwargs):
+    from myutils.item_index import reserve_row_ids
+
+    if instance.row_id is None:
+        instance.row_id = reserve_row_ids("book" if sender is Book else "tvmedia")
+
+
+@receiver(m2m_changed, sender=Book.genre.through)
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=BookGenre)
+@receiver(post_delete, sender=BookGenre)
+def invalidate_book_catalog(sender, **kwargs):
+    from myutils.catalog import invalidate_catalog_caches
+
+    if kwargs.get("action", "post_").startswith("post_"):
+        invalidate_catalog_caches("book")
+
+
+@receiver(m2m_changed, sender=TvMedia.genre.through)
+@receiver(post_save, sender=TvMedia)
+@receiver(post_delete, sender=TvMedia)
+@receiver(post_save, sender=TvGenre)
+@receiver(post_delete, sender=TvGenre)
+def invalidate_tvmedia_catalog(sender, **kwargs):
+    from myutils.catalog import invalidate_catalog_caches
+
+    if kwargs.get("action", "post_").startswith("post_"):
+        invalidate_catalog_caches("tvmedia")
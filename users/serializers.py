@@ -2,6 +2,7 @@ from rest_framework import serializers
 
 from Books.serializers import BookSerializer
 from moviesNshows.serializers import TvMediaSerializer
+from myutils.bulk_ratings import MAX_BULK_RATINGS
 
 from .models import (  # BookGenre,; TvGenre,; UserBooksGenrePreference,; UserTvMediaGenrePreference,
     Book,
@@ -79,3 +80,29 @@ class TvMediaRatingSerializer(serializers.Serializer):
             user=user, tvmedia=tvmedia, defaults={"rating": rating}
         )
         return user_media_rating
+
+
+class BulkBookRatingRowSerializer(serializers.Serializer):
+    book = serializers.UUIDField()
+    rating = serializers.IntegerField(min_value=1, max_value=10)
+
+
+class BulkBookRatingSerializer(serializers.Serializer):
+    ratings = serializers.ListField(
+        child=BulkBookRatingRowSerializer(),
+        allow_empty=False,
+        max_length=MAX_BULK_RATINGS,
+    )
+
+
+class BulkTvMediaRatingRowSerializer(serializers.Serializer):
+    tvmedia = serializers.UUIDField()
+    rating = serializers.IntegerField(min_value=1, max_value=10)
+
+
+class BulkTvMediaRatingSerializer(serializers.Serializer):
+    ratings = serializers.ListField(
+        child=BulkTvMediaRatingRowSerializer(),
+        allow_empty=False,
+        max_length=MAX_BULK_RATINGS,
+    )
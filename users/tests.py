@@ -2,6 +2,7 @@ from django.apps import apps
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.test import TestCase
@@ -10,12 +11,15 @@ from Books.models import Book
 from Books.models import Genre as BookGenre
 from moviesNshows.models import Genre as TvGenre
 from moviesNshows.models import TvMedia
+from myutils.cache_codec import recommendation_cache_key
 from myutils.ExtraTools import scale
 from users.models import (
     CustomUser,
     UserBookRating,
+    UserBooksGenrePreference,
     UserTvMediaGenrePreference,
     UserTvMediaRating,
+    genre_preference_from_totals,
 )
 
 
@@ -66,7 +70,7 @@ class UserTvMediaRatingTestCase(TestCase):
         self.assertIn(self.genre2, preferences)
 
     def test_cache_invalidation_on_rating_save(self):
-        cache_key = f"{self.user.pk}_tvmedia_recomendation"
+        cache_key = recommendation_cache_key("tvmedia", self.user.pk)
 
         # Add something to cache
         cache.set(cache_key, "cached_data")
@@ -91,6 +95,226 @@ class UserTvMediaRatingTestCase(TestCase):
         self.assertIn(self.genre1, preferences)
 
 
+class IncrementalGenrePreferenceTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email="incremental@example.com", password="password", first_name="Inc"
+        )
+        self.fantasy = BookGenre.objects.create(name="Fantasy")
+        self.horror = BookGenre.objects.create(name="Horror")
+        self.book1 = Book.objects.create(
+            title="B1", author="A", isbn="inc-1", pages=100, likedPercent=80
+        )
+        self.book1.genre.set([self.fantasy, self.horror])
+        self.book2 = Book.objects.create(
+            title="B2", author="A", isbn="inc-2", pages=100, likedPercent=80
+        )
+        self.book2.genre.set([self.fantasy])
+
+    def _pref(self, genre):
+        return UserBooksGenrePreference.objects.get(user=self.user, genre=genre)
+
+    def test_create_accumulates_totals(self):
+        UserBookRating.objects.create(user=self.user, book=self.book1, rating=8)
+        UserBookRating.objects.create(user=self.user, book=self.book2, rating=4)
+
+        fantasy = self._pref(self.fantasy)
+        self.assertEqual((fantasy.weighted_sum, fantasy.count), (12, 2))
+        self.assertEqual(fantasy.preference, genre_preference_from_totals(12, 2))
+        horror = self._pref(self.horror)
+        self.assertEqual((horror.weighted_sum, horror.count), (8, 1))
+
+    def test_update_applies_delta(self):
+        UserBookRating.objects.create(user=self.user, book=self.book1, rating=8)
+        UserBookRating.objects.update_or_create(
+            user=self.user, book=self.book1, defaults={"rating": 2}
+        )
+        fantasy = self._pref(self.fantasy)
+        self.assertEqual((fantasy.weighted_sum, fantasy.count), (2, 1))
+        self.assertEqual(fantasy.preference, genre_preference_from_totals(2, 1))
+
+    def test_delete_removes_contribution(self):
+        UserBookRating.objects.create(user=self.user, book=self.book1, rating=8)
+        rating = UserBookRating.objects.create(
+            user=self.user, book=self.book2, rating=4
+        )
+        rating.delete()
+
+        fantasy = self._pref(self.fantasy)
+        self.assertEqual((fantasy.weighted_sum, fantasy.count), (8, 1))
+
+        UserBookRating.objects.get(user=self.user, book=self.book1).delete()
+        self.assertFalse(
+            UserBooksGenrePreference.objects.filter(user=self.user).exists()
+        )
+
+    def test_matches_full_recompute(self):
+        UserBookRating.objects.create(user=self.user, book=self.book1, rating=9)
+        UserBookRating.objects.create(user=self.user, book=self.book2, rating=3)
+        UserBookRating.objects.update_or_create(
+            user=self.user, book=self.book2, defaults={"rating": 6}
+        )
+        incremental = self.user.get_books_genre_preferences()
+        self.user.update_books_genre_preferences()
+        self.assertEqual(self.user.get_books_genre_preferences(), incremental)
+
+    def test_legacy_rows_trigger_rebuild(self):
+        UserBookRating.objects.create(user=self.user, book=self.book1, rating=8)
+        UserBooksGenrePreference.objects.filter(user=self.user).update(
+            weighted_sum=0, count=0
+        )
+        UserBookRating.objects.create(user=self.user, book=self.book2, rating=6)
+        fantasy = self._pref(self.fantasy)
+        self.assertEqual((fantasy.weighted_sum, fantasy.count), (14, 2))
+
+    def test_legacy_rows_rebuilt_on_delete(self):
+        UserBookRating.objects.create(user=self.user, book=self.book1, rating=8)
+        UserBookRating.objects.create(user=self.user, book=self.book2, rating=6)
+        UserBooksGenrePreference.objects.filter(user=self.user).update(
+            weighted_sum=0, count=0
+        )
+        UserBookRating.objects.get(user=self.user, book=self.book1).delete()
+        fantasy = self._pref(self.fantasy)
+        self.assertEqual((fantasy.weighted_sum, fantasy.count), (6, 1))
+        self.assertFalse(
+            UserBooksGenrePreference.objects.filter(
+                user=self.user, genre=self.horror
+            ).exists()
+        )
+
+
+class HotQueryIndexTestCase(TestCase):
+    """EXPLAIN the rating/preference hot queries: each must use its composite index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            CustomUser.objects.create_user(
+                email=f"idx{i}@example.com", password="password", first_name="Idx"
+            )
+            for i in range(20)
+        ]
+        cls.genres = [BookGenre.objects.create(name=f"IdxGenre{i}") for i in range(5)]
+        cls.books = Book.objects.bulk_create(
+            Book(title=f"Idx{i}", author="A", isbn=f"idx-{i}", pages=1, likedPercent=1)
+            for i in range(30)
+        )
+        UserBookRating.objects.bulk_create(
+            UserBookRating(user=u, book=b, rating=(i + j) % 10 + 1)
+            for i, u in enumerate(cls.users)
+            for j, b in enumerate(cls.books)
+        )
+        UserBooksGenrePreference.objects.bulk_create(
+            UserBooksGenrePreference(user=u, genre=g, preference=j)
+            for u in cls.users
+            for j, g in enumerate(cls.genres)
+        )
+        cls.tv_genres = [TvGenre.objects.create(name=f"IdxTv{i}") for i in range(5)]
+        cls.shows = TvMedia.objects.bulk_create(
+            TvMedia(media_type="Movie", original_title=f"Idx{i}") for i in range(30)
+        )
+        UserTvMediaRating.objects.bulk_create(
+            UserTvMediaRating(user=u, tvmedia=t, rating=(i + j) % 10 + 1)
+            for i, u in enumerate(cls.users)
+            for j, t in enumerate(cls.shows)
+        )
+        UserTvMediaGenrePreference.objects.bulk_create(
+            UserTvMediaGenrePreference(user=u, genre=g, preference=j)
+            for u in cls.users
+            for j, g in enumerate(cls.tv_genres)
+        )
+
+    def _assert_uses_index(self, queryset, index, covering=False):
+        """The plan reads through ``index`` itself, not a baseline FK index."""
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                # Tiny fixtures; the index name check below keeps this honest
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset.explain()
+            scan = "Index Only Scan" if covering else "Index Scan"
+            self.assertIn(f"{scan} using {index}", plan, plan)
+        elif connection.vendor == "sqlite":
+            plan = queryset.explain()
+            scan = "USING COVERING INDEX" if covering else "USING INDEX"
+            self.assertIn(f"{scan} {index} ", plan, plan)
+        else:
+            self.skipTest(f"No plan check for {connection.vendor}")
+        self.assertNotIn("TEMP B-TREE", plan, plan)
+
+    def test_high_ratings_of_user(self):
+        self._assert_uses_index(
+            UserBookRating.objects.filter(
+                user=self.users[0], rating__gte=7
+            ).values_list("book", "rating"),
+            "ubr_user_rating_book",
+            covering=True,
+        )
+
+    def test_co_raters_of_item(self):
+        self._assert_uses_index(
+            UserBookRating.objects.filter(book=self.books[0]).values_list(
+                "user_id", "rating"
+            ),
+            "ubr_book_user_rating",
+            covering=True,
+        )
+
+    def test_ratings_of_co_raters(self):
+        self._assert_uses_index(
+            UserBookRating.objects.filter(
+                user_id__in=[u.pk for u in self.users[:5]]
+            ).values_list("user_id", "book_id", "rating"),
+            "ubr_user_rating_book",
+            covering=True,
+        )
+
+    def test_genre_preferences_ordered(self):
+        self._assert_uses_index(
+            self.users[0].books_genre_preferences.order_by("-preference"),
+            "ubgp_user_preference",
+        )
+
+    def test_tvmedia_high_ratings_of_user(self):
+        self._assert_uses_index(
+            UserTvMediaRating.objects.filter(
+                user=self.users[0], rating__gte=7
+            ).values_list("tvmedia", "rating"),
+            "utr_user_rating_tvmedia",
+            covering=True,
+        )
+
+    def test_tvmedia_co_raters_of_item(self):
+        self._assert_uses_index(
+            UserTvMediaRating.objects.filter(tvmedia=self.shows[0]).values_list(
+                "user_id", "rating"
+            ),
+            "utr_tvmedia_user_rating",
+            covering=True,
+        )
+
+    def test_tvmedia_ratings_of_co_raters(self):
+        self._assert_uses_index(
+            UserTvMediaRating.objects.filter(
+                user_id__in=[u.pk for u in self.users[:5]]
+            ).values_list("user_id", "tvmedia_id", "rating"),
+            "utr_user_rating_tvmedia",
+            covering=True,
+        )
+
+    def test_tvmedia_genre_preferences_ordered(self):
+        self._assert_uses_index(
+            self.users[0].media_genre_preferences.order_by("-preference"),
+            "utgp_user_preference",
+        )
+
+    def test_preference_indexes_declared(self):
+        for model, name in (
+            (UserBooksGenrePreference, "ubgp_user_preference"),
+            (UserTvMediaGenrePreference, "utgp_user_preference"),
+        ):
+            self.assertIn(name, [index.name for index in model._meta.indexes])
+
+
 class UserTestCase(TestCase):
     def setUp(self):
         self.user = CustomUser.objects.create_user(